@@ -4,7 +4,8 @@ from .models import (
     User, Profile, ServiceCategory, Service,
     Consultant, ConsultationSlot, Consultation,
     Document, Notification, Review, Advertisement,
-    FAQ, ConsultationRequest
+    FAQ, ConsultationRequest, LoginThrottlePolicy,
+    WorkingHours, WorkingHoursException, SearchQueryStat
 )
 
 class CustomUserAdmin(UserAdmin):
@@ -36,11 +37,20 @@ class ServiceAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
     raw_id_fields = ('provider', 'category')
 
+class WorkingHoursInline(admin.TabularInline):
+    model = WorkingHours
+    extra = 0
+
+class WorkingHoursExceptionInline(admin.TabularInline):
+    model = WorkingHoursException
+    extra = 0
+
 class ConsultantAdmin(admin.ModelAdmin):
     list_display = ('user', 'available', 'rating')
     list_filter = ('available',)
     filter_horizontal = ('categories',)
     raw_id_fields = ('user',)
+    inlines = [WorkingHoursInline, WorkingHoursExceptionInline]
 
 class ConsultationSlotAdmin(admin.ModelAdmin):
     list_display = ('provider', 'start_time', 'end_time', 'is_booked')
@@ -79,6 +89,16 @@ class FAQAdmin(admin.ModelAdmin):
     search_fields = ('question', 'answer')
 
 
+class LoginThrottlePolicyAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'enabled', 'ip_capacity', 'ip_per_minute', 'email_capacity', 'email_per_minute', 'updated_at')
+    list_editable = ('enabled', 'ip_capacity', 'ip_per_minute', 'email_capacity', 'email_per_minute')
+
+
+class SearchQueryStatAdmin(admin.ModelAdmin):
+    list_display = ('query', 'source', 'day', 'searches', 'zero_results', 'clicks')
+    list_filter = ('source', 'day')
+    search_fields = ('query',)
+
 
 # تسجيل النماذج مرة واحدة فقط
 admin.site.register(User, CustomUserAdmin)
@@ -93,4 +113,6 @@ admin.site.register(Notification, NotificationAdmin)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Advertisement, AdvertisementAdmin)
 admin.site.register(FAQ, FAQAdmin)
-admin.site.register(ConsultationRequest)
\ No newline at end of file
+admin.site.register(ConsultationRequest)
+admin.site.register(LoginThrottlePolicy, LoginThrottlePolicyAdmin)
+admin.site.register(SearchQueryStat, SearchQueryStatAdmin)
@@ -0,0 +1,155 @@
+"""نقل السجلات المغلقة القديمة إلى جداول الأرشيف (Archived*) على دفعات.
+
+- المؤهل: طلبات الاستشارة المكتملة/المرفوضة، والحجوزات والاستشارات المنتهية/الملغاة
+  التي لم تتغير منذ ARCHIVE['after_months'] شهراً وانقضى موعدها، ثم المواعيد
+  المنقضية التي لم يعد يشير إليها شيء في الجداول النشطة.
+- كل دفعة معاملة واحدة: قفل الصفوف (SKIP LOCKED على PostgreSQL)، نسخها بنفس
+  المعرّف، ثم حذفها بـ delete() العادي في نفس المعاملة، فتُطلق إشارات الحذف
+  (الترتيب، الصفحات، شريط التنقل) وتُفرَّغ المراجع إليها (Document) كما في أي حذف.
+- القراءة من الأرشيف فقط عندما يطلب المستخدم السجل (?history=1) أو يفتح سجلاً
+  مؤرشفاً؛ History يدمج الجدولين مرتبين ومقسّمين في SQL.
+"""
+import heapq
+from dataclasses import dataclass, field
+from itertools import islice
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .models import (
+    ArchivedBooking, ArchivedConsultation, ArchivedConsultationRequest, ArchivedConsultationSlot,
+    Booking, Consultation, ConsultationRequest, ConsultationSlot,
+)
+
+
+@dataclass(frozen=True)
+class Spec:
+    name: str
+    model: type
+    archive: type
+    eligible: object  # cutoff -> QuerySet
+    fields: tuple
+    expressions: dict = field(default_factory=dict)
+
+
+_SLOT_TIMES = {'slot_start_time': F('slot__start_time'), 'slot_end_time': F('slot__end_time')}
+
+SPECS = (
+    Spec(
+        'requests', ConsultationRequest, ArchivedConsultationRequest,
+        lambda before: ConsultationRequest.objects.filter(
+            status__in=('completed', 'rejected'), updated_at__lt=before,
+        ),
+        ('id', 'client_id', 'consultant_id', 'question', 'response', 'status', 'created_at', 'updated_at'),
+    ),
+    Spec(
+        'bookings', Booking, ArchivedBooking,
+        lambda before: Booking.objects.filter(
+            Q(slot__isnull=True) | Q(slot__end_time__lt=before),
+            status__in=(Booking.Status.COMPLETED, Booking.Status.CANCELLED), updated_at__lt=before,
+        ),
+        ('id', 'client_id', 'service_id', 'slot_id', 'status', 'notes', 'created_at', 'updated_at'),
+        _SLOT_TIMES,
+    ),
+    Spec(
+        'consultations', Consultation, ArchivedConsultation,
+        lambda before: Consultation.objects.filter(
+            status__in=(Consultation.Status.COMPLETED, Consultation.Status.CANCELLED),
+            updated_at__lt=before, slot__end_time__lt=before,
+        ),
+        ('id', 'slot_id', 'client_id', 'service_id', 'notes', 'status', 'created_at', 'updated_at'),
+        dict(_SLOT_TIMES, provider_id=F('slot__provider_id')),
+    ),
+    # أخيراً: بعد نقل الحجوزات والاستشارات التي تشير إليها
+    Spec(
+        'slots', ConsultationSlot, ArchivedConsultationSlot,
+        lambda before: ConsultationSlot.objects.filter(
+            ~Exists(Booking.objects.filter(slot=OuterRef('pk'))),
+            end_time__lt=before, consultation__isnull=True,
+        ),
+        ('id', 'provider_id', 'start_time', 'end_time', 'is_booked'),
+    ),
+)
+
+
+def cutoff(months=None, now=None):
+    months = settings.ARCHIVE['after_months'] if months is None else months
+    return (now or timezone.now()) - timedelta(days=30 * months)
+
+
+def move_batch(spec, before, batch_size):
+    """ينقل حتى batch_size صفاً ويعيد عددها؛ 0 يعني انتهاء المؤهل (أو قفل الباقي)."""
+    using = router.db_for_write(spec.model)
+    with transaction.atomic(using=using):
+        rows = list(
+            spec.eligible(before).using(using)
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('pk')
+            .values(*spec.fields, **spec.expressions)[:batch_size]
+        )
+        if rows:
+            spec.archive.objects.using(using).bulk_create([spec.archive(**row) for row in rows])
+            spec.model.objects.using(using).filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive(months=None, batch_size=None, now=None):
+    """{اسم: عدد المنقول} لكل الجداول بالترتيب."""
+    before = cutoff(months, now)
+    batch_size = batch_size or settings.ARCHIVE['batch_size']
+    moved = {}
+    for spec in SPECS:
+        moved[spec.name] = 0
+        while count := move_batch(spec, before, batch_size):
+            moved[spec.name] += count
+    return moved
+
+
+def pending(months=None, now=None):
+    """أعداد المؤهل الآن؛ المواعيد تُحسب قبل نقل ما يشير إليها فتظهر أقل من الفعلي."""
+    before = cutoff(months, now)
+    return {spec.name: spec.eligible(before).count() for spec in SPECS}
+
+
+class History:
+    """النشط والمؤرشف كتسلسل واحد، الأحدث أولاً، يقبل التقطيع والعد كما يتوقع Paginator.
+
+    الشريحة [start:stop] تجلب أول stop صفاً من كل جدول بنفس الترتيب في SQL ثم
+    تدمجها، فلا يُقرأ من أي جدول أكثر مما يسبق نهاية الصفحة المطلوبة.
+    """
+    ORDERING = ('-created_at', '-pk')
+
+    def __init__(self, live, archived):
+        self.sources = [queryset.order_by(*self.ORDERING) for queryset in (live, archived)]
+
+    @staticmethod
+    def _merge(sources):
+        return heapq.merge(*sources, key=lambda row: (row.created_at, row.pk), reverse=True)
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.sources)
+
+    def __len__(self):
+        return self.count()
+
+    def __bool__(self):
+        return any(queryset.exists() for queryset in self.sources)
+
+    def __iter__(self):
+        return self._merge(self.sources)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        if stop is None:
+            return list(islice(self, start, None))
+        return list(islice(self._merge([queryset[:stop] for queryset in self.sources]), start, stop))
+
+
+def with_history(live, archived):
+    """النشط والمؤرشف في تسلسل واحد، الأحدث أولاً (History)."""
+    return History(live, archived)
@@ -0,0 +1,59 @@
+"""أول موعد متاح وعدد المواعيد المتاحة خلال الأيام السبعة القادمة لكل مستشار.
+
+تُحفظ القيم في Consultant.next_free_slot_at و free_slots_7d حتى تكون تصفية
+"متاح هذا الأسبوع" والترتيب بأقرب موعد مسحاً لفهرس واحد بدل استعلام فرعي
+على ConsultationSlot لكل مستشار. تُحدَّث عند حفظ موعد أو حذفه (core.signals)،
+وبعد generate_slots، وأمر refresh_availability الدوري يعالج المواعيد المنقضية.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .db_router import use_primary
+from .models import Consultant, ConsultationSlot
+
+WINDOW_DAYS = 7
+
+
+def _refresh_batch(consultants, now):
+    """consultants: [(pk, user_id)]؛ تجميع واحد على مواعيدهم ثم تحديث واحد."""
+    stats = {
+        row['provider_id']: row
+        for row in ConsultationSlot.objects.filter(
+            is_booked=False, start_time__gte=now, provider_id__in=[user_id for _, user_id in consultants],
+        ).values('provider_id').annotate(
+            first=Min('start_time'),
+            week=Count('id', filter=Q(start_time__lt=now + timedelta(days=WINDOW_DAYS))),
+        ).order_by()
+    }
+    updated = []
+    for pk, user_id in consultants:
+        row = stats.get(user_id, {})
+        updated.append(Consultant(pk=pk, next_free_slot_at=row.get('first'), free_slots_7d=row.get('week', 0)))
+    Consultant.objects.bulk_update(updated, ['next_free_slot_at', 'free_slots_7d'])
+    return len(updated)
+
+
+@use_primary()
+def refresh(user_ids=None, now=None, batch_size=1000):
+    """يعيد حساب القيم لمقدمي الخدمة user_ids (أو للجميع) ويعيد عدد المستشارين.
+
+    على دفعات من batch_size مستشاراً بترتيب pk، فلا يُحمَّل الجميع في الذاكرة مرة واحدة.
+    """
+    now = now or timezone.now()
+    consultants = Consultant.objects.order_by('pk')
+    if user_ids is not None:
+        consultants = consultants.filter(user_id__in=user_ids)
+    count = last = 0
+    while batch := list(consultants.filter(pk__gt=last).values_list('pk', 'user_id')[:batch_size]):
+        count += _refresh_batch(batch, now)
+        last = batch[-1][0]
+    return count
+
+
+def stale_provider_ids(now=None):
+    """مقدمو الخدمة الذين انقضى موعدهم المحفوظ (مسح فهرس على next_free_slot_at)."""
+    return list(
+        Consultant.objects.filter(next_free_slot_at__lt=now or timezone.now()).values_list('user_id', flat=True)
+    )
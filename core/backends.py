@@ -1,22 +1,96 @@
+import copy
+import time
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.functions import Lower
+
+from .checks import is_process_local
 
 User = get_user_model()
 
-class EmailAuthBackend(ModelBackend):
-    def authenticate(self, request, email=None, password=None, **kwargs):
+# نسخ المستخدمين المحمّلة في هذه العملية: user_id -> (وقت الانتهاء، الإصدار، المستخدم)
+_user_cache = {}
+
+
+def _version_cache():
+    return caches[settings.AUTH_USER_VERSION_CACHE]
+
+
+def _version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def get_user_version(user_id):
+    return _version_cache().get(_version_key(user_id), 0)
+
+
+def invalidate_cached_user(user_id):
+    """يُستدعى عند حفظ User أو Profile أو Consultant.
+
+    رفع الإصدار في الذاكرة المشتركة يُبطل النسخ المحفوظة في بقية العمليات.
+    """
+    _user_cache.pop(user_id, None)
+    cache = _version_cache()
+    key = _version_key(user_id)
+    if not cache.add(key, 1, None):
         try:
-            user = User.objects.get(email=email)
-            if user.check_password(password):
-                return user
-        except User.DoesNotExist:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+class EmailAuthBackend(ModelBackend):
+    """مصادقة بالبريد في مرور واحد: بحث واحد غير حساس لحالة الأحرف وتجزئة واحدة.
+
+    يحل محل ModelBackend (لا داعي لإضافته بعده في AUTHENTICATION_BACKENDS)،
+    ويقبل username أيضاً لأن USERNAME_FIELD هو email (لوحة الإدارة مثلاً).
+    """
+
+    def authenticate(self, request, email=None, password=None, username=None, **kwargs):
+        email = email or username or kwargs.get(User.USERNAME_FIELD)
+        if not email or password is None:
             return None
-        except User.MultipleObjectsReturned:
-            # في حالة وجود عدة مستخدمين بنفس البريد (لا ينبغي أن يحدث)
-            return User.objects.filter(email=email).first()
-    
+        # يطابق الفهرس الوظيفي على lower(email)
+        user = (
+            User._default_manager
+            .alias(email_lower=Lower('email'))
+            .filter(email_lower=email.strip().lower())
+            .order_by('pk')
+            .first()
+        )
+        if user is None:
+            # تشغيل المجزّئ على كلمة وهمية ليبقى زمن الاستجابة ثابتاً
+            User().set_password(password)
+            return None
+        # غير النشط يُرفض بعد التجزئة حتى لا يكشف الزمن حالته
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
     def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
\ No newline at end of file
+        """المستخدم مع profile و consultant في استعلام واحد، مع نسخة لكل عملية.
+
+        النسخة صالحة حتى AUTH_USER_CACHE_TTL ثانية ما لم يتغير إصدار المستخدم، وتُعطَّل
+        إذا كانت ذاكرة الإصدارات محلية للعملية: الإبطال لن يصل لبقية العمال.
+        """
+        ttl = 0 if is_process_local(settings.AUTH_USER_VERSION_CACHE) else getattr(settings, 'AUTH_USER_CACHE_TTL', 0)
+        now = time.monotonic()
+        version = get_user_version(user_id) if ttl else 0
+        cached = _user_cache.get(user_id)
+        if cached and cached[0] > now and cached[1] == version:
+            # نسخة عميقة: copy.copy يشارك profile و consultant المحمّلين بين الطلبات
+            return copy.deepcopy(cached[2])
+        user = (
+            User._default_manager
+            .select_related('profile', 'consultant')
+            .filter(pk=user_id)
+            .first()
+        )
+        if user is None or not self.user_can_authenticate(user):
+            return None
+        if ttl:
+            _user_cache[user_id] = (now + ttl, version, copy.deepcopy(user))
+        return user
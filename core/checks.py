@@ -0,0 +1,40 @@
+"""فحوص النظام (manage.py check) للذاكرات التي تُشارَك بين العمال."""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# ما يُكتب فيها لا تراه بقية العمليات (عمال gunicorn)
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_process_local(alias):
+    return settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_BACKENDS
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    # cached_db يحذف من الذاكرة عند تسجيل الخروج؛ ذاكرة محلية تُبقي الجلسة حية في بقية العمال
+    if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.cached_db' and is_process_local(settings.SESSION_CACHE_ALIAS):
+        errors.append(Error(
+            f"SESSION_BACKEND=cached_db يتطلب ذاكرة مشتركة في CACHES['{settings.SESSION_CACHE_ALIAS}'].",
+            hint='عيّن SESSION_CACHE_BACKEND و SESSION_CACHE_LOCATION (Redis/Memcached/DatabaseCache).',
+            id='core.E001',
+        ))
+    return errors
+
+
+@register(Tags.caches, deploy=True)
+def check_page_cache(app_configs, **kwargs):
+    # الإبطال يرفع إصدار الوسم في ذاكرة 'pages'؛ نسخة لكل عملية تعني أن بقية العمال لا ترى الإبطال
+    if settings.PAGE_CACHE_TIMEOUT and is_process_local(settings.PAGE_CACHE_ALIAS):
+        return [Warning(
+            f"CACHES['{settings.PAGE_CACHE_ALIAS}'] محلية لكل عملية: الإبطال (page_cache.purge) لا يصل إلا "
+            f"للعامل الذي كتب، وبقية العمال تعرض الصفحات القديمة حتى PAGE_CACHE_TIMEOUT.",
+            hint='عيّن PAGE_CACHE_BACKEND و PAGE_CACHE_LOCATION لذاكرة مشتركة (Redis/Memcached/DatabaseCache)، '
+                 'أو PAGE_CACHE_TIMEOUT=0 مع أكثر من عامل.',
+            id='core.W001',
+        )]
+    return []
@@ -0,0 +1,76 @@
+"""طلبات GET الشرطية (ETag / Last-Modified) لصفحات التفاصيل والقوائم.
+
+المُدقّق يُحسب باستعلام واحد مفهرس قبل تشغيل استعلامات الصفحة الثقيلة؛
+إذا طابق ما لدى المتصفح نعيد 304 مباشرة.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .backends import get_user_version
+from .navbar import get_navbar
+from .page_cache import normalized_query
+
+
+def _etag(request, version):
+    user = request.user
+    parts = [
+        request.path,
+        normalized_query(request),
+        str(version),
+        timezone.localdate().isoformat(),
+        # الصفحة تحمل رمز CSRF المشتق من كوكي الزائر
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ]
+    if user.is_authenticated:
+        # شارات شريط التنقل جزء من الصفحة
+        navbar = get_navbar(user)
+        parts += [
+            str(user.pk), str(get_user_version(user.pk)),
+            str(navbar['unread_notifications']), str(navbar['pending_requests']),
+        ]
+    return quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+
+def conditional_page(validator):
+    """validator(request, *args, **kwargs) -> (version, last_modified) أو None إن لم توجد الصفحة.
+
+    Last-Modified يُرسل للزوار فقط: المتصفح قد يرسل If-Modified-Since وحده،
+    والصفحة المسجلة تتغير بتغير المستخدم لا بتاريخ البيانات فقط.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+                return view(request, *args, **kwargs)
+            validated = validator(request, *args, **kwargs)
+            if validated is None:
+                return view(request, *args, **kwargs)
+            version, last_modified = validated
+            etag = _etag(request, version)
+            if request.user.is_authenticated or last_modified is None:
+                timestamp = None
+            else:
+                timestamp = int(last_modified.timestamp())
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.headers.setdefault('ETag', etag)
+                if timestamp is not None:
+                    response.headers.setdefault('Last-Modified', http_date(timestamp))
+                patch_vary_headers(response, ['Cookie'])
+            return response
+        return wrapper
+    return decorator
+
+
+def hour_floor(now=None):
+    """بداية الساعة الحالية؛ للصفحات التي تعرض مواعيد تنقضي مع الوقت."""
+    return (now or timezone.now()).replace(minute=0, second=0, microsecond=0)
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from .navbar import get_navbar
+
+
+def navbar(request):
+    """حالة شريط التنقل؛ تُحسب مرة واحدة لكل طلب وعند أول استخدام في القالب فقط."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'navbar': None}
+    return {'navbar': SimpleLazyObject(lambda: get_navbar(user))}
@@ -0,0 +1,52 @@
+"""مقاييس تجمع اتصالات psycopg 3 (DATABASE_POOL=1) لكل قاعدة في هذه العملية.
+
+العدّادات تراكمية منذ فتح التجمع (get_stats من psycopg_pool)؛ كل عامل gunicorn
+له تجمعه، فالقيم تخص العامل الذي أجاب الطلب.
+"""
+from django.db import connections
+
+
+def _pool(alias):
+    connection = connections[alias]
+    return getattr(connection, 'pool', None) if connection.vendor == 'postgresql' else None
+
+
+def pool_stats(alias):
+    pool = _pool(alias)
+    if pool is None:
+        settings_dict = connections[alias].settings_dict
+        return {
+            'mode': 'persistent' if settings_dict.get('CONN_MAX_AGE') else 'per-request',
+            'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+            'health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+        }
+    stats = pool.get_stats()
+    size, available = stats.get('pool_size', 0), stats.get('pool_available', 0)
+    checkouts = stats.get('requests_num', 0)
+    queued = stats.get('requests_queued', 0)
+    wait_ms = stats.get('requests_wait_ms', 0)
+    return {
+        'mode': 'pool',
+        'min_size': stats.get('pool_min'),
+        'max_size': stats.get('pool_max'),
+        'size': size,
+        'in_use': size - available,
+        'available': available,
+        'waiting': stats.get('requests_waiting', 0),
+        # نسبة الاتصالات المستخدمة من الحد الأقصى؛ 1 مع waiting > 0 يعني تشبّع التجمع
+        'saturation': round((size - available) / stats['pool_max'], 3) if stats.get('pool_max') else 0,
+        'checkouts': checkouts,
+        'queued_checkouts': queued,
+        'wait_ms_total': wait_ms,
+        'wait_ms_avg_queued': round(wait_ms / queued, 2) if queued else 0,
+        'checkout_errors': stats.get('requests_errors', 0),
+        'bad_returns': stats.get('returns_bad', 0),
+        'connections_opened': stats.get('connections_num', 0),
+        'connect_ms_total': stats.get('connections_ms', 0),
+        'connection_errors': stats.get('connections_errors', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+    }
+
+
+def all_stats():
+    return {alias: pool_stats(alias) for alias in connections}
@@ -0,0 +1,168 @@
+"""توجيه القراءات إلى نسخ القراءة (replica_*) والكتابات إلى القاعدة الرئيسية.
+
+- الكتابات والترحيلات على 'default' دائماً.
+- القراءات داخل معاملة على 'default' أو في طلب غير آمن (POST...) أو في طلب
+  "مثبّت" تبقى على 'default'. الطلب يُثبَّت عند أول كتابة فيه، والجلسة تبقى
+  مثبّتة REPLICA_PIN_SECONDS بعدها عبر كوكي (ReplicaPinMiddleware)، فيرى
+  المستخدم حجزه فوراً رغم تأخر النسخ.
+- صحة كل نسخة تُفحص كل REPLICA_HEALTH['interval'] ثانية (الاتصال، والتأخر على
+  PostgreSQL)؛ عند تعطل كل النسخ تعود القراءات إلى 'default'.
+"""
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'primary_until'
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_pinned = ContextVar('db_pinned', default=False)
+
+
+def replicas():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+def pin():
+    """القراءات التالية في هذا الطلب/الخيط على القاعدة الرئيسية."""
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextmanager
+def use_primary():
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaHealth:
+    """حالة النسخ في هذه العملية؛ الفحص الفعلي مرة كل interval ثانية لكل نسخة."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+
+    def _probe(self, alias):
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # نسخة طبّقت كل ما استلمته ليست متأخرة حتى لو لم تصلها كتابات منذ مدة
+                cursor.execute(
+                    'SELECT CASE WHEN NOT pg_is_in_recovery() '
+                    'OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+                    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+                )
+                lag = float(cursor.fetchone()[0])
+                if lag > settings.REPLICA_HEALTH['max_lag']:
+                    logger.warning('النسخة %s متأخرة %.1f ثانية', alias, lag)
+                    return False
+            else:
+                cursor.execute('SELECT 1')
+        return True
+
+    def healthy(self, alias):
+        now = time.monotonic()
+        ok, checked_at = self._checked.get(alias, (True, None))
+        if checked_at is not None and now - checked_at < settings.REPLICA_HEALTH['interval']:
+            return ok
+        with self._lock:
+            ok, checked_at = self._checked.get(alias, (True, None))
+            if checked_at is not None and now - checked_at < settings.REPLICA_HEALTH['interval']:
+                return ok
+            try:
+                ok = self._probe(alias)
+            except Exception:
+                logger.warning('النسخة %s غير متاحة', alias, exc_info=True)
+                connections[alias].close()
+                ok = False
+            self._checked[alias] = (ok, now)
+            return ok
+
+    def status(self):
+        return {alias: ok for alias, (ok, _) in self._checked.items()}
+
+
+health = ReplicaHealth()
+_rotation = itertools.count()
+
+
+def read_alias():
+    """نسخة سليمة بالتناوب، أو 'default'."""
+    aliases = replicas()
+    if not aliases or is_pinned() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    start = next(_rotation)
+    for offset in range(len(aliases)):
+        alias = aliases[(start + offset) % len(aliases)]
+        if health.healthy(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # كلها نفس البيانات
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """يثبّت الطلب على الرئيسية بعد كتابة، ويمد التثبيت للجلسة بكوكي قصير العمر."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+        token = _pinned.set(self._pinned_by_request(request))
+        wrote = []
+
+        def detect_write(execute, sql, params, many, context):
+            if not wrote and sql.lstrip()[:7].upper().startswith(WRITE_PREFIXES):
+                wrote.append(True)
+                pin()
+            return execute(sql, params, many, context)
+
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(detect_write):
+                response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        if wrote:
+            window = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time()) + window), max_age=window,
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
+
+    @staticmethod
+    def _pinned_by_request(request):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return True
+        try:
+            return int(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,148 @@
+"""تقديم الوثائق الخاصة بعد التحقق من الصلاحية.
+
+في الإنتاج يُسلَّم نقل الملف للخادم الأمامي (nginx عبر X-Accel-Redirect أو
+Apache عبر X-Sendfile) فلا يبقى عامل gunicorn مشغولاً طوال التحميل.
+في بيئة التطوير يُقدَّم الملف من بايثون مع دعم طلبات Range.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.views.static import serve
+
+# مجلد الوثائق الخاصة تحت MEDIA_ROOT (upload_to في Document.file)
+PRIVATE_MEDIA_DIR = 'documents'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+def _content_type(document, name):
+    if document.mime_type:
+        return document.mime_type
+    content_type, encoding = mimetypes.guess_type(name)
+    return content_type or 'application/octet-stream'
+
+
+def _parse_range(header, size):
+    """يعيد (start, end) شاملاً، أو None إذا كان الترويس غير مدعوم، أو False إذا كان غير قابل للتلبية."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500 تعني آخر 500 بايت
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+
+def _iter_range(fh, start, length):
+    try:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fh.read(min(BLOCK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def _local_path(field):
+    try:
+        return field.path
+    except NotImplementedError:
+        # التخزين البعيد (Cloudinary) لا يملك مساراً محلياً
+        return None
+
+
+def _accel_response(document, filename):
+    response = HttpResponse(content_type=_content_type(document, filename))
+    prefix = settings.DOCUMENT_ACCEL_PREFIX.rstrip('/')
+    response['X-Accel-Redirect'] = f"{prefix}/{quote(document.file.name)}"
+    # nginx يتولى Range و Content-Length بنفسه
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _sendfile_response(document, path, filename):
+    response = HttpResponse(content_type=_content_type(document, filename))
+    response['X-Sendfile'] = path
+    return response
+
+
+def _python_response(request, document, filename):
+    field = document.file
+    # الحجم المخزّن عند الرفع يغني عن سؤال التخزين
+    size = document.file_size if document.file_size is not None else field.size
+    range_header = request.headers.get('Range')
+    byte_range = _parse_range(range_header, size) if range_header else None
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    field.open('rb')
+    if byte_range is None:
+        response = FileResponse(field.file, content_type=_content_type(document, filename))
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_range(field.file, start, length),
+            status=206,
+            content_type=_content_type(document, filename),
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def serve_document(request, document):
+    """إرجاع استجابة تحميل الوثيقة حسب DOCUMENT_SERVE_MODE."""
+    filename = os.path.basename(document.file.name)
+    mode = settings.DOCUMENT_SERVE_MODE
+
+    if mode == 'nginx':
+        response = _accel_response(document, filename)
+    elif mode == 'apache' and _local_path(document.file):
+        response = _sendfile_response(document, _local_path(document.file), filename)
+    else:
+        response = _python_response(request, document, filename)
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['Accept-Ranges'] = 'bytes'
+    # الوثائق خاصة: لا تخزين في الوسطاء
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+def serve_public_media(request, path, document_root=None):
+    """الوسائط العامة في التطوير؛ الوثائق الخاصة تمر فقط عبر download_document.
+
+    المسار يُطبَّع كما يطبّعه serve نفسه (//، ./، ../) قبل فحص المجلد الخاص،
+    فلا يصل '/media//documents/x' أو '/media/x/../documents/x' إلى الملف.
+    """
+    normalized = posixpath.normpath(path.replace('\\', '/')).lstrip('/')
+    top = normalized.split('/', 1)[0].lower()
+    if top in (PRIVATE_MEDIA_DIR, '..'):
+        raise Http404
+    return serve(request, normalized, document_root=document_root)
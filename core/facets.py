@@ -0,0 +1,213 @@
+"""أعداد التصفية (facets) لصفحة تصفح المستشارين.
+
+- ServiceCategory.consultant_count يحفظ عدد المستشارين المتاحين لكل تخصص،
+  ويُحدَّث تزايدياً من إشارات جدول الربط وتبديل available (core.signals).
+- عند وجود فلاتر أخرى (السعر، التقييم، البحث) تُحسب الأعداد بتجميع واحد
+  وتُحفظ لكل تركيبة فلاتر مع إصدارات وسوم 'consultants' و 'categories' في
+  core.page_cache، فأي تغيير يبطلها تلقائياً. مع ذاكرة محلية للعملية لا يصل الإبطال
+  لبقية العمال، فلا تعيش الأعداد حينها أكثر من الصفحة المحفوظة حولها (PAGE_CACHE_TIMEOUT).
+- العدد الكلي للنتائج يُحفظ بنفس الطريقة ويُمرَّر للترقيم بدل COUNT(DISTINCT).
+- Consultant.rating (فلتر min_rating وترتيب "الأعلى تقييماً") متوسط تقييمات خدمات
+  المستشار، يُحدَّث من إشارات Review وفي recount_facets.
+"""
+import hashlib
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from functools import cached_property
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db.models import Avg, Count, Exists, F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from . import page_cache
+from .checks import is_process_local
+from .db_router import use_primary
+from .models import Consultant, Review, Service, ServiceCategory
+
+Through = Consultant.categories.through
+
+# قيم available_within المقبولة -> عدد الأيام
+AVAILABLE_WITHIN = {'today': 1, 'week': 7}
+
+
+def _cache():
+    return caches[settings.FACET_CACHE]
+
+
+# ---- الأعداد المحفوظة ---- #
+def adjust_counts(deltas):
+    """deltas: {category_id: +n/-n}"""
+    for category_id, delta in deltas.items():
+        if delta:
+            ServiceCategory.objects.filter(pk=category_id).update(consultant_count=F('consultant_count') + delta)
+
+
+def recount(category_ids=None):
+    """إعادة حساب كاملة (للإصلاح أو بعد عمليات لا تُطلق إشارات)."""
+    categories = ServiceCategory.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(pk__in=category_ids)
+    for category in categories.annotate(
+        available=Count('consultant', filter=Q(consultant__available=True))
+    ).only('pk'):
+        ServiceCategory.objects.filter(pk=category.pk).update(consultant_count=category.available)
+
+
+def refresh_ratings(user_ids=None):
+    """Consultant.rating لمقدمي الخدمة user_ids (أو للجميع) بتحديث واحد؛ يعيد عدد الصفوف."""
+    average = (
+        Review.objects.filter(service__provider_id=OuterRef('user_id'))
+        .values('service__provider_id').annotate(average=Avg('rating')).values('average')
+    )
+    consultants = Consultant.objects.all()
+    if user_ids is not None:
+        consultants = consultants.filter(user_id__in=user_ids)
+    return consultants.update(
+        rating=Round(Coalesce(Subquery(average, output_field=FloatField()), Value(0.0)), 2)
+    )
+
+
+def available_category_counts(consultant_ids):
+    """{category_id: عدد المستشارين المتاحين منهم} لمجموعة مستشارين."""
+    return Counter(
+        Through.objects.filter(consultant_id__in=consultant_ids, consultant__available=True)
+        .values_list('servicecategory_id', flat=True)
+    )
+
+
+# ---- الفلاتر ---- #
+class BrowseFilters:
+    """فلاتر صفحة التصفح المقروءة من request.GET بعد تطبيعها."""
+
+    def __init__(self, params):
+        self.categories = sorted({int(c) for c in params.getlist('category') if c.isdigit()})
+        self.query = params.get('q', '').strip()
+        self.price_min = self._decimal(params.get('price_min'))
+        self.price_max = self._decimal(params.get('price_max'))
+        try:
+            self.min_rating = min(max(float(params.get('min_rating') or 0), 0), 5)
+        except ValueError:
+            self.min_rating = 0
+        # متاح خلال عدد من الأيام (Consultant.next_free_slot_at)
+        self.available_within = AVAILABLE_WITHIN.get(params.get('available_within', ''), 0)
+
+    @staticmethod
+    def _decimal(value):
+        try:
+            return Decimal(value) if value not in (None, '') else None
+        except InvalidOperation:
+            return None
+
+    def key(self, include_categories=True):
+        parts = [
+            ','.join(map(str, self.categories)) if include_categories else '',
+            self.query.lower(), str(self.price_min), str(self.price_max), str(self.min_rating),
+            str(self.available_within),
+        ]
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    @property
+    def has_non_category_filters(self):
+        return bool(
+            self.query or self.price_min is not None or self.price_max is not None
+            or self.min_rating or self.available_within
+        )
+
+    def apply(self, consultants, include_categories=True):
+        """كل الفلاتر كـ EXISTS حتى لا يحتاج الاستعلام DISTINCT."""
+        consultants = consultants.filter(available=True)
+        if include_categories and self.categories:
+            consultants = consultants.filter(Exists(
+                Through.objects.filter(consultant_id=OuterRef('pk'), servicecategory_id__in=self.categories)
+            ))
+        if self.price_min is not None or self.price_max is not None:
+            services = Service.objects.filter(provider_id=OuterRef('user_id'), is_active=True)
+            if self.price_min is not None:
+                services = services.filter(price__gte=self.price_min)
+            if self.price_max is not None:
+                services = services.filter(price__lte=self.price_max)
+            consultants = consultants.filter(Exists(services))
+        if self.min_rating:
+            consultants = consultants.filter(rating__gte=self.min_rating)
+        if self.available_within:
+            now = timezone.now()
+            consultants = consultants.filter(
+                next_free_slot_at__gte=now, next_free_slot_at__lt=now + timedelta(days=self.available_within)
+            )
+        if self.query:
+            consultants = consultants.filter(
+                Q(user__full_name__icontains=self.query) |
+                Q(user__first_name__icontains=self.query) |
+                Q(user__last_name__icontains=self.query) |
+                Q(Exists(Through.objects.filter(
+                    consultant_id=OuterRef('pk'), servicecategory__name__icontains=self.query
+                )))
+            )
+        return consultants
+
+
+def _ttl(filters):
+    # available_within نافذة تبدأ من الآن فلا تُحفظ أعدادها ساعة كاملة
+    ttl = settings.FACET_CACHE_TTL
+    if filters.available_within or is_process_local(settings.FACET_CACHE):
+        ttl = min(ttl, settings.PAGE_CACHE_TIMEOUT)
+    return ttl
+
+
+def _versioned_key(name, filters, include_categories=True):
+    versions = '-'.join(str(page_cache.tag_version(tag)) for tag in ('consultants', 'categories'))
+    return f'facets:{name}:{versions}:{filters.key(include_categories)}'
+
+
+def category_counts(filters):
+    """{category_id: عدد} حسب الفلاتر غير التخصص (اختيار التخصصات متعدد: OR)."""
+    if not filters.has_non_category_filters:
+        return dict(ServiceCategory.objects.values_list('pk', 'consultant_count'))
+    key = _versioned_key('categories', filters, include_categories=False)
+    ttl = _ttl(filters)
+    counts = _cache().get(key) if ttl else None
+    if counts is None:
+        # ما يُحفظ تحت إصدار الوسوم الحالي يُقرأ من الرئيسية لا من نسخة متأخرة
+        matching = filters.apply(Consultant.objects.all(), include_categories=False)
+        with use_primary():
+            counts = dict(
+                Through.objects.filter(consultant_id__in=matching.values('pk'))
+                .values('servicecategory_id').annotate(n=Count('consultant_id'))
+                .values_list('servicecategory_id', 'n')
+            )
+        if ttl:
+            _cache().set(key, counts, ttl)
+    return counts
+
+
+def total_count(filters, consultants):
+    """عدد النتائج لهذه التركيبة؛ consultants هو الاستعلام المفلتر نفسه."""
+    if not filters.has_non_category_filters and len(filters.categories) == 1:
+        return ServiceCategory.objects.filter(pk=filters.categories[0]).values_list(
+            'consultant_count', flat=True
+        ).first() or 0
+    key = _versioned_key('total', filters)
+    ttl = _ttl(filters)
+    total = _cache().get(key) if ttl else None
+    if total is None:
+        with use_primary():
+            total = consultants.count()
+        if ttl:
+            _cache().set(key, total, ttl)
+    return total
+
+
+class CountedPaginator(Paginator):
+    """Paginator بعدد معروف مسبقاً بدل COUNT على الاستعلام."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+
+    @cached_property
+    def count(self):
+        return self._known_count
@@ -0,0 +1,138 @@
+"""لقطة ثابتة لكل الأسئلة الشائعة في ذاكرة العملية مع فهرس معكوس للبحث.
+
+إصدار اللقطة هو (عدد الأسئلة، آخر updated_at) من قاعدة البيانات، فيراه كل
+العمال. يُعاد فحصه فوراً إذا تغيّر وسم 'faq' في core.page_cache (الإشارات ترفعه في
+العملية التي كتبت)، وإلا كل FAQ_SNAPSHOT_MAX_AGE ثانية؛ بين الفحصين تخدم اللقطة
+صفحة القائمة ونقطة البحث دون أي استعلام.
+الترتيب: مجموع tf-idf لكل رمز، ورود الرمز في السؤال يُحسب أثقل من الجواب.
+"""
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from . import page_cache
+from .db_router import use_primary
+
+QUESTION_WEIGHT = 3
+
+# تشكيل، تطويل، وأشكال الحروف التي يكتبها المستخدمون بالتبادل
+_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u0640]')
+_LETTERS = str.maketrans({'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ة': 'ه'})
+_TOKEN = re.compile(r'\w+')
+_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+STOP_WORDS = frozenset({
+    'في', 'من', 'على', 'الى', 'عن', 'هل', 'ما', 'ماذا', 'كيف', 'متي', 'لماذا', 'هو', 'هي',
+    'او', 'و', 'ان', 'مع', 'هذا', 'هذه', 'ذلك', 'التي', 'الذي', 'كل', 'اي', 'لا', 'يمكن', 'يمكنني',
+})
+
+FAQEntry = namedtuple('FAQEntry', 'id question answer is_featured')
+FAQSnapshot = namedtuple('FAQSnapshot', 'version entries featured others postings vocabulary')
+
+
+def normalize(text):
+    return _DIACRITICS.sub('', text).translate(_LETTERS).lower()
+
+
+def tokenize(text):
+    """رموز مطبّعة دون كلمات التوقف، مع إزالة 'ال' وما يشبهها من أول الكلمة."""
+    tokens = []
+    for token in _TOKEN.findall(normalize(text)):
+        if token in STOP_WORDS:
+            continue
+        for prefix in _PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+                token = token[len(prefix):]
+                break
+        tokens.append(token)
+    return tokens
+
+
+def build_snapshot(faqs, version=0):
+    """faqs: كائنات FAQ (أو ما يشبهها) بالترتيب المطلوب للعرض."""
+    entries = tuple(FAQEntry(f.id, f.question, f.answer, f.is_featured) for f in faqs)
+    term_counts = []
+    document_frequency = Counter()
+    for entry in entries:
+        counts = Counter()
+        for token in tokenize(entry.question):
+            counts[token] += QUESTION_WEIGHT
+        for token in tokenize(entry.answer):
+            counts[token] += 1
+        term_counts.append(counts)
+        document_frequency.update(counts.keys())
+
+    postings = {}
+    total = len(entries)
+    for index, counts in enumerate(term_counts):
+        length = math.sqrt(sum(counts.values())) or 1
+        for token, count in counts.items():
+            idf = math.log(1 + total / document_frequency[token])
+            postings.setdefault(token, []).append((index, count * idf / length))
+
+    return FAQSnapshot(
+        version=version,
+        entries=entries,
+        featured=tuple(e for e in entries if e.is_featured),
+        others=tuple(e for e in entries if not e.is_featured),
+        postings=MappingProxyType({token: tuple(p) for token, p in postings.items()}),
+        vocabulary=tuple(sorted(postings)),
+    )
+
+
+_snapshot = None
+# (إصدار وسم 'faq'، وقت الفحص) لآخر مقارنة مع قاعدة البيانات
+_checked = (None, 0.0)
+_lock = threading.Lock()
+
+
+def get_snapshot():
+    """اللقطة الحالية؛ تُعاد بناؤها فقط إذا تغيّر إصدارها في قاعدة البيانات."""
+    global _snapshot, _checked
+    tag = page_cache.tag_version('faq')
+    snapshot = _snapshot
+    if snapshot is not None and _checked[0] == tag and time.monotonic() - _checked[1] < settings.FAQ_SNAPSHOT_MAX_AGE:
+        return snapshot
+    with _lock, use_primary():
+        from .models import FAQ
+
+        state = FAQ.objects.aggregate(count=Count('pk'), last=Max('updated_at'))
+        version = (state['count'], state['last'])
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = build_snapshot(FAQ.objects.order_by('-is_featured', 'question'), version)
+        _checked = (tag, time.monotonic())
+        return _snapshot
+
+
+def search(query, limit=10, snapshot=None):
+    """قائمة (score, FAQEntry) مرتبة تنازلياً.
+
+    آخر رمز في الاستعلام يُطابق كبادئة أيضاً ليعمل البحث أثناء الكتابة.
+    """
+    snapshot = snapshot or get_snapshot()
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    scores = Counter()
+    for position, token in enumerate(tokens):
+        matches = [token]
+        if position == len(tokens) - 1:
+            start = bisect_left(snapshot.vocabulary, token)
+            matches = []
+            for candidate in snapshot.vocabulary[start:]:
+                if not candidate.startswith(token):
+                    break
+                matches.append(candidate)
+        for match in matches:
+            # البادئة أضعف من الكلمة الكاملة
+            factor = 1 if match == token else 0.5
+            for index, weight in snapshot.postings.get(match, ()):
+                scores[index] += weight * factor
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], not snapshot.entries[item[0]].is_featured, item[0]))
+    return [(round(score, 4), snapshot.entries[index]) for index, score in ranked[:limit]]
@@ -0,0 +1,85 @@
+"""استخراج بيانات الملف عند الرفع: الحجم والنوع والبصمة في مرور واحد على الأجزاء،
+ثم الأبعاد من ترويسة الصورة (Pillow) أو عدد الصفحات من شجرة صفحات PDF (pypdf).
+
+تُحفظ النتيجة في Document حتى لا تحتاج القوائم للرجوع إلى التخزين (Cloudinary).
+"""
+import hashlib
+import mimetypes
+
+# توقيعات بداية الملف الأكثر شيوعاً في الوثائق المرفوعة
+MAGIC_NUMBERS = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'RIFF', 'image/webp'),
+]
+
+
+def _sniff_mime(head, name, declared=None):
+    for magic, mime in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            if mime == 'image/webp' and head[8:12] != b'WEBP':
+                continue
+            return mime
+    guessed, _ = mimetypes.guess_type(name or '')
+    return guessed or declared or 'application/octet-stream'
+
+
+def _image_dimensions(fh):
+    try:
+        from PIL import Image
+    except ImportError:
+        return None, None
+    try:
+        fh.seek(0)
+        # Pillow يقرأ الترويسة فقط، دون فك ضغط الصورة
+        with Image.open(fh) as image:
+            return image.size
+    except Exception:
+        return None, None
+
+
+def _pdf_page_count(fh):
+    """عدد الصفحات من شجرة الصفحات عبر pypdf؛ None إن تعذر التأكد (ملف تالف، مشفّر، أو بلا pypdf)."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    try:
+        fh.seek(0)
+        return len(PdfReader(fh, strict=False).pages) or None
+    except Exception:
+        return None
+
+
+def extract_file_metadata(fh, name=None, declared_type=None):
+    """يعيد dict بالحجم والنوع والبصمة والأبعاد أو عدد الصفحات."""
+    digest = hashlib.sha256()
+    size = 0
+    head = b''
+
+    fh.seek(0)
+    chunks = fh.chunks() if hasattr(fh, 'chunks') else iter(lambda: fh.read(64 * 1024), b'')
+    for chunk in chunks:
+        if not head:
+            head = chunk[:16]
+        digest.update(chunk)
+        size += len(chunk)
+
+    mime_type = _sniff_mime(head, name, declared_type)
+    metadata = {
+        'file_size': size,
+        'mime_type': mime_type,
+        'checksum': digest.hexdigest(),
+        'width': None,
+        'height': None,
+        'page_count': None,
+    }
+    if mime_type == 'application/pdf':
+        metadata['page_count'] = _pdf_page_count(fh)
+    elif mime_type.startswith('image/'):
+        metadata['width'], metadata['height'] = _image_dimensions(fh)
+    fh.seek(0)
+    return metadata
@@ -8,7 +8,11 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import  authenticate
+from . import throttling
 import json
+
+THROTTLED_MESSAGE = 'محاولات كثيرة جداً. يرجى الانتظار قليلاً ثم المحاولة مجدداً.'
+
 class UserRegistrationForm(UserCreationForm):
     full_name = forms.CharField(
         label='الاسم الكامل',
@@ -40,6 +44,8 @@ class UserRegistrationForm(UserCreationForm):
         fields = ['full_name', 'email', 'phone', 'role', 'password1', 'password2']
     
     def __init__(self, *args, **kwargs):
+        self.request = kwargs.pop('request', None)
+        self.throttled = None
         super().__init__(*args, **kwargs)
         # إزالة حقول username التي لم تعد موجودة
         if 'username' in self.fields:
@@ -57,6 +63,14 @@ class UserRegistrationForm(UserCreationForm):
     'placeholder': 'كلمة المرور'
         })
 
+    def clean(self):
+        # قبل التحقق من كلمة المرور وتجزئتها عند الحفظ
+        if self.request is not None:
+            self.throttled = throttling.check(self.request, 'register', self.cleaned_data.get('email'))
+            if self.throttled:
+                raise forms.ValidationError(THROTTLED_MESSAGE)
+        return super().clean()
+
         
 class UserLoginForm(forms.Form):
     email = forms.EmailField(
@@ -79,6 +93,11 @@ class UserLoginForm(forms.Form):
         required=False,
         widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
     )
+
+    def __init__(self, *args, **kwargs):
+        self.request = kwargs.pop('request', None)
+        self.throttled = None
+        super().__init__(*args, **kwargs)
     
     def clean(self):
         cleaned_data = super().clean()
@@ -86,8 +105,13 @@ class UserLoginForm(forms.Form):
         password = cleaned_data.get('password')
         
         if email and password:
+            # رفض المحاولات الزائدة قبل أي تجزئة لكلمة المرور
+            self.throttled = throttling.check(self.request, 'login', email)
+            if self.throttled:
+                raise forms.ValidationError(THROTTLED_MESSAGE)
+
             # المصادقة باستخدام البريد الإلكتروني
-            user = authenticate(email=email, password=password)
+            user = authenticate(self.request, email=email, password=password)
             
             if user is None:
                 raise forms.ValidationError(
@@ -191,19 +215,37 @@ class ConsultationSlotForm(forms.ModelForm):
 class DocumentForm(forms.ModelForm):
     class Meta:
         model = Document
-        fields = ('title', 'file', 'description', 'reminder_date', 'is_important')
+        fields = ('title', 'file', 'description', 'reminder_date', 'is_important', 'consultation_request', 'consultation')
         labels = {
             'title': _('عنوان الوثيقة'),
             'file': _('الملف'),
             'description': _('وصف الوثيقة'),
             'reminder_date': _('تاريخ التذكير'),
             'is_important': _('مهم'),
+            'consultation_request': _('إرفاق بطلب استشارة'),
+            'consultation': _('إرفاق بموعد استشارة'),
         }
         widgets = {
             'description': forms.Textarea(attrs={'rows': 3}),
             'reminder_date': forms.DateInput(attrs={'type': 'date'}),
         }
 
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # الإرفاق بطلبات المالك واستشاراته النشطة فقط؛ مقدم الخدمة فيها يرى الوثيقة
+        request_field = self.fields['consultation_request']
+        request_field.queryset = ConsultationRequest.objects.filter(
+            client=user, status__in=ConsultationRequest.ACTIVE_STATUSES,
+        ).select_related('consultant')
+        request_field.label_from_instance = lambda item: f'#{item.pk} - {item.consultant.full_name}'
+        consultation_field = self.fields['consultation']
+        consultation_field.queryset = Consultation.objects.filter(
+            client=user, status__in=Consultation.ACTIVE_STATUSES,
+        ).select_related('slot__provider')
+        consultation_field.label_from_instance = (
+            lambda item: f'{item.slot.start_time:%Y-%m-%d %H:%M} - {item.slot.provider.full_name}'
+        )
+
 class ReviewForm(forms.ModelForm):
     class Meta:
         model = Review
@@ -248,7 +290,8 @@ class BookSlotForm(forms.ModelForm):
 
 
 from django import forms
-from .models import Consultant
+from .models import Consultant, WorkingHours
+from .scheduling import parse_intervals, format_intervals
 
 class ConsultantForm(forms.ModelForm):
     # الحقول الإضافية لأيام الأسبوع
@@ -283,33 +326,67 @@ class ConsultantForm(forms.ModelForm):
 
     class Meta:
         model = Consultant
-        fields = ['bio', 'profile_image', 'categories']
+        fields = ['bio', 'profile_image', 'categories', 'session_duration']
         widgets = {
             'bio': forms.Textarea(attrs={'class': 'form-control', 'rows': 5}),
             'categories': forms.SelectMultiple(attrs={'class': 'form-select'}),
+            'session_duration': forms.NumberInput(attrs={'class': 'form-control', 'min': 5, 'step': 5}),
         }
+        labels = {
+            'session_duration': 'مدة الموعد (بالدقائق)',
+        }
+
+    # اسم الحقل -> رقم اليوم كما في date.weekday()
+    WEEKDAYS = {
+        'saturday': 5,
+        'sunday': 6,
+        'monday': 0,
+        'tuesday': 1,
+        'wednesday': 2,
+        'thursday': 3,
+        'friday': 4,
+    }
     
     def __init__(self, *args, **kwargs):
         # استخراج request من kwargs إذا كان موجوداً
         self.request = kwargs.pop('request', None)
         super().__init__(*args, **kwargs)
+        # تعبئة أوقات العمل المحفوظة
+        if self.instance.pk:
+            by_day = {}
+            for hours in self.instance.working_hours.all():
+                by_day.setdefault(hours.weekday, []).append((hours.start_time, hours.end_time))
+            for name, weekday in self.WEEKDAYS.items():
+                self.initial.setdefault(name, format_intervals(by_day.get(weekday, [])))
+        # نماذج قديمة أو جزئية قد لا ترسل المدة؛ تبقى القيمة المحفوظة
+        self.fields['session_duration'].required = False
+
+    def clean_session_duration(self):
+        return self.cleaned_data.get('session_duration') or self.instance.session_duration
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for name in self.WEEKDAYS:
+            try:
+                cleaned_data[f'{name}_intervals'] = parse_intervals(cleaned_data.get(name))
+            except ValueError:
+                self.add_error(name, 'صيغة غير صحيحة، مثال: 09:00 - 17:00 أو 09:00 - 12:00, 14:00 - 18:00')
+        return cleaned_data
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        # نماذج لا تعرض حقول الأيام (مثل edit_profile) لا تمس أوقات العمل
+        if not any(name in self.data for name in self.WEEKDAYS):
+            return
+        self.instance.working_hours.all().delete()
+        WorkingHours.objects.bulk_create([
+            WorkingHours(consultant=self.instance, weekday=weekday, start_time=start, end_time=end)
+            for name, weekday in self.WEEKDAYS.items()
+            for start, end in self.cleaned_data.get(f'{name}_intervals', [])
+        ])
         
     def save(self, commit=True):
         consultant = super().save(commit=False)
-        
-        # حفظ أوقات العمل في الجلسة إذا كان request متاحاً
-        if self.request:
-            working_hours = {
-                'saturday': self.cleaned_data['saturday'],
-                'sunday': self.cleaned_data['sunday'],
-                'monday': self.cleaned_data['monday'],
-                'tuesday': self.cleaned_data['tuesday'],
-                'wednesday': self.cleaned_data['wednesday'],
-                'thursday': self.cleaned_data['thursday'],
-                'friday': self.cleaned_data['friday'],
-            }
-            self.request.session['consultant_working_hours'] = working_hours
-        
         if commit:
             consultant.save()
             self.save_m2m()
@@ -0,0 +1,43 @@
+"""أساس أوامر التوليد والقياس التي تكتب في قاعدة البيانات.
+
+الإعدادات تشير افتراضياً إلى قاعدة الإنتاج على Render عند غياب DATABASE_URL،
+فيرفض الأمر العمل إلا على قاعدة محلية (SQLite أو خادم على هذا الجهاز) أو قاعدة
+بلا مستخدمين، ما لم يُمرَّر --yes-i-am-sure صراحة.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+LOCAL_HOSTS = ('', 'localhost', '127.0.0.1', '::1')
+
+
+def describe_database(alias=DEFAULT_DB_ALIAS):
+    settings_dict = connections[alias].settings_dict
+    host = settings_dict.get('HOST') or 'local'
+    return f"{connections[alias].vendor} {host}/{settings_dict.get('NAME')}"
+
+
+def is_disposable_database(alias=DEFAULT_DB_ALIAS):
+    from core.models import User
+
+    connection = connections[alias]
+    if connection.vendor == 'sqlite' or (connection.settings_dict.get('HOST') or '') in LOCAL_HOSTS:
+        return True
+    return not User.objects.using(alias).exists()
+
+
+class DisposableDataCommand(BaseCommand):
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.add_argument(
+            '--yes-i-am-sure', action='store_true', dest='yes_i_am_sure',
+            help='التشغيل على قاعدة بعيدة فيها بيانات (قد تكون الإنتاج)',
+        )
+        return parser
+
+    def execute(self, *args, **options):
+        if not options.get('yes_i_am_sure') and not is_disposable_database():
+            raise CommandError(
+                f'القاعدة الحالية ({describe_database()}) بعيدة وفيها مستخدمون؛ هذا الأمر يكتب فيها. '
+                'اضبط DATABASE_URL على قاعدة تجريبية أو أضف --yes-i-am-sure'
+            )
+        return super().execute(*args, **options)
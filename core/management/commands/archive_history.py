@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import archive
+
+
+class Command(BaseCommand):
+    help = 'نقل الطلبات والحجوزات والاستشارات المغلقة والمواعيد المنقضية الأقدم من N شهراً إلى جداول الأرشيف'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None, help='الافتراضي ARCHIVE["after_months"]')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--dry-run', action='store_true', help='عدّ المؤهل فقط دون نقل')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            counts = archive.pending(options['months'])
+            self.stdout.write(' '.join(f'{name}={count}' for name, count in counts.items()))
+            return
+        started = time.perf_counter()
+        moved = archive.archive(options['months'], options['batch_size'])
+        details = ' '.join(f'{name}={count}' for name, count in moved.items())
+        self.stdout.write(self.style.SUCCESS(f'{details} ({time.perf_counter() - started:.2f}ث)'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Document
+
+
+class Command(BaseCommand):
+    help = 'استخراج بيانات الملف (الحجم، النوع، البصمة...) للوثائق المرفوعة قبل حفظها في قاعدة البيانات'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        fields = ['file_size', 'mime_type', 'checksum', 'width', 'height', 'page_count']
+        pending = Document.objects.filter(checksum='').exclude(file='').order_by('pk')
+        done = failed = 0
+        batch = []
+        for document in pending.iterator(chunk_size=options['batch_size']):
+            try:
+                with document.file.open('rb'):
+                    document.refresh_file_metadata()
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f'#{document.pk}: {exc}')
+                continue
+            batch.append(document)
+            if len(batch) >= options['batch_size']:
+                Document.objects.bulk_update(batch, fields)
+                done += len(batch)
+                batch = []
+        if batch:
+            Document.objects.bulk_update(batch, fields)
+            done += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'تم تحديث {done} وثيقة، وفشل {failed}'))
@@ -0,0 +1,105 @@
+import copy
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import db_pool
+from core.models import FAQ, Consultant
+
+
+class Command(BaseCommand):
+    help = (
+        'مقارنة أوضاع الاتصال بـ PostgreSQL تحت حمل متزامن: اتصال لكل طلب، اتصال دائم '
+        '(conn_max_age)، وتجمع psycopg 3؛ كل "طلب" ينتهي كما ينهيه Django (close_if_unusable_or_obsolete)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--modes', default='per-request,persistent,pool')
+        parser.add_argument('--pool-max-size', type=int, default=settings.DATABASE_POOL_OPTIONS['max_size'])
+
+    def _modes(self, options):
+        pool = dict(settings.DATABASE_POOL_OPTIONS, max_size=options['pool_max_size'])
+        pool['min_size'] = min(pool['min_size'], pool['max_size'])
+        return {
+            'per-request': {'CONN_MAX_AGE': 0},
+            'persistent': {'CONN_MAX_AGE': 600},
+            'pool': {'CONN_MAX_AGE': 0, 'pool': pool},
+        }
+
+    def _request(self, alias):
+        list(Consultant.objects.using(alias).filter(available=True).order_by('-rank_score', 'pk')[:10])
+        FAQ.objects.using(alias).count()
+        # ما يفعله Django عند request_finished
+        connections[alias].close_if_unusable_or_obsolete()
+
+    def _worker(self, alias, deadline, latencies, lock):
+        local = []
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                self._request(alias)
+                local.append((time.perf_counter() - started) * 1000)
+        finally:
+            connections[alias].close()
+        with lock:
+            latencies += local
+
+    def _run(self, mode, overrides, options):
+        alias = f'bench_{mode.replace("-", "_")}'
+        config = copy.deepcopy(connections['default'].settings_dict)
+        config['OPTIONS'].pop('pool', None)
+        config['CONN_MAX_AGE'] = overrides['CONN_MAX_AGE']
+        if 'pool' in overrides:
+            config['OPTIONS']['pool'] = overrides['pool']
+        connections.settings[alias] = config
+
+        latencies, lock = [], threading.Lock()
+        try:
+            if 'pool' in overrides:
+                # فتح التجمع وتعبئة min_size خارج القياس كما يحدث عند إقلاع العامل
+                connections[alias].pool.open(wait=True)
+            deadline = time.perf_counter() + options['seconds']
+            threads = [
+                threading.Thread(target=self._worker, args=(alias, deadline, latencies, lock))
+                for _ in range(options['threads'])
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats = db_pool.pool_stats(alias)
+        finally:
+            if 'pool' in overrides:
+                connections[alias].close_pool()
+            del connections.settings[alias]
+
+        latencies.sort()
+        line = (
+            f'{mode:<12} req/s={len(latencies) / options["seconds"]:8.1f} '
+            f'p50={statistics.median(latencies or [0]):7.2f}ms '
+            f'p99={latencies[int(len(latencies) * 0.99)] if latencies else 0:7.2f}ms'
+        )
+        if stats['mode'] == 'pool':
+            line += (
+                f' opened={stats["connections_opened"]} checkouts={stats["checkouts"]} '
+                f'queued={stats["queued_checkouts"]} wait_avg={stats["wait_ms_avg_queued"]}ms'
+            )
+        self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'postgresql':
+            raise CommandError('المقارنة تحتاج PostgreSQL (DATABASE_URL)')
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+        modes = self._modes(options)
+        for mode in options['modes'].split(','):
+            if mode == 'pool' and not is_psycopg3:
+                self.stdout.write(self.style.WARNING('pool: يحتاج psycopg 3 (psycopg[pool])، تم التخطي'))
+                continue
+            self._run(mode, modes[mode], options)
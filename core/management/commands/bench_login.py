@@ -0,0 +1,54 @@
+import time
+
+from django.contrib.auth import authenticate
+from django.db import transaction
+from django.test.utils import override_settings
+
+from core.management.base import DisposableDataCommand
+from core.models import User
+
+# الإعداد السابق: EmailAuthBackend ثم ModelBackend
+LEGACY_BACKENDS = [
+    'core.backends.EmailAuthBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+CURRENT_BACKENDS = ['core.backends.EmailAuthBackend']
+
+EMAIL = 'bench-login@example.com'
+PASSWORD = 'bench-password-123'
+
+
+class Command(DisposableDataCommand):
+    help = 'قياس كلفة المعالج لكل محاولة تسجيل دخول (ناجحة، كلمة خاطئة، بريد غير موجود)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=10)
+
+    def _measure(self, attempts, **credentials):
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        for _ in range(attempts):
+            authenticate(None, **credentials)
+        cpu = (time.process_time() - cpu_started) / attempts
+        wall = (time.perf_counter() - wall_started) / attempts
+        return cpu * 1000, wall * 1000
+
+    def handle(self, *args, **options):
+        attempts = options['attempts']
+        scenarios = [
+            ('success', {'email': EMAIL, 'password': PASSWORD}),
+            ('wrong-password', {'email': EMAIL, 'password': 'wrong'}),
+            ('unknown-email', {'email': 'nobody@example.com', 'password': PASSWORD}),
+            ('admin-username', {'username': EMAIL.upper(), 'password': 'wrong'}),
+        ]
+        with transaction.atomic():
+            User.objects.create_user(EMAIL, 'Bench', '', PASSWORD)
+            for label, backends in (('legacy', LEGACY_BACKENDS), ('current', CURRENT_BACKENDS)):
+                with override_settings(AUTHENTICATION_BACKENDS=backends):
+                    for scenario, credentials in scenarios:
+                        cpu_ms, wall_ms = self._measure(attempts, **credentials)
+                        self.stdout.write(
+                            f'{label:<8} {scenario:<15} cpu={cpu_ms:8.2f}ms/attempt wall={wall_ms:8.2f}ms/attempt'
+                        )
+            # لا نترك المستخدم التجريبي في قاعدة البيانات
+            transaction.set_rollback(True)
@@ -0,0 +1,122 @@
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Consultant, Document, Profile
+
+# (اسم الحقل، الحقل، نوع المحتوى، اسم الملف)
+MEDIA_FIELDS = [
+    ('document', Document._meta.get_field('file'), 'raw', 'bench.pdf'),
+    ('profile', Profile._meta.get_field('profile_image'), 'image', 'bench.png'),
+    ('consultant', Consultant._meta.get_field('profile_image'), 'image', 'bench.png'),
+]
+
+
+def _payload(kind, size_kb):
+    size = size_kb * 1024
+    if kind == 'image':
+        from PIL import Image
+
+        # ضجيج عشوائي لا يُضغط، فيقترب حجم PNG من الحجم المطلوب
+        side = max(int((size / 3) ** 0.5), 1)
+        image = Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+        buffer = io.BytesIO()
+        image.save(buffer, 'PNG')
+        return buffer.getvalue()
+    return b'%PDF-1.4\n' + os.urandom(size)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'قياس زمن وسرعة رفع وتنزيل وسائط Document وProfile وConsultant لكل تخزين'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backends', default='filesystem,local,local-latency',
+            help='قائمة مفصولة بفواصل من: filesystem, local, local-latency, cloudinary',
+        )
+        parser.add_argument('--count', type=int, default=20, help='عدد الملفات لكل حقل')
+        parser.add_argument('--size-kb', type=int, default=256)
+        parser.add_argument('--latency-ms', type=int, default=80,
+                            help='زمن الشبكة المحاكى لـ local-latency')
+
+    def _create_storage(self, backend, location, latency_ms):
+        if backend == 'filesystem':
+            # التخزين الافتراضي (MEDIA_STORAGE=filesystem) في مجلد مؤقت
+            params = dict(settings.MEDIA_STORAGE_BACKENDS['filesystem'],
+                          OPTIONS={'location': location, 'base_url': settings.MEDIA_URL})
+        elif backend == 'local':
+            params = {'BACKEND': 'core.storage.LocalMediaStorage',
+                      'OPTIONS': {'location': location, 'base_url': settings.MEDIA_URL}}
+        elif backend == 'local-latency':
+            params = {'BACKEND': 'core.storage.LocalMediaStorage',
+                      'OPTIONS': {'location': location, 'base_url': settings.MEDIA_URL,
+                                  'latency_ms': latency_ms}}
+        elif backend == 'cloudinary':
+            if not settings.CLOUDINARY_STORAGE.get('CLOUD_NAME'):
+                raise CommandError('لم يتم ضبط بيانات Cloudinary (CLOUDINARY_CLOUD_NAME ...)')
+            params = settings.MEDIA_STORAGE_BACKENDS['cloudinary']
+        else:
+            raise CommandError(f'تخزين غير معروف: {backend}')
+        return storages.create_storage(params)
+
+    def _run(self, storage, field, data, filename, count):
+        uploads, downloads = [], []
+        saved = []
+        try:
+            for _ in range(count):
+                name = field.generate_filename(None, filename)
+                started = time.perf_counter()
+                saved_name = storage.save(name, ContentFile(data))
+                uploads.append(time.perf_counter() - started)
+                saved.append(saved_name)
+
+                started = time.perf_counter()
+                with storage.open(saved_name, 'rb') as fh:
+                    fh.read()
+                downloads.append(time.perf_counter() - started)
+                # حساب الرابط محلي في كل التخزينات، نتأكد فقط أنه يعمل
+                storage.url(saved_name)
+        finally:
+            for saved_name in saved:
+                storage.delete(saved_name)
+        return uploads, downloads
+
+    def _report(self, backend, label, op, timings, nbytes):
+        total = sum(timings)
+        throughput = (nbytes * len(timings)) / total / (1024 * 1024) if total else 0
+        self.stdout.write(
+            f'{backend:<14} {label:<11} {op:<8} n={len(timings):<4} '
+            f'p50={statistics.median(timings) * 1000:8.2f}ms '
+            f'p95={_percentile(timings, 95) * 1000:8.2f}ms '
+            f'{throughput:8.2f} MB/s'
+        )
+
+    def handle(self, *args, **options):
+        backends = [b.strip() for b in options['backends'].split(',') if b.strip()]
+        payloads = {kind: _payload(kind, options['size_kb']) for kind in ('raw', 'image')}
+
+        for backend in backends:
+            location = tempfile.mkdtemp(prefix='rafikni-media-bench-')
+            try:
+                storage = self._create_storage(backend, location, options['latency_ms'])
+                for label, field, kind, filename in MEDIA_FIELDS:
+                    data = payloads[kind]
+                    uploads, downloads = self._run(storage, field, data, filename, options['count'])
+                    self._report(backend, label, 'upload', uploads, len(data))
+                    self._report(backend, label, 'download', downloads, len(data))
+            finally:
+                shutil.rmtree(location, ignore_errors=True)
@@ -0,0 +1,97 @@
+import random
+import statistics
+import threading
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import CommandError
+from django.db import connections
+from django.http import QueryDict
+
+from core import db_router, facets
+from core.management.base import DisposableDataCommand
+from core.models import FAQ, Consultant, Notification, User
+
+BENCH_EMAIL = 'bench-replicas@example.com'
+
+
+class Command(DisposableDataCommand):
+    help = (
+        'قياس قراءات متزامنة (التصفح والأسئلة الشائعة) مع كتابات: كل القراءات على الرئيسية '
+        'مقابل التوجيه للنسخ، مع عدّ القراءات التي كانت سترى بيانات قديمة لولا التثبيت. '
+        'محلياً: DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3 بعد نسخ ملف القاعدة.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--write-ratio', type=float, default=0.05)
+
+    def _read(self):
+        consultants = facets.BrowseFilters(QueryDict('')).apply(Consultant.objects.select_related('user'))
+        list(consultants.order_by('-rank_score', 'pk')[:10])
+        list(FAQ.objects.all()[:20])
+
+    def _write(self, user, stats):
+        notification = Notification.objects.create(user=user, message='bench', link='')
+        # الطلب التالي لنفس الجلسة: مثبّت على الرئيسية عبر الكوكي
+        if not Notification.objects.filter(pk=notification.pk).exists():
+            stats['lost'] += 1
+        # ما كان سيحدث دون تثبيت
+        replica = db_router.replicas()[0]
+        if not Notification.objects.using(replica).filter(pk=notification.pk).exists():
+            stats['stale'] += 1
+
+    def _worker(self, mode, user, deadline, write_ratio, stats, lock):
+        latencies, local = [], {'reads': 0, 'writes': 0, 'lost': 0, 'stale': 0}
+        try:
+            while time.perf_counter() < deadline:
+                if random.random() < write_ratio:
+                    with db_router.use_primary():
+                        self._write(user, local)
+                    local['writes'] += 1
+                    continue
+                started = time.perf_counter()
+                with db_router.use_primary() if mode == 'primary' else nullcontext():
+                    self._read()
+                latencies.append((time.perf_counter() - started) * 1000)
+                local['reads'] += 1
+        finally:
+            connections.close_all()
+        with lock:
+            stats['latencies'] += latencies
+            for key, value in local.items():
+                stats[key] += value
+
+    def _run(self, mode, user, options):
+        stats = {'latencies': [], 'reads': 0, 'writes': 0, 'lost': 0, 'stale': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['seconds']
+        threads = [
+            threading.Thread(target=self._worker, args=(mode, user, deadline, options['write_ratio'], stats, lock))
+            for _ in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        latencies = sorted(stats['latencies']) or [0]
+        self.stdout.write(
+            f"{mode:<9} reads/s={stats['reads'] / options['seconds']:8.1f} "
+            f"writes={stats['writes']:5d} p50={statistics.median(latencies):7.2f}ms "
+            f"p95={latencies[int(len(latencies) * 0.95) - 1 if len(latencies) > 1 else 0]:7.2f}ms "
+            f"lost-own-writes={stats['lost']} stale-without-pin={stats['stale']}"
+        )
+
+    def handle(self, *args, **options):
+        if not db_router.replicas():
+            raise CommandError('لا توجد نسخ قراءة: اضبط DATABASE_REPLICA_URLS')
+        with db_router.use_primary():
+            user, _ = User.objects.get_or_create(email=BENCH_EMAIL, defaults={'full_name': 'Bench'})
+        try:
+            for mode in ('primary', 'replicas'):
+                self._run(mode, user, options)
+        finally:
+            with db_router.use_primary():
+                user.delete()
+        self.stdout.write(f'صحة النسخ: {db_router.health.status()}')
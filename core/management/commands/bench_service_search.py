@@ -0,0 +1,100 @@
+import importlib
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+from core.management.base import DisposableDataCommand
+from core.models import Service, User
+from core.search import search_services, trigram_available, trigram_threshold
+
+TRIGRAM_INDEXES = importlib.import_module('core.migrations.0014_service_trigram_indexes').TRIGRAM_INDEXES
+BTREE_INDEX = 'bench_service_description_btree'
+
+WORDS = (
+    'محاسبة ضرائب قانونية عقود موارد بشرية رواتب تسويق إعلان استشارة مالية ميزانية تدقيق '
+    'شركات تأسيس سجل تجاري جمركة استيراد تصدير توظيف تدريب خطة أعمال تمويل قرض'
+).split()
+
+
+class Command(DisposableDataCommand):
+    help = (
+        'مقارنة زمن البحث في الخدمات وسرعة الكتابة بين فهرس B-tree القديم على description '
+        'وفهارس pg_trgm الجديدة (داخل معاملة تُلغى في النهاية)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000)
+        parser.add_argument('--writes', type=int, default=500)
+        parser.add_argument('--queries', type=int, default=50)
+
+    def _execute(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+
+    def _configure(self, name):
+        """'btree' = المخطط قبل الترحيل 0014، 'trigram' = بعده."""
+        postgres = connection.vendor == 'postgresql'
+        if name == 'btree':
+            if postgres:
+                for index in TRIGRAM_INDEXES:
+                    self._execute(f'DROP INDEX IF EXISTS {index}')
+            self._execute(f'CREATE INDEX {BTREE_INDEX} ON core_service (description)')
+        else:
+            self._execute(f'DROP INDEX IF EXISTS {BTREE_INDEX}')
+            if postgres and trigram_available():
+                for index, column in TRIGRAM_INDEXES.items():
+                    self._execute(
+                        f'CREATE INDEX IF NOT EXISTS {index} ON core_service '
+                        f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+                    )
+        if postgres:
+            self._execute('ANALYZE core_service')
+
+    def _service(self, provider, index):
+        words = random.sample(WORDS, 8)
+        return Service(
+            title=' '.join(words[:3]),
+            slug=f'bench-search-{index}',
+            description=' '.join(words * 4),
+            price=random.randint(1000, 50000),
+            duration=timedelta(hours=1),
+            provider=provider,
+        )
+
+    def _bench(self, provider, offset, options):
+        started = time.perf_counter()
+        for i in range(options['writes']):
+            self._service(provider, offset + i).save()
+        writes_per_second = options['writes'] / (time.perf_counter() - started)
+
+        latencies = []
+        for _ in range(options['queries']):
+            query = random.choice(WORDS)[:5]
+            started = time.perf_counter()
+            results = search_services(query)
+            with trigram_threshold(results.db):
+                list(results[:20])
+            latencies.append((time.perf_counter() - started) * 1000)
+        return writes_per_second, statistics.median(latencies), max(latencies)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        with transaction.atomic():
+            provider = User.objects.create_user('bench-search@example.com', 'Bench', '', 'bench-password-123')
+            Service.objects.bulk_create(
+                [self._service(provider, i) for i in range(options['rows'])], batch_size=1000
+            )
+            offset = options['rows']
+            for name in ('btree', 'trigram'):
+                self._configure(name)
+                writes, median, worst = self._bench(provider, offset, options)
+                offset += options['writes']
+                self.stdout.write(
+                    f'{name:<8} writes/s={writes:8.1f} search median={median:7.2f}ms max={worst:7.2f}ms'
+                )
+            if not trigram_available():
+                self.stdout.write(self.style.WARNING('pg_trgm غير متاح: مرحلة trigram تقيس المخطط دون أي فهرس على description'))
+            transaction.set_rollback(True)
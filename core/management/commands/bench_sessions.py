@@ -0,0 +1,50 @@
+import time
+
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core.management.base import DisposableDataCommand
+from core.models import Profile, User
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'core.sessions',
+}
+
+
+class Command(DisposableDataCommand):
+    help = 'قياس كلفة قاعدة البيانات لكل طلب مصادَق عليه حسب محرك الجلسات'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--url', default='/profile/')
+        parser.add_argument('--engines', default=','.join(ENGINES))
+
+    def _bench(self, user, url, count):
+        client = Client()
+        client.force_login(user)
+        session_queries = total_queries = 0
+        started = time.perf_counter()
+        for _ in range(count):
+            with CaptureQueriesContext(connection) as ctx:
+                client.get(url)
+            total_queries += len(ctx.captured_queries)
+            session_queries += sum('django_session' in q['sql'] for q in ctx.captured_queries)
+        elapsed = time.perf_counter() - started
+        return session_queries / count, total_queries / count, elapsed / count * 1000
+
+    def handle(self, *args, **options):
+        engines = [e.strip() for e in options['engines'].split(',') if e.strip()]
+        with transaction.atomic():
+            user = User.objects.create_user('bench-sessions@example.com', 'Bench', '', 'bench-password-123')
+            Profile.objects.create(user=user)
+            for name in engines:
+                with override_settings(SESSION_ENGINE=ENGINES[name]):
+                    session_q, total_q, ms = self._bench(user, options['url'], options['requests'])
+                self.stdout.write(
+                    f'{name:<15} session_queries/req={session_q:5.2f} '
+                    f'total_queries/req={total_q:5.2f} {ms:7.2f}ms/req'
+                )
+            transaction.set_rollback(True)
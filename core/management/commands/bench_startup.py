@@ -0,0 +1,33 @@
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import startup
+
+
+class Command(BaseCommand):
+    help = 'قياس زمن الإقلاع البارد لـ rafikni.wsgi و manage.py check في عمليات جديدة'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--top', type=int, default=15, help='عدد أثقل الوحدات في تقرير -X importtime')
+
+    def handle(self, *args, **options):
+        runs = options['runs']
+        wsgi = [startup.wsgi_import_ms() for _ in range(runs)]
+        check = [startup.manage_check_ms() for _ in range(runs)]
+        self.stdout.write(f'rafikni.wsgi     median={statistics.median(wsgi):7.1f}ms min={min(wsgi):7.1f}ms')
+        self.stdout.write(f'manage.py check  median={statistics.median(check):7.1f}ms min={min(check):7.1f}ms')
+
+        budget = settings.STARTUP_IMPORT_BUDGET_MS
+        style = self.style.SUCCESS if statistics.median(wsgi) <= budget else self.style.ERROR
+        self.stdout.write(style(f'الميزانية: {budget}ms'))
+
+        loaded = startup.loaded_deferred_modules()
+        if loaded:
+            self.stdout.write(self.style.WARNING(f'حزم مؤجلة استُوردت عند الإقلاع: {", ".join(loaded)}'))
+
+        self.stdout.write('\nأثقل الوحدات (تراكمي):')
+        for name, self_ms, cumulative_ms in startup.import_profile(options['top']):
+            self.stdout.write(f'{cumulative_ms:8.1f}ms {self_ms:7.1f}ms  {name}')
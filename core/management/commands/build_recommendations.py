@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core import recommendations
+
+
+class Command(BaseCommand):
+    help = 'إعادة بناء جدول "مستشارون مشابهون" (SimilarConsultant) من التخصصات والحجوزات المشتركة'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=None, help='عدد الجيران لكل مستشار (الافتراضي من الإعدادات)')
+        parser.add_argument('--chunk-size', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        rows, timings = recommendations.rebuild(
+            k=options['k'], chunk_size=options['chunk_size'], batch_size=options['batch_size']
+        )
+        details = ' '.join(f'{name}={seconds:.2f}ث' for name, seconds in timings.items())
+        self.stdout.write(self.style.SUCCESS(f'{rows} صف ({details})'))
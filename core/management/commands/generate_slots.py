@@ -0,0 +1,50 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from core.models import Consultant, WorkingHoursException
+from core.scheduling import generate_slots
+
+
+class Command(BaseCommand):
+    help = 'إكمال تقويم المستشارين بمواعيد من ساعات العمل حتى عدد أيام قادمة (مهمة ليلية)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=28)
+        parser.add_argument('--consultant', type=int, help='معرّف مستشار واحد')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        today = timezone.localdate()
+        horizon_end = today + timedelta(days=options['days'])
+
+        consultants = (
+            Consultant.objects.filter(available=True, working_hours__isnull=False)
+            .distinct()
+            .order_by('pk')
+            .prefetch_related(
+                'working_hours',
+                Prefetch(
+                    'working_hours_exceptions',
+                    queryset=WorkingHoursException.objects.filter(date__gte=today, date__lt=horizon_end),
+                ),
+            )
+        )
+        if options['consultant']:
+            consultants = consultants.filter(pk=options['consultant'])
+
+        ids = list(consultants.values_list('pk', flat=True))
+        created = 0
+        for offset in range(0, len(ids), options['chunk_size']):
+            chunk = consultants.filter(pk__in=ids[offset:offset + options['chunk_size']])
+            with transaction.atomic():
+                created += generate_slots(chunk, days=options['days'], start_date=today)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'تم إنشاء {created} موعداً لـ {len(ids)} مستشار في {time.perf_counter() - started:.2f} ثانية'
+        ))
@@ -0,0 +1,144 @@
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core import availability, facets, page_cache, ranking, synthetic
+from core.management.base import DisposableDataCommand
+from core.models import ServiceCategory
+
+
+class Command(DisposableDataCommand):
+    help = (
+        'توليد بيانات اصطناعية حتمية (--seed) بأسماء ونصوص عربية: عملاء، مستشارون بتخصصاتهم وخدماتهم، '
+        'مواعيد وحجوزات، تقييمات، إشعارات وطلبات استشارة. الدفعات تُكتب بالتوازي (COPY على PostgreSQL). '
+        'مثال بحجم الإنتاج: --users 100000 --consultants 20000 --slots-per-consultant 500 '
+        '--reviews 2000000 --notifications-per-user 20 --requests 1000000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--users', type=int, default=1000, help='عدد العملاء (المستشارون إضافة إليهم)')
+        parser.add_argument('--consultants', type=int, default=100)
+        parser.add_argument('--services-per-consultant', type=int, default=3)
+        parser.add_argument('--slots-per-consultant', type=int, default=60)
+        parser.add_argument('--booking-rate', type=float, default=0.35, help='نسبة المواعيد المحجوزة')
+        parser.add_argument('--reviews', type=int, default=2000)
+        parser.add_argument('--notifications-per-user', type=int, default=5)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--days-back', type=int, default=540, help='عمق التاريخ المولَّد بالأيام')
+        parser.add_argument('--days-ahead', type=int, default=28)
+        parser.add_argument('--today', help='YYYY-MM-DD؛ ثبّته لإعادة نفس البيانات في يوم آخر')
+        parser.add_argument('--password', help='كلمة مرور كل الحسابات (الافتراضي غير قابلة للاستخدام)')
+        parser.add_argument('--batch-size', type=int, default=20000, help='صفوف تقريبية لكل معاملة')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='دون إعادة حساب الأعداد والتوفر والترتيب في النهاية')
+
+    def _plan(self, options):
+        if options['users'] < 1 or options['consultants'] < 1:
+            raise CommandError('--users و --consultants يجب أن يكونا 1 على الأقل')
+        if options['reviews'] > options['users'] * options['consultants'] * options['services_per_consultant']:
+            raise CommandError('--reviews أكبر من عدد أزواج (عميل، خدمة) الممكنة')
+        today = parse_date(options['today']) if options['today'] else timezone.localdate()
+        if today is None:
+            raise CommandError('--today بصيغة YYYY-MM-DD')
+
+        category_ids = []
+        for name, icon, topics in synthetic.CATEGORIES:
+            category, _ = ServiceCategory.objects.get_or_create(
+                name=name, defaults={'icon': icon, 'description': '، '.join(topics)},
+            )
+            category_ids.append(category.pk)
+        base = {
+            key: model.objects.aggregate(top=Max('pk'))['top'] or 0
+            for key, (model, _) in synthetic.COLUMNS.items() if key != 'category'
+        }
+        return synthetic.Plan(
+            seed=options['seed'],
+            clients=options['users'],
+            consultants=options['consultants'],
+            services_per_consultant=max(options['services_per_consultant'], 1),
+            slots_per_consultant=options['slots_per_consultant'],
+            booking_rate=options['booking_rate'],
+            reviews=options['reviews'],
+            notifications_per_user=options['notifications_per_user'],
+            requests=options['requests'],
+            days_back=options['days_back'],
+            days_ahead=options['days_ahead'],
+            today=synthetic.midnight(today),
+            password=make_password(options['password']),
+            base=base,
+            category_ids=tuple(category_ids),
+        )
+
+    def handle(self, *args, **options):
+        plan = self._plan(options)
+        workers = options['workers']
+        if connection.vendor == 'sqlite' and workers > 1:
+            # SQLite يقبل كاتباً واحداً؛ العمليات الإضافية ستنتظر القفل فقط
+            self.stdout.write(self.style.WARNING('SQLite: الكتابة من عملية واحدة'))
+            workers = 1
+
+        totals = Counter()
+        started = time.perf_counter()
+        pool = None
+        if workers > 1:
+            # لا تُورَّث اتصالات مفتوحة للعمليات الفرعية
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=synthetic.init_worker)
+        try:
+            for phase, batches in synthetic.tasks(plan, options['batch_size']):
+                phase_started = time.perf_counter()
+                counts = Counter()
+                if pool is None:
+                    for start, stop in batches:
+                        counts.update(synthetic.run(plan, phase, start, stop))
+                else:
+                    futures = [pool.submit(synthetic.run_task, (plan, phase, start, stop)) for start, stop in batches]
+                    for future in as_completed(futures):
+                        counts.update(future.result())
+                totals.update(counts)
+                elapsed = time.perf_counter() - phase_started
+                rows = sum(counts.values())
+                details = ' '.join(f'{key}={count}' for key, count in counts.items())
+                self.stdout.write(f'{phase:<14} {details} ({elapsed:.2f}ث، {rows / max(elapsed, 1e-9) * 60:,.0f} صف/دقيقة)')
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self._finish()
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{rows} صف في {elapsed:.2f}ث ({rows / max(elapsed, 1e-9) * 60:,.0f} صف/دقيقة)'
+        ))
+        if not options['skip_derived']:
+            self._derived()
+
+    def _finish(self):
+        models = [model for model, _ in synthetic.COLUMNS.values()]
+        with connection.cursor() as cursor:
+            # المعرّفات صريحة فتُعاد التسلسلات إلى ما بعد أعلاها (PostgreSQL)
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+            for model in models:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+    def _derived(self):
+        # ما تحدّثه الإشارات عادةً، مرة واحدة للجميع
+        started = time.perf_counter()
+        facets.recount()
+        facets.refresh_ratings()
+        availability.refresh()
+        ranking.refresh()
+        page_cache.purge('consultants', 'categories')
+        self.stdout.write(f'الأعداد والتوفر والترتيب: {time.perf_counter() - started:.2f}ث')
@@ -0,0 +1,194 @@
+import csv
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from core import availability, facets, page_cache, ranking
+from core.models import Consultant, Profile, ServiceCategory, User
+
+CATEGORY_SEPARATOR = '|'
+
+
+def _init_worker():
+    # في حالة spawn تحتاج العملية الفرعية لتهيئة Django بنفسها
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_password(password):
+    return make_password(password)
+
+
+def _read_rows(path):
+    """يقرأ CSV أو JSONL سطراً سطراً دون تحميل الملف كاملاً في الذاكرة."""
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding='utf-8', newline='') as fh:
+            yield from csv.DictReader(fh)
+
+
+def _categories(row):
+    value = row.get('categories') or []
+    if isinstance(value, str):
+        value = value.split(CATEGORY_SEPARATOR)
+    return [name.strip() for name in value if name and name.strip()]
+
+
+class Command(BaseCommand):
+    help = (
+        'استيراد مستشارين بالجملة من CSV/JSONL: تجزئة كلمات المرور في مجموعة عمليات، '
+        'ثم bulk_create لـ User و Profile و Consultant والتصنيفات على دفعات داخل معاملات. '
+        'الأعمدة: email, full_name, phone, password أو password_hash, bio, categories (مفصولة بـ |), session_duration'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--resume', action='store_true',
+                            help='المتابعة بعد آخر دفعة مكتملة حسب ملف <path>.progress')
+        parser.add_argument('--unusable-passwords', action='store_true',
+                            help='إنشاء الحسابات بكلمات مرور غير قابلة للاستخدام (يُرسل رابط التعيين لاحقاً)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'الملف غير موجود: {path}')
+        progress_path = f'{path}.progress'
+        skip = 0
+        if options['resume'] and os.path.exists(progress_path):
+            with open(progress_path) as fh:
+                skip = int(fh.read().strip() or 0)
+            self.stdout.write(f'متابعة بعد السطر {skip}')
+
+        self.workers = options['workers']
+        self.category_ids = {name: pk for pk, name in ServiceCategory.objects.values_list('pk', 'name')}
+        rows = islice(_read_rows(path), skip, None)
+        processed, created = skip, 0
+        self.skipped = []
+        started = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                created += self._import_batch(batch, pool, options['unusable_passwords'], first_line=processed + 1)
+                processed += len(batch)
+                # تسجيل التقدم بعد نجاح المعاملة فقط
+                with open(progress_path, 'w') as fh:
+                    fh.write(str(processed))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{processed} سطر، أُنشئ {created} مستشار ({created / elapsed:.0f}/ث)'
+                )
+
+        if self.skipped:
+            self.stderr.write(self.style.WARNING(
+                f"{len(self.skipped)} سطر بلا بريد تُخطّي: {', '.join(map(str, self.skipped[:50]))}"
+                + (' ...' if len(self.skipped) > 50 else '')
+            ))
+        self.stdout.write(self.style.SUCCESS(f'اكتمل الاستيراد: {created} مستشار جديد'))
+
+    def _hash_all(self, batch, pool, unusable):
+        hashes = [None] * len(batch)
+        pending = []
+        for index, row in enumerate(batch):
+            password_hash = row.get('password_hash')
+            if password_hash:
+                try:
+                    identify_hasher(password_hash)
+                except ValueError:
+                    raise CommandError(f"password_hash غير معروف للبريد {row.get('email')}")
+                hashes[index] = password_hash
+            elif unusable or not row.get('password'):
+                hashes[index] = make_password(None)
+            else:
+                pending.append(index)
+        chunksize = max(len(pending) // (self.workers * 4), 1)
+        for index, value in zip(pending, pool.map(_hash_password, [batch[i]['password'] for i in pending], chunksize=chunksize)):
+            hashes[index] = value
+        return hashes
+
+    def _import_batch(self, batch, pool, unusable, first_line=1):
+        # سطر بلا بريد لا يصلح حساباً؛ يُسجَّل رقمه (بعد الترويسة) ويُكمل الباقي
+        rows = []
+        for line, row in enumerate(batch, first_line):
+            if (row.get('email') or '').strip():
+                rows.append(row)
+            else:
+                self.skipped.append(line)
+        batch = rows
+        # تجاهل البريد المكرر داخل الدفعة أو الموجود مسبقاً (يجعل إعادة التشغيل آمنة)
+        emails = [User.objects.normalize_email(row['email'].strip()) for row in batch]
+        existing = set(
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=[email.lower() for email in emails])
+            .values_list('email_lower', flat=True)
+        )
+        fresh = []
+        for email, row in zip(emails, batch):
+            if email.lower() in existing:
+                continue
+            existing.add(email.lower())
+            fresh.append((email, row))
+        if not fresh:
+            return 0
+
+        hashes = self._hash_all([row for _, row in fresh], pool, unusable)
+
+        with transaction.atomic():
+            self._ensure_categories(row for _, row in fresh)
+            users = User.objects.bulk_create([
+                User(
+                    email=email,
+                    full_name=row.get('full_name', ''),
+                    phone=row.get('phone') or None,
+                    role=User.Role.PROVIDER,
+                    password=password_hash,
+                )
+                for (email, row), password_hash in zip(fresh, hashes)
+            ])
+            Profile.objects.bulk_create([Profile(user=user) for user in users])
+            consultants = Consultant.objects.bulk_create([
+                Consultant(
+                    user=user,
+                    bio=row.get('bio', ''),
+                    session_duration=int(row.get('session_duration') or 60),
+                )
+                for user, (_, row) in zip(users, fresh)
+            ])
+            Through = Consultant.categories.through
+            links = Through.objects.bulk_create([
+                Through(consultant_id=consultant.pk, servicecategory_id=self.category_ids[name])
+                for consultant, (_, row) in zip(consultants, fresh)
+                for name in set(_categories(row))
+            ])
+            # bulk_create لا يُطلق m2m_changed؛ المستشارون الجدد متاحون افتراضياً
+            facets.adjust_counts(Counter(link.servicecategory_id for link in links))
+        # ولا post_save: ما تحدّثه الإشارات عادةً، لمستشاري الدفعة فقط
+        availability.refresh([user.pk for user in users])
+        ranking.refresh([consultant.pk for consultant in consultants])
+        page_cache.purge('consultants', 'categories', *{f'category:{link.servicecategory_id}' for link in links})
+        return len(users)
+
+    def _ensure_categories(self, rows):
+        missing = {name for row in rows for name in _categories(row)} - set(self.category_ids)
+        if missing:
+            for category in ServiceCategory.objects.bulk_create([ServiceCategory(name=name) for name in missing]):
+                self.category_ids[category.name] = category.pk
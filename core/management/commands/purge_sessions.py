@@ -0,0 +1,31 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'حذف الجلسات المنتهية من django_session على دفعات (بديل clearsessions للجداول الكبيرة)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0.1,
+                            help='استراحة بين الدفعات بالثواني لتخفيف الضغط على قاعدة البيانات')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            total += deleted
+            self.stdout.write(f'حُذفت {total} جلسة...')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'انتهى: حُذفت {total} جلسة منتهية'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core import throttling
+
+
+class Command(BaseCommand):
+    help = 'حذف عدّادات تحديد المعدل المنتهية (ThrottleCounter)؛ يُشغَّل دورياً مثل purge_sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        total = throttling.purge_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'انتهى: حُذف {total} عدّاد منتهٍ'))
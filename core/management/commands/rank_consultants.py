@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import page_cache, ranking
+
+
+class Command(BaseCommand):
+    help = 'إعادة حساب rank_score لكل المستشارين (يُشغَّل دورياً؛ الكتابات تحدّث المستشار المعني فوراً)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = ranking.refresh(batch_size=options['batch_size'])
+        # قرب المواعيد يتغير مع الوقت فيتغير ترتيب القوائم
+        page_cache.purge('consultants')
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} مستشار في {time.perf_counter() - started:.2f}ث'
+        ))
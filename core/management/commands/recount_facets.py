@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core import facets, page_cache
+from core.models import ServiceCategory
+
+
+class Command(BaseCommand):
+    help = (
+        'إعادة حساب ServiceCategory.consultant_count من جدول الربط و Consultant.rating من التقييمات '
+        '(بعد استيراد أو تعديل مباشر في قاعدة البيانات)'
+    )
+
+    def handle(self, *args, **options):
+        before = dict(ServiceCategory.objects.values_list('pk', 'consultant_count'))
+        facets.recount()
+        after = dict(ServiceCategory.objects.values_list('pk', 'consultant_count'))
+        drifted = {pk for pk in after if before.get(pk) != after[pk]}
+        if drifted:
+            page_cache.purge('categories', *(f'category:{pk}' for pk in drifted))
+        facets.refresh_ratings()
+        page_cache.purge('consultants')
+        self.stdout.write(self.style.SUCCESS(f'{len(after)} تخصص، {len(drifted)} منها كان عدده منحرفاً'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core import availability, page_cache, ranking
+
+
+class Command(BaseCommand):
+    help = (
+        'تحديث next_free_slot_at و free_slots_7d: افتراضياً للمستشارين الذين انقضى موعدهم المحفوظ '
+        '(يُشغَّل كل بضع دقائق)، و --all لإعادة حساب الجميع (يومياً، لتحريك نافذة الأيام السبعة)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            count = availability.refresh()
+            ranking.refresh()
+        else:
+            stale = availability.stale_provider_ids()
+            count = availability.refresh(stale) if stale else 0
+            if stale:
+                ranking.refresh_providers(stale)
+        if count:
+            page_cache.purge('consultants')
+        self.stdout.write(self.style.SUCCESS(f'حُدِّث {count} مستشار'))
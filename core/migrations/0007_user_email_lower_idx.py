@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:45
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0006_document_file_metadata'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='core_user_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_user_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginThrottlePolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('login', 'تسجيل الدخول'), ('register', 'إنشاء حساب')], max_length=20, unique=True)),
+                ('enabled', models.BooleanField(default=True)),
+                ('ip_capacity', models.PositiveIntegerField(default=20, help_text='أقصى عدد محاولات متتالية من نفس IP')),
+                ('ip_per_minute', models.PositiveIntegerField(default=10, help_text='معدل تعبئة دلو IP في الدقيقة')),
+                ('email_capacity', models.PositiveIntegerField(default=5, help_text='أقصى عدد محاولات متتالية لنفس البريد')),
+                ('email_per_minute', models.PositiveIntegerField(default=1, help_text='معدل تعبئة دلو البريد في الدقيقة')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
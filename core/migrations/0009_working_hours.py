@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_loginthrottlepolicy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultant',
+            name='session_duration',
+            field=models.PositiveSmallIntegerField(default=60, help_text='مدة الموعد بالدقائق'),
+        ),
+        migrations.CreateModel(
+            name='WorkingHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(5, 'السبت'), (6, 'الأحد'), (0, 'الاثنين'), (1, 'الثلاثاء'), (2, 'الأربعاء'), (3, 'الخميس'), (4, 'الجمعة')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('consultant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_hours', to='core.consultant')),
+            ],
+            options={
+                'ordering': ['weekday', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkingHoursException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('consultant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_hours_exceptions', to='core.consultant')),
+            ],
+            options={
+                'ordering': ['date', 'start_time'],
+                'indexes': [models.Index(fields=['consultant', 'date'], name='core_workin_consult_2a543f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_working_hours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultant',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 20:10
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counts(apps, schema_editor):
+    ServiceCategory = apps.get_model('core', 'ServiceCategory')
+    for category in ServiceCategory.objects.annotate(
+        available=Count('consultant', filter=Q(consultant__available=True))
+    ):
+        ServiceCategory.objects.filter(pk=category.pk).update(consultant_count=category.available)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_consultant_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicecategory',
+            name='consultant_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
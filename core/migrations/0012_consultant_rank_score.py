@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_servicecategory_consultant_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultant',
+            name='rank_score',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+    ]
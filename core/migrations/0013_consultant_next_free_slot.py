@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:03
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+
+def fill_next_free_slot(apps, schema_editor):
+    Consultant = apps.get_model('core', 'Consultant')
+    ConsultationSlot = apps.get_model('core', 'ConsultationSlot')
+    now = timezone.now()
+    stats = ConsultationSlot.objects.filter(is_booked=False, start_time__gte=now).values('provider_id').annotate(
+        first=Min('start_time'),
+        week=Count('id', filter=Q(start_time__lt=now + timedelta(days=7))),
+    ).order_by()
+    for row in stats:
+        Consultant.objects.filter(user_id=row['provider_id']).update(
+            next_free_slot_at=row['first'], free_slots_7d=row['week']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_consultant_rank_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultant',
+            name='free_slots_7d',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='consultant',
+            name='next_free_slot_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='consultant',
+            index=models.Index(fields=['available', 'next_free_slot_at'], name='core_consultant_next_free_idx'),
+        ),
+        migrations.RunPython(fill_next_free_slot, migrations.RunPython.noop),
+    ]
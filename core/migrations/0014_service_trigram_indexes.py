@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-19 21:05
+
+from django.db import migrations
+
+# UPPER(...) يطابق ما يولّده icontains على PostgreSQL فيُستخدم الفهرس لـ LIKE و % معاً
+TRIGRAM_INDEXES = {
+    'core_service_title_trgm_idx': 'title',
+    'core_service_description_trgm_idx': 'description',
+}
+
+
+def _has_trigram(schema_editor):
+    """يحاول تفعيل pg_trgm؛ قد يفشل دون صلاحيات فنتحقق إن كان مفعلاً مسبقاً."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except Exception:
+            pass
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if not _has_trigram(schema_editor):
+        return
+    for name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+            f'ON core_service USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY لا يعمل داخل معاملة
+    atomic = False
+
+    dependencies = [
+        ('core', '0013_consultant_next_free_slot'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='service',
+            name='core_servic_descrip_397600_idx',
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
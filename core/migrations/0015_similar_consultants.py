@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_service_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarConsultant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('consultant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_links', to='core.consultant')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.consultant')),
+            ],
+            options={
+                'ordering': ['consultant', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('consultant', 'rank'), name='core_similar_consultant_rank_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_similar_consultants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchQueryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('browse', 'تصفح المستشارين'), ('autocomplete', 'الإكمال التلقائي')], max_length=20)),
+                ('query', models.CharField(max_length=100)),
+                ('day', models.DateField()),
+                ('searches', models.PositiveIntegerField(default=0)),
+                ('zero_results', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'source'], name='core_search_query_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'query', 'day'), name='core_search_query_day_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchClickStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('browse', 'تصفح المستشارين'), ('autocomplete', 'الإكمال التلقائي')], max_length=20)),
+                ('query', models.CharField(max_length=100)),
+                ('day', models.DateField()),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('consultant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.consultant')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'query', 'day', 'consultant'), name='core_search_click_day_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_search_analytics'),
+    ]
+
+    operations = [
+        # الفهارس المركبة أولاً ثم حذف فهارس المفاتيح الأجنبية التي أصبحت بادئة لها
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['client', 'status', '-created_at'], name='core_booking_client_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['client', 'status'], name='core_consult_client_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultationrequest',
+            index=models.Index(fields=['consultant', 'status', '-created_at'], name='core_request_consultant_st_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultationslot',
+            index=models.Index(fields=['provider', 'is_booked', 'start_time'], name='core_slot_provider_booked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='core_notif_user_read_idx'),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='consultation',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='client_consultations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='consultationrequest',
+            name='consultant',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='consultant_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='consultationslot',
+            name='provider',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='slots', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
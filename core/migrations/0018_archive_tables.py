@@ -0,0 +1,88 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:22
+
+import core.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('slot_id', models.BigIntegerField(null=True)),
+                ('slot_start_time', models.DateTimeField(null=True)),
+                ('slot_end_time', models.DateTimeField(null=True)),
+                ('status', models.CharField(choices=[('pending', 'قيد الانتظار'), ('confirmed', 'تم التأكيد'), ('completed', 'منتهية'), ('cancelled', 'ملغاة')], max_length=20)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('client', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('service', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.service')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['client', '-created_at'], name='core_arch_booking_client_idx')],
+            },
+            bases=(core.models.ArchivedSlotMixin, models.Model),
+        ),
+        migrations.CreateModel(
+            name='ArchivedConsultation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('slot_id', models.BigIntegerField()),
+                ('slot_start_time', models.DateTimeField(null=True)),
+                ('slot_end_time', models.DateTimeField(null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'قيد الانتظار'), ('confirmed', 'تم التأكيد'), ('completed', 'منتهية'), ('cancelled', 'ملغاة')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('client', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('provider', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('service', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.service')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['client', '-created_at'], name='core_arch_consult_client_idx'), models.Index(fields=['provider', '-created_at'], name='core_arch_consult_provider_idx')],
+            },
+            bases=(core.models.ArchivedSlotMixin, models.Model),
+        ),
+        migrations.CreateModel(
+            name='ArchivedConsultationRequest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('question', models.TextField()),
+                ('response', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'قيد الانتظار'), ('accepted', 'مقبول'), ('rejected', 'مرفوض'), ('completed', 'مكتمل')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('client', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('consultant', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['client', '-created_at'], name='core_arch_request_client_idx'), models.Index(fields=['consultant', '-created_at'], name='core_arch_request_consult_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedConsultationSlot',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('is_booked', models.BooleanField(default=False)),
+                ('provider', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['provider', 'start_time'], name='core_arch_slot_provider_idx')],
+            },
+        ),
+    ]
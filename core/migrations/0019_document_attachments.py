@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_archive_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='consultation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='core.consultation'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='consultation_request',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='core.consultationrequest'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+from django.db.models import Avg, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Round
+
+
+def fill_ratings(apps, schema_editor):
+    Consultant = apps.get_model('core', 'Consultant')
+    Review = apps.get_model('core', 'Review')
+    average = (
+        Review.objects.filter(service__provider_id=OuterRef('user_id'))
+        .values('service__provider_id').annotate(average=Avg('rating')).values('average')
+    )
+    Consultant.objects.update(rating=Round(Coalesce(Subquery(average, output_field=FloatField()), Value(0.0)), 2))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_document_attachments'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_fill_consultant_rating'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='consultation',
+            name='service',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.service'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_alter_consultation_service'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingBaseline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('volume_reference', models.FloatField(default=0)),
+                ('global_mean', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
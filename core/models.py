@@ -4,8 +4,10 @@ from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify  # Import slugify
 import uuid
+from types import SimpleNamespace
 from django.utils import timezone 
 from django.db.models import Avg
+from django.db.models.functions import Lower
 # models.py
 
 class UserManager(BaseUserManager):
@@ -54,6 +56,13 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['full_name', 'phone']
     objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # بحث تسجيل الدخول غير الحساس لحالة الأحرف
+            models.Index(Lower('email'), name='core_user_email_lower_idx'),
+        ]
+
     def switch_role(self):
         if self.role == self.Role.CLIENT:
             self.role = self.Role.PROVIDER
@@ -83,6 +92,8 @@ class ServiceCategory(models.Model):
     name = models.CharField(max_length=100)
     icon = models.CharField(max_length=50, blank=True)
     description = models.TextField(blank=True)
+    # عدد المستشارين المتاحين؛ يُحدَّث تزايدياً (core.facets) بدل Count على جدول الربط
+    consultant_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         verbose_name_plural = "Service Categories"
@@ -102,9 +113,10 @@ class Service(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     class Meta:
+        # البحث النصي يستخدم فهارس GIN (pg_trgm) على UPPER(title/description)
+        # تُنشأ في الترحيل 0014 على PostgreSQL فقط
         indexes = [
             models.Index(fields=['title']),
-            models.Index(fields=['description']),
         ]
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -126,6 +138,14 @@ class Consultant(models.Model):
     profile_image = models.ImageField(upload_to='consultants/' , null=True)
     available = models.BooleanField(default=True)
     rating = models.FloatField(default=0)
+    # درجة "الأنسب" المحسوبة في core.ranking
+    rank_score = models.FloatField(default=0, db_index=True, editable=False)
+    # أول موعد متاح وعدد المواعيد المتاحة خلال 7 أيام (core.availability)
+    next_free_slot_at = models.DateTimeField(null=True, blank=True, editable=False)
+    free_slots_7d = models.PositiveIntegerField(default=0, editable=False)
+    session_duration = models.PositiveSmallIntegerField(default=60, help_text='مدة الموعد بالدقائق')
+    # يُحدَّث أيضاً عند تغيّر الخدمات والمواعيد والتقييمات (core.signals) ليكون مُدقّق صفحة المستشار
+    updated_at = models.DateTimeField(auto_now=True)
     
     @property
     def avg_rating(self):
@@ -136,17 +156,93 @@ class Consultant(models.Model):
     @property
     def review_count(self):
         return Review.objects.filter(service__provider=self.user).count()
+
+    class Meta:
+        indexes = [
+            # "متاح قريباً": تصفية available ثم الترتيب بأقرب موعد بمسح فهرس واحد
+            models.Index(fields=['available', 'next_free_slot_at'], name='core_consultant_next_free_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - مستشار"
+
+
+class SimilarConsultant(models.Model):
+    """أقرب k مستشارين لكل مستشار، يبنيها أمر build_recommendations (core.recommendations)"""
+    consultant = models.ForeignKey(Consultant, on_delete=models.CASCADE, related_name='similar_links')
+    similar = models.ForeignKey(Consultant, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['consultant', 'rank']
+        constraints = [
+            # يغني عن فهرس منفصل: صفحة المستشار تقرأ جيرانه بمسح (consultant_id, rank)
+            models.UniqueConstraint(fields=['consultant', 'rank'], name='core_similar_consultant_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.consultant_id} ~ {self.similar_id} ({self.score:.3f})"
+
+
+class WorkingHours(models.Model):
+    """فترة عمل أسبوعية؛ يمكن أن يكون لليوم أكثر من فترة"""
+    WEEKDAY_CHOICES = [
+        (5, 'السبت'),
+        (6, 'الأحد'),
+        (0, 'الاثنين'),
+        (1, 'الثلاثاء'),
+        (2, 'الأربعاء'),
+        (3, 'الخميس'),
+        (4, 'الجمعة'),
+    ]
+
+    consultant = models.ForeignKey(Consultant, on_delete=models.CASCADE, related_name='working_hours')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)  # نفس ترقيم date.weekday()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        ordering = ['weekday', 'start_time']
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.start_time:%H:%M} - {self.end_time:%H:%M}"
+
+
+class WorkingHoursException(models.Model):
+    """استثناء لتاريخ محدد: بدون أوقات = يوم عطلة، وإلا تحل فتراته محل الجدول الأسبوعي"""
+    consultant = models.ForeignKey(Consultant, on_delete=models.CASCADE, related_name='working_hours_exceptions')
+    date = models.DateField()
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
+    note = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ['date', 'start_time']
+        indexes = [
+            models.Index(fields=['consultant', 'date']),
+        ]
+
+    @property
+    def is_day_off(self):
+        return self.start_time is None or self.end_time is None
+
+    def __str__(self):
+        return f"{self.consultant} - {self.date}"
     
 class ConsultationSlot(models.Model):
-    provider = models.ForeignKey(User, on_delete=models.CASCADE, related_name='slots')
+    # الفهرس المركب أدناه يبدأ بـ provider فيغني عن فهرس المفتاح الأجنبي
+    provider = models.ForeignKey(User, on_delete=models.CASCADE, related_name='slots', db_index=False)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     is_booked = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['start_time']
+        indexes = [
+            # مواعيد مقدم الخدمة المتاحة القادمة (صفحة المستشار، slot_list، لوحة التحكم)
+            models.Index(fields=['provider', 'is_booked', 'start_time'], name='core_slot_provider_booked_idx'),
+        ]
     
     def __str__(self):
         return f"{self.provider.username} - {self.start_time}"
@@ -157,9 +253,11 @@ class Consultation(models.Model):
         CONFIRMED = 'confirmed', _('تم التأكيد')
         COMPLETED = 'completed', _('منتهية')
         CANCELLED = 'cancelled', _('ملغاة')
+
+    ACTIVE_STATUSES = (Status.PENDING, Status.CONFIRMED)
     
     slot = models.OneToOneField(ConsultationSlot, on_delete=models.PROTECT)
-    client = models.ForeignKey(User, on_delete=models.CASCADE, related_name='client_consultations')
+    client = models.ForeignKey(User, on_delete=models.CASCADE, related_name='client_consultations', db_index=False)
     service = models.ForeignKey(Service, on_delete=models.CASCADE , blank=True, null=True)
     notes = models.TextField(blank=True)
     status = models.CharField(
@@ -169,6 +267,17 @@ class Consultation(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # استشارات العميل حسب الحالة؛ جهة مقدم الخدمة تمر بـ slot (core_slot_provider_booked_idx)
+            models.Index(fields=['client', 'status'], name='core_consult_client_status_idx'),
+        ]
+
+    @property
+    def provider(self):
+        # نفس اسم الحقل في ArchivedConsultation ليعرضهما القالب بنفس الطريقة
+        return self.slot.provider
     
     def save(self, *args, **kwargs):
         if self.status == self.Status.CONFIRMED:
@@ -187,12 +296,65 @@ class Document(models.Model):
     reminder_date = models.DateField(null=True, blank=True)
     is_important = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # بيانات الملف تُستخرج مرة واحدة عند الرفع حتى لا نسأل التخزين عند العرض
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    mime_type = models.CharField(max_length=100, blank=True, editable=False)
+    checksum = models.CharField(max_length=64, blank=True, editable=False)
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    page_count = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # الطلب أو الاستشارة التي أرفق المالك الوثيقة بها؛ مقدم الخدمة فيها يراها ما دامت نشطة
+    consultation_request = models.ForeignKey(
+        'ConsultationRequest', on_delete=models.SET_NULL, null=True, blank=True, related_name='documents',
+    )
+    consultation = models.ForeignKey(
+        Consultation, on_delete=models.SET_NULL, null=True, blank=True, related_name='documents',
+    )
     
+    def save(self, *args, **kwargs):
+        # ملف جديد لم يُرفع بعد للتخزين
+        if self.file and not self.file._committed:
+            self.refresh_file_metadata()
+        super().save(*args, **kwargs)
+
+    def refresh_file_metadata(self):
+        from .file_metadata import extract_file_metadata
+        upload = self.file.file
+        metadata = extract_file_metadata(
+            upload,
+            name=self.file.name,
+            declared_type=getattr(upload, 'content_type', None),
+        )
+        for field, value in metadata.items():
+            setattr(self, field, value)
+
+    @property
+    def is_image(self):
+        return self.mime_type.startswith('image/')
+
+    @property
+    def is_pdf(self):
+        return self.mime_type == 'application/pdf'
+
     def __str__(self):
         return self.title
 
+    def can_access(self, user):
+        """المالك، أو مقدم الخدمة في طلب/استشارة نشطة للمالك أُرفقت بها الوثيقة"""
+        if self.user_id == user.id:
+            return True
+        if self.consultation_request_id and ConsultationRequest.objects.filter(
+            pk=self.consultation_request_id, client_id=self.user_id, consultant_id=user.id,
+            status__in=ConsultationRequest.ACTIVE_STATUSES,
+        ).exists():
+            return True
+        return bool(self.consultation_id) and Consultation.objects.filter(
+            pk=self.consultation_id, client_id=self.user_id, slot__provider_id=user.id,
+            status__in=Consultation.ACTIVE_STATUSES,
+        ).exists()
+
 class Notification(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', db_index=False)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     link = models.URLField(blank=True)
@@ -200,6 +362,10 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # عدد غير المقروءة في شريط التنقل وقائمة الإشعارات الأحدث أولاً
+            models.Index(fields=['user', 'is_read', '-created_at'], name='core_notif_user_read_idx'),
+        ]
     
     def __str__(self):
         return f"Notification for {self.user.username}"
@@ -265,20 +431,27 @@ class ConsultationRequest(models.Model):
         ('rejected', 'مرفوض'),
         ('completed', 'مكتمل')
     ]
+    ACTIVE_STATUSES = ('pending', 'accepted')
     
     client = models.ForeignKey(User, on_delete=models.CASCADE, related_name='client_requests')
-    consultant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='consultant_requests')
+    consultant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='consultant_requests', db_index=False)
     question = models.TextField()
     response = models.TextField(blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # الطلبات المعلقة لشريط التنقل ولوحة التحكم، وقائمة الطلبات حسب الحالة
+            models.Index(fields=['consultant', 'status', '-created_at'], name='core_request_consultant_st_idx'),
+        ]
     
     def __str__(self):
         return f"استشارة #{self.id} - {self.client.username} إلى {self.consultant.username}"
     
     def can_respond(self, user):
-        return self.consultant == user and self.status in ['pending', 'accepted']
+        return self.consultant == user and self.status in self.ACTIVE_STATUSES
     
 
 class Booking(models.Model):
@@ -288,7 +461,7 @@ class Booking(models.Model):
         COMPLETED = 'completed', _('منتهية')
         CANCELLED = 'cancelled', _('ملغاة')
     
-    client = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
+    client = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings', db_index=False)
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
     slot = models.ForeignKey(ConsultationSlot, on_delete=models.SET_NULL, null=True, blank=True)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
@@ -298,9 +471,196 @@ class Booking(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # حجوزات العميل النشطة وقائمته الأحدث أولاً
+            models.Index(fields=['client', 'status', '-created_at'], name='core_booking_client_status_idx'),
+        ]
     
     def __str__(self):
         return f"حجز #{self.id} - {self.client.username} لـ {self.service.title}"
     
     def get_status_display(self):
         return dict(self.Status.choices)[self.status]
+
+
+class LoginThrottlePolicy(models.Model):
+    """حدود محاولات الدخول/التسجيل، تُعدّل من لوحة الإدارة دون إعادة نشر"""
+    SCOPE_CHOICES = [
+        ('login', 'تسجيل الدخول'),
+        ('register', 'إنشاء حساب'),
+    ]
+
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES, unique=True)
+    enabled = models.BooleanField(default=True)
+    ip_capacity = models.PositiveIntegerField(default=20, help_text='أقصى عدد محاولات متتالية من نفس IP')
+    ip_per_minute = models.PositiveIntegerField(default=10, help_text='معدل تعبئة دلو IP في الدقيقة')
+    email_capacity = models.PositiveIntegerField(default=5, help_text='أقصى عدد محاولات متتالية لنفس البريد')
+    email_per_minute = models.PositiveIntegerField(default=1, help_text='معدل تعبئة دلو البريد في الدقيقة')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def as_dict(self):
+        return {
+            'enabled': self.enabled,
+            'ip_capacity': self.ip_capacity,
+            'ip_per_minute': self.ip_per_minute,
+            'email_capacity': self.email_capacity,
+            'email_per_minute': self.email_per_minute,
+        }
+
+    def __str__(self):
+        return self.get_scope_display()
+
+
+class ThrottleCounter(models.Model):
+    """محاولات مفتاح تحديد معدل في نافذة واحدة (core.throttling)؛ يُزاد بتحديث ذري في القاعدة"""
+    key = models.CharField(max_length=160, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
+
+
+class SearchQueryStat(models.Model):
+    """عدّادات يومية لاستعلام بحث مطبّع، تُكتب مجمّعة من core.search_analytics"""
+    SOURCE_CHOICES = [
+        ('browse', 'تصفح المستشارين'),
+        ('autocomplete', 'الإكمال التلقائي'),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    query = models.CharField(max_length=100)
+    day = models.DateField()
+    searches = models.PositiveIntegerField(default=0)
+    zero_results = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'query', 'day'], name='core_search_query_day_uniq'),
+        ]
+        indexes = [
+            # التقرير يجمع آخر أيام لكل الاستعلامات
+            models.Index(fields=['day', 'source'], name='core_search_query_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source}: {self.query} ({self.day})"
+
+
+class SearchClickStat(models.Model):
+    """عدد النقرات اليومية على مستشار من نتائج استعلام"""
+    source = models.CharField(max_length=20, choices=SearchQueryStat.SOURCE_CHOICES)
+    query = models.CharField(max_length=100)
+    day = models.DateField()
+    consultant = models.ForeignKey(Consultant, on_delete=models.CASCADE, related_name='+')
+    clicks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'query', 'day', 'consultant'], name='core_search_click_day_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source}: {self.query} -> {self.consultant_id}"
+
+
+class RankingBaseline(models.Model):
+    """مرجع التطبيع المشترك للتحديثات الجزئية في core.ranking؛ صف واحد يكتبه الحساب الكامل"""
+    volume_reference = models.FloatField(default=0)
+    global_mean = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ranking baseline @ {self.updated_at}"
+
+
+# ---- الأرشيف (core.archive) ---- #
+# المستخدم والخدمة لا يُؤرشفان؛ الروابط إليهما بلا قيود في القاعدة ويحذفها core.signals بالتتابع
+_ARCHIVE_LINK = dict(on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+
+
+class ArchivedRecord(models.Model):
+    """صف نُقل من جدول نشط إلى جدول أرشيفه بنفس المعرّف"""
+    id = models.BigIntegerField(primary_key=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    class Meta:
+        abstract = True
+
+
+class ArchivedSlotMixin:
+    """وقت الموعد محفوظ مع الصف لأن الموعد نفسه قد يُؤرشف أو يُحذف"""
+
+    @property
+    def slot(self):
+        if self.slot_start_time is None:
+            return None
+        return SimpleNamespace(id=self.slot_id, start_time=self.slot_start_time, end_time=self.slot_end_time)
+
+
+class ArchivedConsultationSlot(ArchivedRecord):
+    provider = models.ForeignKey(User, **_ARCHIVE_LINK)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    is_booked = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['provider', 'start_time'], name='core_arch_slot_provider_idx')]
+
+
+class ArchivedConsultation(ArchivedSlotMixin, ArchivedRecord):
+    slot_id = models.BigIntegerField()
+    slot_start_time = models.DateTimeField(null=True)
+    slot_end_time = models.DateTimeField(null=True)
+    provider = models.ForeignKey(User, **_ARCHIVE_LINK)
+    client = models.ForeignKey(User, **_ARCHIVE_LINK)
+    service = models.ForeignKey(Service, null=True, **_ARCHIVE_LINK)
+    notes = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=Consultation.Status.choices)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['client', '-created_at'], name='core_arch_consult_client_idx'),
+            models.Index(fields=['provider', '-created_at'], name='core_arch_consult_provider_idx'),
+        ]
+
+
+class ArchivedBooking(ArchivedSlotMixin, ArchivedRecord):
+    client = models.ForeignKey(User, **_ARCHIVE_LINK)
+    service = models.ForeignKey(Service, **_ARCHIVE_LINK)
+    slot_id = models.BigIntegerField(null=True)
+    slot_start_time = models.DateTimeField(null=True)
+    slot_end_time = models.DateTimeField(null=True)
+    status = models.CharField(max_length=20, choices=Booking.Status.choices)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['client', '-created_at'], name='core_arch_booking_client_idx')]
+
+
+class ArchivedConsultationRequest(ArchivedRecord):
+    client = models.ForeignKey(User, **_ARCHIVE_LINK)
+    consultant = models.ForeignKey(User, **_ARCHIVE_LINK)
+    question = models.TextField()
+    response = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=ConsultationRequest.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['client', '-created_at'], name='core_arch_request_client_idx'),
+            models.Index(fields=['consultant', '-created_at'], name='core_arch_request_consult_idx'),
+        ]
+
+    def can_respond(self, user):
+        return False
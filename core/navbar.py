@@ -0,0 +1,53 @@
+"""حالة شريط التنقل لكل مستخدم: الدور، الإشعارات غير المقروءة، وطلبات الاستشارة المعلّقة.
+
+تُحفظ لقطة لكل مستخدم في ذاكرة NAVBAR_CACHE وتُحذف من مسارات الكتابة التي
+تغيّر هذه الأعداد (إشارات Notification و ConsultationRequest، وتحديثات
+القراءة الجماعية في views). الوصول لها يمر عبر core.context_processors.navbar.
+الحذف لا يصل إلا لذاكرة هذه العملية إن كانت NAVBAR_CACHE محلية، فلا تُحفظ لقطات حينها.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from .checks import is_process_local
+from .db_router import use_primary
+
+
+def _cache():
+    return caches[settings.NAVBAR_CACHE]
+
+
+def _key(user_id):
+    return f'navbar:{user_id}'
+
+
+def _ttl():
+    # شارات قديمة في بقية العمال تدخل أيضاً في ETag (core.conditional) فتُعاد 304 بها
+    return 0 if is_process_local(settings.NAVBAR_CACHE) else settings.NAVBAR_CACHE_TTL
+
+
+def get_navbar(user):
+    key = _key(user.pk)
+    ttl = _ttl()
+    state = _cache().get(key) if ttl else None
+    # دور تغيّر بـ update() أو في عملية أخرى دون إشارة: اللقطة لا تطابق المستخدم المحمّل
+    if state is None or state['role'] != user.role:
+        from .models import ConsultationRequest, Notification, User
+
+        is_provider = user.role == User.Role.PROVIDER
+        with use_primary():
+            state = {
+                'role': user.role,
+                'is_provider': is_provider,
+                'unread_notifications': Notification.objects.filter(user_id=user.pk, is_read=False).count(),
+                'pending_requests': (
+                    ConsultationRequest.objects.filter(consultant_id=user.pk, status='pending').count()
+                    if is_provider else 0
+                ),
+            }
+        if ttl:
+            _cache().set(key, state, ttl)
+    return state
+
+
+def invalidate_navbar(user_id):
+    _cache().delete(_key(user_id))
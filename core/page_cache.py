@@ -0,0 +1,141 @@
+"""ذاكرة الصفحات الكاملة للزوار غير المسجلين مع إبطال بمفاتيح بديلة (surrogate keys).
+
+كل صفحة محفوظة تحمل وسوماً مثل 'consultant:5' و 'ads' و 'faq' و 'category:3'.
+لكل وسم رقم إصدار في ذاكرة 'pages'؛ الإبطال يرفع الإصدار فتصبح كل الصفحات
+الموسومة به قديمة دون الحاجة لتتبع مفاتيحها. الترويسة Surrogate-Key تحمل نفس
+الوسوم ليتمكن CDN أمامي من تخزين الصفحة وإبطالها بالمفتاح ذاته.
+
+الإصدارات في 'pages' فيجب أن تكون مشتركة بين العمال، وإلا لا يرى الإبطالَ إلا العاملُ
+الذي كتب (فحص core.W001 في check --deploy).
+"""
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .db_router import use_primary
+
+# معاملات تتبع لا تغيّر محتوى الصفحة
+IGNORED_PARAMS = {'fbclid', 'gclid', 'ref'}
+# ترويسات داخلية تُحفظ مع المحتوى (عدد نتائج البحث لـ core.search_analytics)
+STORED_HEADERS = ('X-Search-Results',)
+
+
+def _cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def _tag_key(tag):
+    return f'pages:tag:{tag}'
+
+
+def normalized_query(request):
+    """معاملات الاستعلام مرتبة، دون القيم الفارغة ومعاملات التتبع."""
+    params = sorted(
+        (key, value.strip())
+        for key, values in request.GET.lists()
+        if key not in IGNORED_PARAMS and not key.startswith('utm_')
+        for value in values
+        if value.strip()
+    )
+    return urlencode(params)
+
+
+def _page_key(request):
+    raw = f'{request.path}?{normalized_query(request)}'
+    return 'pages:page:v2:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def tag_version(tag):
+    return _cache().get(_tag_key(tag), 0)
+
+
+def _tag_versions(tags):
+    versions = _cache().get_many([_tag_key(tag) for tag in tags])
+    return [versions.get(_tag_key(tag), 0) for tag in tags]
+
+
+def purge(*tags):
+    """يُبطل كل الصفحات الموسومة بأي من tags."""
+    cache = _cache()
+    for tag in tags:
+        key = _tag_key(tag)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+
+
+def _cacheable_request(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        # رسائل معلّقة (مثل "تم تسجيل الخروج") يجب أن تُعرض في صفحة مولّدة للزائر نفسه
+        and not len(get_messages(request))
+    )
+
+
+def _cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        # رمز CSRF مرتبط بكوكي الزائر فلا تُشارك صفحة تحتويه
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def _set_headers(response, tags, timeout):
+    response['Surrogate-Key'] = ' '.join(tags)
+    patch_cache_control(response, public=True, max_age=0, s_maxage=timeout)
+    # المستخدم المسجل يرى صفحة مختلفة بنفس الرابط
+    patch_vary_headers(response, ['Cookie'])
+
+
+def cache_anonymous_page(tags):
+    """يحفظ استجابة الزائر غير المسجل حسب المسار والمعاملات المطبّعة.
+
+    tags: دالة (request, *args, **kwargs) تعيد قائمة الوسوم للصفحة.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = settings.PAGE_CACHE_TIMEOUT
+            if not timeout or not _cacheable_request(request):
+                response = view(request, *args, **kwargs)
+                if request.user.is_authenticated:
+                    patch_cache_control(response, private=True)
+                return response
+
+            page_tags = list(tags(request, *args, **kwargs))
+            key = _page_key(request)
+            cached = _cache().get(key)
+            if cached is not None:
+                content, content_type, versions, headers = cached
+                if versions == _tag_versions(page_tags):
+                    response = HttpResponse(content, content_type=content_type, headers=headers)
+                    response['X-Page-Cache'] = 'hit'
+                    _set_headers(response, page_tags, timeout)
+                    return response
+
+            # الإصدارات تُقرأ قبل التوليد: إبطال أثناء التوليد يُسقط هذه النسخة
+            versions = _tag_versions(page_tags)
+            # نسخة قراءة متأخرة قد تعيد ما قبل الإبطال فيُحفظ قديماً حتى انتهاء المهلة
+            with use_primary():
+                response = view(request, *args, **kwargs)
+            if _cacheable_response(request, response):
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+                headers = {name: response[name] for name in STORED_HEADERS if name in response}
+                _cache().set(key, (response.content, response['Content-Type'], versions, headers), timeout)
+                response['X-Page-Cache'] = 'miss'
+                _set_headers(response, page_tags, timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,149 @@
+"""درجة ترتيب "الأنسب" لكل مستشار، محفوظة في Consultant.rank_score المفهرس.
+
+المكوّنات (كلها بين 0 و 1 قبل الأوزان في settings.RANKING['weights']):
+- rating: متوسط التقييم بعد تنعيم بايزي نحو المتوسط العام (prior_weight تقييمات وهمية)
+- bookings: الحجوزات والاستشارات في آخر booking_window_days يوماً (لوغاريتمياً)
+- response: نسبة الرد على ConsultationRequest مع تنعيم لابلاس
+- availability: قرب أول موعد متاح المحفوظ في next_free_slot_at (تضاؤل أُسّي بنصف عمر slot_half_life_hours)
+
+الحساب كله مصفوفات NumPy فوق نتائج بضعة استعلامات تجميعية، سواء لمستشار
+واحد (تحديث بعد كتابة) أو للجميع (أمر rank_consultants الدوري).
+الحساب الكامل يحفظ أعلى حجم حجوزات ومتوسط التقييم العام في RankingBaseline،
+فيطبّع التحديث الجزئي في أي عامل على نفس المرجع دون مسح جدول التقييمات.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from .db_router import use_primary
+from .models import (
+    ArchivedConsultationRequest, Booking, Consultant, Consultation, ConsultationRequest, RankingBaseline, Review,
+)
+
+BASELINE_PK = 1
+
+
+def _grouped(queryset, field, user_ids, **aggregates):
+    """{provider_id: {اسم: قيمة}} مع تقييد اختياري بمجموعة مستخدمين."""
+    if user_ids is not None:
+        queryset = queryset.filter(**{f'{field}__in': user_ids})
+    return {row.pop(field): row for row in queryset.values(field).annotate(**aggregates).order_by()}
+
+
+def collect_features(consultant_ids=None, now=None):
+    """(pks، مصفوفة ميزات بعمود لكل مكوّن خام) من استعلامات تجميعية فقط."""
+    import numpy as np
+
+    now = now or timezone.now()
+    config = settings.RANKING
+    consultants = Consultant.objects.all()
+    if consultant_ids is not None:
+        consultants = consultants.filter(pk__in=consultant_ids)
+    rows = list(consultants.values_list('pk', 'user_id', 'next_free_slot_at'))
+    user_ids = None if consultant_ids is None else [user_id for _, user_id, _ in rows]
+
+    since = now - timedelta(days=config['booking_window_days'])
+    reviews = _grouped(Review.objects.all(), 'service__provider_id', user_ids, n=Count('id'), total=Sum('rating'))
+    consultations = _grouped(
+        Consultation.objects.filter(created_at__gte=since).exclude(status=Consultation.Status.CANCELLED),
+        'slot__provider_id', user_ids, n=Count('id'),
+    )
+    bookings = _grouped(
+        Booking.objects.filter(created_at__gte=since).exclude(status=Booking.Status.CANCELLED),
+        'service__provider_id', user_ids, n=Count('id'),
+    )
+    requests = _grouped(
+        ConsultationRequest.objects.all(), 'consultant_id', user_ids,
+        n=Count('id'), answered=Count('id', filter=~Q(status='pending')),
+    )
+    # نسبة الرد على كل التاريخ، بما فيه المؤرشف (core.archive)؛ كل المؤرشف مُجاب
+    archived = _grouped(ArchivedConsultationRequest.objects.all(), 'consultant_id', user_ids, n=Count('id'))
+    for user_id, row in archived.items():
+        asked = requests.setdefault(user_id, {'n': 0, 'answered': 0})
+        asked['n'] += row['n']
+        asked['answered'] += row['n']
+
+    features = np.zeros((len(rows), 6))
+    for row, (_, user_id, first_slot) in enumerate(rows):
+        review = reviews.get(user_id, {})
+        asked = requests.get(user_id, {})
+        # موعد منقضٍ لم يُحدَّث بعد (refresh_availability) يُعامل كعدم توفر
+        if first_slot and first_slot < now:
+            first_slot = None
+        features[row] = (
+            review.get('n', 0),
+            review.get('total') or 0,
+            consultations.get(user_id, {}).get('n', 0) + bookings.get(user_id, {}).get('n', 0),
+            asked.get('n', 0),
+            asked.get('answered', 0),
+            (first_slot - now).total_seconds() / 3600 if first_slot else np.nan,
+        )
+    return [pk for pk, _, _ in rows], features
+
+
+def compute_scores(features, global_mean, volume_reference=0):
+    """(scores, متوسط التقييم الخام) لمصفوفة الميزات من collect_features.
+
+    volume_reference: أعلى حجم حجوزات معروف، ليبقى التطبيع ثابتاً عند تحديث مستشار واحد.
+    """
+    import numpy as np
+
+    config = settings.RANKING
+    weights = config['weights']
+    reviews, rating_total, volume, requests, answered, hours = features.T
+
+    prior = config['prior_weight']
+    bayesian = (prior * global_mean + rating_total) / (prior + reviews)
+    raw_rating = np.divide(rating_total, reviews, out=np.zeros_like(rating_total), where=reviews > 0)
+
+    top_volume = max(volume.max() if len(volume) else 0, volume_reference)
+    volume_score = np.log1p(volume) / np.log1p(top_volume) if top_volume else np.zeros_like(volume)
+    response_score = (answered + 1) / (requests + 2)
+    availability = np.where(np.isnan(hours), 0, 0.5 ** (np.nan_to_num(hours) / config['slot_half_life_hours']))
+
+    scores = (
+        weights['rating'] * bayesian / 5
+        + weights['bookings'] * volume_score
+        + weights['response'] * response_score
+        + weights['availability'] * availability
+    )
+    return scores, raw_rating
+
+
+# القيم المحسوبة تُكتب على الرئيسية؛ قراءتها من نسخة متأخرة تثبّت أرقاماً قديمة
+@use_primary()
+def refresh(consultant_ids=None, batch_size=1000, now=None):
+    """يعيد حساب rank_score ويعيد عدد المستشارين المُحدَّثين (rating تحدّثه core.facets).
+
+    consultant_ids=None يعني الجميع، ويحفظ المرجع (RankingBaseline) للتحديثات الجزئية؛
+    تحديث جزئي قبل أول حساب كامل يُجري الحساب الكامل.
+    """
+    if consultant_ids is not None:
+        baseline = RankingBaseline.objects.filter(pk=BASELINE_PK).first()
+        if baseline is None:
+            return refresh(batch_size=batch_size, now=now)
+        reference, global_mean = baseline.volume_reference, baseline.global_mean
+    pks, features = collect_features(consultant_ids, now)
+    if not pks:
+        return 0
+    if consultant_ids is None:
+        reference = 0
+        global_mean = Review.objects.aggregate(mean=Avg('rating'))['mean'] or 0
+        RankingBaseline.objects.update_or_create(pk=BASELINE_PK, defaults={
+            'volume_reference': float(features[:, 2].max()), 'global_mean': global_mean,
+        })
+    scores, _ = compute_scores(features, global_mean, reference)
+    Consultant.objects.bulk_update(
+        [Consultant(pk=pk, rank_score=float(score)) for pk, score in zip(pks, scores)],
+        ['rank_score'],
+        batch_size=batch_size,
+    )
+    return len(pks)
+
+
+def refresh_providers(user_ids):
+    """تحديث جزئي بعد كتابة تمس مقدمي الخدمة user_ids."""
+    consultant_ids = list(Consultant.objects.filter(user_id__in=user_ids).values_list('pk', flat=True))
+    return refresh(consultant_ids) if consultant_ids else 0
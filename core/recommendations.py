@@ -0,0 +1,238 @@
+""""مستشارون مشابهون": أقرب k مستشارين لكل مستشار محفوظين في SimilarConsultant.
+
+التشابه مجموع موزون (settings.RECOMMENDATIONS['weights']) لثلاثة مكوّنات:
+- categories: تشابه جيب التمام بين مجموعتي التخصصات |A∩B| / sqrt(|A||B|)
+- cobooking: تشابه جيب التمام بين مجموعتي العملاء (Consultation و Booking غير الملغاة)
+- rank: rank_score للمرشح بعد التطبيع، لكسر التعادل لصالح الأنسب
+
+بدل مصفوفة n×n كاملة نولّد الأزواج المرشحة فقط كمصفوفات فهارس NumPy
+(تمثيل COO متفرق): أزواج العملاء المشتركين، وأعلى candidates_per_category
+مستشاراً من كل تخصص. الحساب على دفعات من المستشارين المصدر فتبقى الذاكرة
+محدودة، وتُكتب كل دفعة فور حسابها.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import page_cache
+from .models import Booking, Consultant, Consultation, SimilarConsultant
+
+Through = Consultant.categories.through
+
+
+def _join_groups(left_groups, left_members, right_groups, right_members, n_groups):
+    """كل الأزواج (a, b) بحيث a و b في المجموعة نفسها و a != b.
+
+    المجموعات أعداد كثيفة من 0 إلى n_groups-1 والمصفوفة اليمنى مرتبة حسبها.
+    """
+    import numpy as np
+
+    right_sizes = np.bincount(right_groups, minlength=n_groups)
+    right_starts = np.cumsum(right_sizes) - right_sizes
+    reps = right_sizes[left_groups]
+    total = int(reps.sum())
+    left = np.repeat(left_members, reps)
+    offsets = np.arange(total) - np.repeat(np.cumsum(reps) - reps, reps)
+    right = right_members[np.repeat(right_starts[left_groups], reps) + offsets]
+    keep = left != right
+    return left[keep], right[keep]
+
+
+def _dense(values):
+    import numpy as np
+
+    _, inverse = np.unique(values, return_inverse=True)
+    return inverse.astype(np.int64), (int(inverse.max()) + 1 if len(inverse) else 0)
+
+
+def _client_links(user_index, config, now):
+    """(clients, consultants) لأحدث max_consultants_per_client مستشاراً لكل عميل، مرتبة حسب العميل."""
+    import numpy as np
+
+    since = now - timedelta(days=config['booking_window_days'])
+    rows = list(
+        Consultation.objects.filter(created_at__gte=since).exclude(status=Consultation.Status.CANCELLED)
+        .values_list('client_id', 'slot__provider_id', 'created_at').order_by()
+    ) + list(
+        Booking.objects.filter(created_at__gte=since).exclude(status=Booking.Status.CANCELLED)
+        .values_list('client_id', 'service__provider_id', 'created_at').order_by()
+    )
+    empty = np.zeros(0, dtype=np.int64)
+    if not rows:
+        return empty, empty, 0
+    clients = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    providers = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    stamps = np.fromiter((row[2].timestamp() for row in rows), dtype=np.float64, count=len(rows))
+
+    consultants = user_index(providers)
+    known = consultants >= 0
+    if not known.any():
+        return empty, empty, 0
+    clients, consultants, stamps = clients[known], consultants[known], stamps[known]
+    clients, n_clients = _dense(clients)
+
+    # الأحدث أولاً داخل كل عميل، ثم إزالة تكرار (عميل، مستشار)
+    order = np.lexsort((-stamps, clients))
+    clients, consultants = clients[order], consultants[order]
+    pair_keys = clients * (int(consultants.max()) + 1) + consultants
+    _, first = np.unique(pair_keys, return_index=True)
+    first.sort()
+    clients, consultants = clients[first], consultants[first]
+
+    starts = np.searchsorted(clients, clients)
+    keep = np.arange(len(clients)) - starts < config['max_consultants_per_client']
+    return clients[keep], consultants[keep], n_clients
+
+
+def load(now=None):
+    """مصفوفات المدخلات من قاعدة البيانات (بضعة استعلامات values_list)، أو None بلا مستشارين."""
+    import numpy as np
+
+    now = now or timezone.now()
+    config = settings.RECOMMENDATIONS
+    rows = list(Consultant.objects.values_list('pk', 'user_id', 'available', 'rank_score').order_by('pk'))
+    if not rows:
+        return None
+    pks = np.array([row[0] for row in rows], dtype=np.int64)
+    user_ids = np.array([row[1] for row in rows], dtype=np.int64)
+    available = np.array([row[2] for row in rows], dtype=bool)
+    rank = np.array([row[3] for row in rows], dtype=np.float64)
+
+    user_order = np.argsort(user_ids)
+    sorted_users = user_ids[user_order]
+
+    def user_index(values):
+        """فهرس المستشار لكل user_id أو -1."""
+        positions = np.searchsorted(sorted_users, values).clip(max=len(pks) - 1)
+        return np.where(sorted_users[positions] == values, user_order[positions], -1)
+
+    links = np.array(list(Through.objects.values_list('consultant_id', 'servicecategory_id')), dtype=np.int64)
+    links = links.reshape(-1, 2)
+    members = np.searchsorted(pks, links[:, 0])
+    categories, n_categories = _dense(links[:, 1])
+    clients, client_members, n_clients = _client_links(user_index, config, now)
+    return {
+        'pks': pks, 'available': available, 'rank': rank,
+        'members': members, 'categories': categories, 'n_categories': n_categories,
+        'clients': clients, 'client_members': client_members, 'n_clients': n_clients,
+    }
+
+
+def _category_masks(data):
+    """قناع بتات لتخصصات كل مستشار (كلمة uint64 لكل 64 تخصصاً)."""
+    import numpy as np
+
+    words = max((data['n_categories'] + 63) // 64, 1)
+    masks = np.zeros((len(data['pks']), words), dtype=np.uint64)
+    bits = np.left_shift(np.uint64(1), (data['categories'] % 64).astype(np.uint64))
+    np.bitwise_or.at(masks, (data['members'], data['categories'] // 64), bits)
+    return masks
+
+
+def neighbours(data, k=None, chunk_size=20000):
+    """يولّد لكل دفعة مستشارين مصدر: (sources, targets, scores, ranks) كفهارس في data['pks']."""
+    import numpy as np
+
+    config = settings.RECOMMENDATIONS
+    weights = config['weights']
+    k = k or config['k']
+    n = len(data['pks'])
+
+    masks = _category_masks(data)
+    category_sizes = np.bitwise_count(masks).sum(axis=1)
+    top_rank = data['rank'].max()
+    rank_score = data['rank'] / top_rank if top_rank > 0 else np.zeros(n)
+
+    # المرشحون من كل تخصص: أعلى المستشارين المتاحين ترتيباً
+    members, categories = data['members'], data['categories']
+    targets = data['available'][members]
+    order = np.lexsort((-data['rank'][members[targets]], categories[targets]))
+    top_members, top_categories = members[targets][order], categories[targets][order]
+    within = np.arange(len(top_categories)) - np.searchsorted(top_categories, top_categories)
+    top = within < config['candidates_per_category']
+    top_members, top_categories = top_members[top], top_categories[top]
+
+    clients, client_members = data['clients'], data['client_members']
+    client_degree = np.bincount(client_members, minlength=n)
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        in_chunk = (members >= start) & (members < stop)
+        cat_left, cat_right = _join_groups(
+            categories[in_chunk], members[in_chunk], top_categories, top_members, data['n_categories']
+        )
+        in_chunk = (client_members >= start) & (client_members < stop)
+        co_left, co_right = _join_groups(
+            clients[in_chunk], client_members[in_chunk], clients, client_members, data['n_clients']
+        )
+
+        # عدد العملاء المشتركين لكل زوج = تكرار الزوج
+        co_keys, shared = np.unique(co_left * n + co_right, return_counts=True)
+        keys = np.union1d(co_keys, cat_left * n + cat_right)
+        sources, candidates = keys // n, keys % n
+        keep = data['available'][candidates]
+        keys, sources, candidates = keys[keep], sources[keep], candidates[keep]
+        if not len(keys):
+            continue
+
+        cobooking = np.zeros(len(keys))
+        positions = np.searchsorted(co_keys, keys).clip(max=max(len(co_keys) - 1, 0))
+        if len(co_keys):
+            found = co_keys[positions] == keys
+            cobooking[found] = shared[positions[found]] / np.sqrt(
+                client_degree[sources[found]] * client_degree[candidates[found]]
+            )
+
+        common = np.bitwise_count(masks[sources] & masks[candidates]).sum(axis=1)
+        denominator = np.sqrt(category_sizes[sources] * category_sizes[candidates])
+        category = np.divide(common, denominator, out=np.zeros(len(keys)), where=denominator > 0)
+
+        scores = (
+            weights['categories'] * category
+            + weights['cobooking'] * cobooking
+            + weights['rank'] * rank_score[candidates]
+        )
+        order = np.lexsort((-scores, sources))
+        sources, candidates, scores = sources[order], candidates[order], scores[order]
+        ranks = np.arange(len(sources)) - np.searchsorted(sources, sources)
+        best = ranks < k
+        yield sources[best], candidates[best], scores[best], ranks[best]
+
+
+def rebuild(k=None, chunk_size=20000, batch_size=5000, now=None):
+    """إعادة بناء الجدول كاملاً داخل معاملة واحدة؛ يعيد (عدد الصفوف، التوقيتات)."""
+    timings = {}
+    started = time.perf_counter()
+    data = load(now)
+    timings['load'] = time.perf_counter() - started
+
+    rows = 0
+    compute = write = 0.0
+    with transaction.atomic():
+        SimilarConsultant.objects.all().delete()
+        pks = data['pks'] if data else []
+        mark = time.perf_counter()
+        for sources, targets, scores, ranks in (neighbours(data, k, chunk_size) if data else ()):
+            compute += time.perf_counter() - mark
+            mark = time.perf_counter()
+            SimilarConsultant.objects.bulk_create(
+                [
+                    SimilarConsultant(
+                        consultant_id=int(pks[source]), similar_id=int(pks[target]),
+                        rank=int(rank), score=round(float(score), 4),
+                    )
+                    for source, target, score, rank in zip(sources, targets, scores, ranks)
+                ],
+                batch_size=batch_size,
+            )
+            rows += len(sources)
+            write += time.perf_counter() - mark
+            mark = time.perf_counter()
+        compute += time.perf_counter() - mark
+        transaction.on_commit(lambda: page_cache.purge('recommendations'))
+    timings['compute'] = compute
+    timings['write'] = write
+    return rows, timings
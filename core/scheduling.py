@@ -0,0 +1,139 @@
+"""توليد مواعيد ConsultationSlot من ساعات العمل المحفوظة.
+
+تُمثَّل كل فترة عمل في الأفق الزمني بدقائق منذ بداية الأفق، ثم تُقطَّع إلى
+مواعيد بعمليات مصفوفات (NumPy) بدل حلقات بايثون لكل موعد، وتُستبعد المواعيد
+الماضية والمتعارضة مع مواعيد موجودة قبل bulk_create.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from . import availability, page_cache
+from .models import Consultant, ConsultationSlot
+
+WORKING_HOURS_FORMAT = '%H:%M'
+
+
+def parse_intervals(value):
+    """'09:00 - 12:00, 14:00 - 18:00' -> [(time(9), time(12)), (time(14), time(18))]"""
+    intervals = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition('-')
+        if not sep:
+            raise ValueError(part)
+        start = datetime.strptime(start.strip(), WORKING_HOURS_FORMAT).time()
+        end = datetime.strptime(end.strip(), WORKING_HOURS_FORMAT).time()
+        if start >= end:
+            raise ValueError(part)
+        intervals.append((start, end))
+    return intervals
+
+
+def format_intervals(intervals):
+    return ', '.join(f'{start:%H:%M} - {end:%H:%M}' for start, end in intervals)
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _day_intervals(consultant, horizon_dates):
+    """(فهرس اليوم، بداية بالدقائق، نهاية بالدقائق) لكل فترة عمل في الأفق"""
+    import numpy as np
+
+    weekly = {}
+    for hours in consultant.working_hours.all():
+        weekly.setdefault(hours.weekday, []).append((_minutes(hours.start_time), _minutes(hours.end_time)))
+    exceptions = {}
+    for exception in consultant.working_hours_exceptions.all():
+        day = exceptions.setdefault(exception.date, [])
+        if not exception.is_day_off:
+            day.append((_minutes(exception.start_time), _minutes(exception.end_time)))
+
+    rows = []
+    for index, day in enumerate(horizon_dates):
+        intervals = exceptions[day] if day in exceptions else weekly.get(day.weekday(), [])
+        rows.extend((index, start, end) for start, end in intervals)
+    return np.array(rows, dtype=np.int64).reshape(-1, 3)
+
+
+def expand_slots(consultant, start_date, days, existing=(), now=None):
+    """قائمة (start, end) للمواعيد الجديدة لمستشار خلال الأفق.
+
+    existing: فترات المواعيد الموجودة (datetime, datetime) لتجنب التعارض.
+    """
+    # NumPy يُستورد عند التوليد فقط، لا عند إقلاع كل عامل (core.forms يستورد هذه الوحدة)
+    import numpy as np
+
+    now = now or timezone.now()
+    duration = consultant.session_duration or 60
+    tz = timezone.get_current_timezone()
+    horizon_dates = [start_date + timedelta(days=i) for i in range(days)]
+    midnights = [timezone.make_aware(datetime.combine(day, time.min), tz) for day in horizon_dates]
+
+    intervals = _day_intervals(consultant, horizon_dates)
+    if not len(intervals):
+        return []
+
+    # عدد المواعيد في كل فترة، ثم بدايات كل المواعيد دفعة واحدة
+    counts = (intervals[:, 2] - intervals[:, 1]) // duration
+    keep = counts > 0
+    intervals, counts = intervals[keep], counts[keep]
+    total = int(counts.sum())
+    if not total:
+        return []
+    first_index = np.repeat(np.cumsum(counts) - counts, counts)
+    day_index = np.repeat(intervals[:, 0], counts)
+    minute = np.repeat(intervals[:, 1], counts) + (np.arange(total) - first_index) * duration
+
+    # دقائق Unix لمقارنة الماضي والتعارضات كمصفوفات
+    midnight_epoch = np.array([int(m.timestamp()) // 60 for m in midnights], dtype=np.int64)
+    starts = midnight_epoch[day_index] + minute
+    ends = starts + duration
+
+    mask = starts >= int(now.timestamp()) // 60
+    if existing:
+        existing = np.array(
+            [(int(s.timestamp()) // 60, int(e.timestamp()) // 60) for s, e in existing],
+            dtype=np.int64,
+        )
+        overlaps = (starts[:, None] < existing[None, :, 1]) & (ends[:, None] > existing[None, :, 0])
+        mask &= ~overlaps.any(axis=1)
+
+    return [
+        (midnights[d] + timedelta(minutes=int(m)), midnights[d] + timedelta(minutes=int(m) + duration))
+        for d, m in zip(day_index[mask], minute[mask])
+    ]
+
+
+def generate_slots(consultants, days=28, start_date=None, now=None, batch_size=1000):
+    """يُكمل تقويم كل مستشار حتى days يوماً قادمة ويعيد عدد المواعيد المُنشأة."""
+    now = now or timezone.now()
+    start_date = start_date or timezone.localdate(now)
+    horizon_end = timezone.make_aware(
+        datetime.combine(start_date + timedelta(days=days), time.min), timezone.get_current_timezone()
+    )
+    consultants = list(consultants)
+    existing = {}
+    for provider_id, start, end in ConsultationSlot.objects.filter(
+        provider_id__in=[c.user_id for c in consultants],
+        end_time__gt=now,
+        start_time__lt=horizon_end,
+    ).values_list('provider_id', 'start_time', 'end_time'):
+        existing.setdefault(provider_id, []).append((start, end))
+
+    new_slots = []
+    for consultant in consultants:
+        for start, end in expand_slots(consultant, start_date, days, existing.get(consultant.user_id, ()), now):
+            new_slots.append(ConsultationSlot(provider_id=consultant.user_id, start_time=start, end_time=end))
+    ConsultationSlot.objects.bulk_create(new_slots, batch_size=batch_size)
+    # bulk_create لا يُطلق post_save
+    providers = {slot.provider_id for slot in new_slots}
+    changed = [c.pk for c in consultants if c.user_id in providers]
+    availability.refresh(providers, now=now)
+    Consultant.objects.filter(pk__in=changed).update(updated_at=now)
+    page_cache.purge(*(f'consultant:{pk}' for pk in changed))
+    return len(new_slots)
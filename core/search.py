@@ -0,0 +1,89 @@
+"""بحث الخدمات بالعنوان والوصف مرتباً بالتشابه.
+
+على PostgreSQL مع pg_trgm: المطابقة الجزئية (icontains) أو التشابه التقريبي
+(المعامل % لأخطاء الإملاء) تستخدم فهارس GIN على UPPER(title/description) من
+الترحيل 0014، والترتيب بـ similarity للعنوان و word_similarity للوصف.
+على قواعد أخرى (SQLite محلياً): icontains فقط، مطابقة العنوان أولاً.
+
+حد المعامل % يُضبط بـ trigram_threshold لمعاملة واحدة؛ تقييم الاستعلام يتم داخلها.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Upper
+
+from .models import Service
+
+DESCRIPTION_WEIGHT = 0.5
+
+
+def trigram_available(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'postgresql' and 'django.contrib.postgres' in settings.INSTALLED_APPS
+
+
+@contextmanager
+def trigram_threshold(using=DEFAULT_DB_ALIAS):
+    """SEARCH_TRIGRAM_THRESHOLD حداً للمعامل % في الاستعلامات المنفذة داخله على using.
+
+    is_local=true يحصر القيمة في المعاملة، فلا تبقى على اتصال دائم أو من المجمّع
+    وتصل إلى استعلامات % أخرى بعده.
+    """
+    if not trigram_available(using):
+        yield
+        return
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+                [str(settings.SEARCH_TRIGRAM_THRESHOLD)],
+            )
+        yield
+
+
+def search_services(query, queryset=None):
+    """استعلام الخدمات المطابقة لـ query مع حقل rank للترتيب.
+
+    يُقيَّم داخل trigram_threshold(results.db) ليسري الحد المضبوط.
+    """
+    queryset = (queryset if queryset is not None else Service.objects.filter(is_active=True)).select_related(
+        'provider', 'category'
+    )
+    query = query.strip()
+    if not query:
+        return queryset.none()
+
+    # الموجّه يختار نسخة قراءة عند كل سؤال؛ يُثبَّت الاستعلام على اتصال واحد
+    # ليضبط trigram_threshold(results.db) الحد على الاتصال الذي سينفذه فعلاً
+    using = queryset.db
+    queryset = queryset.using(using)
+    if trigram_available(using):
+        from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+
+        term = query.upper()
+        return (
+            queryset
+            .annotate(title_upper=Upper('title'), description_upper=Upper('description'))
+            .filter(
+                Q(title__icontains=query)
+                | Q(description__icontains=query)
+                | Q(title_upper__trigram_similar=term)
+            )
+            .annotate(rank=(
+                TrigramSimilarity('title_upper', term)
+                + Value(DESCRIPTION_WEIGHT) * TrigramWordSimilarity(term, 'description_upper')
+            ))
+            .order_by('-rank', 'pk')
+        )
+
+    return (
+        queryset
+        .filter(Q(title__icontains=query) | Q(description__icontains=query))
+        .annotate(rank=Case(
+            When(title__icontains=query, then=Value(1.0)),
+            default=Value(DESCRIPTION_WEIGHT),
+            output_field=FloatField(),
+        ))
+        .order_by('-rank', 'pk')
+    )
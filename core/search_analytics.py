@@ -0,0 +1,226 @@
+"""إحصاءات استعلامات البحث (تصفح المستشارين والإكمال التلقائي) دون كتابة لكل طلب.
+
+كل عملية تجمع العدّادات في ذاكرتها (SearchBuffer) لكل (مصدر، استعلام مطبّع، يوم)،
+ويُفرغها خيط خلفي كـ upsert مجمّع (INSERT ... ON CONFLICT DO UPDATE بالجمع) كل
+flush_interval ثانية أو فور بلوغ max_keys مفتاحاً، وتُفرغ الباقي عند خروج العملية
+(atexit: الإيقاف العادي لـ gunicorn و runserver). الجمع في قاعدة البيانات يجعل
+الإفراغ من عدة عمليات في الوقت نفسه آمناً، ولا يكتب الطلب نفسه شيئاً.
+الإكمال التلقائي لا يُسجَّل لكل حرف: يُحسب بحثاً واحداً عند اختيار نتيجة (search_click).
+"""
+import atexit
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .faq_index import normalize
+from .models import Consultant, SearchClickStat, SearchQueryStat
+
+logger = logging.getLogger(__name__)
+
+SOURCES = frozenset(source for source, _ in SearchQueryStat.SOURCE_CHOICES)
+MAX_QUERY_LENGTH = SearchQueryStat._meta.get_field('query').max_length
+# عدد النتائج يمرره العرض في هذه الترويسة (وتحفظها core.page_cache مع الصفحة)
+RESULTS_HEADER = 'X-Search-Results'
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_query(query):
+    """نفس تطبيع بحث الأسئلة الشائعة (تشكيل، همزات، حالة الأحرف) مع توحيد المسافات."""
+    return _SPACES.sub(' ', normalize(query or '')).strip()[:MAX_QUERY_LENGTH]
+
+
+def _upsert(model, key_fields, rows):
+    """rows: [(قيم المفتاح..., قيم العدّادات...)]؛ العدّادات تُضاف للقيم الموجودة."""
+    counters = [
+        field.column for field in model._meta.concrete_fields
+        if field.column not in key_fields and not field.primary_key
+    ]
+    columns = list(key_fields) + counters
+    quote = connection.ops.quote_name
+    sql = (
+        f'INSERT INTO {quote(model._meta.db_table)} ({", ".join(map(quote, columns))}) '
+        f'VALUES ({", ".join(["%s"] * len(columns))}) '
+        f'ON CONFLICT ({", ".join(map(quote, key_fields))}) DO UPDATE SET '
+        + ', '.join(f'{quote(c)} = {quote(model._meta.db_table)}.{quote(c)} + EXCLUDED.{quote(c)}' for c in counters)
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def _day(day):
+    return connection.ops.adapt_datefield_value(day)
+
+
+class SearchBuffer:
+    def __init__(self, flush_interval, max_keys):
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # (source, query, day) -> [searches, zero_results, clicks]
+        self._queries = {}
+        # (source, query, day, consultant_id) -> clicks
+        self._clicks = Counter()
+        self._pid = None
+        self._full = threading.Event()
+
+    def _ensure_worker(self):
+        # خيط لكل عملية: عمليات gunicorn المتفرعة لا ترث خيوط الأب
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='search-analytics-flush', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._full.wait(self.flush_interval)
+            self._full.clear()
+            try:
+                self.flush()
+            finally:
+                # هذا الخيط لا يمر بدورة الطلب التي تغلق الاتصال
+                connection.close()
+
+    def _add(self, key, searches=0, zero_results=0, clicks=0):
+        counters = self._queries.setdefault(key, [0, 0, 0])
+        counters[0] += searches
+        counters[1] += zero_results
+        counters[2] += clicks
+
+    def record_search(self, source, query, results):
+        query = normalize_query(query)
+        if not query:
+            return
+        with self._lock:
+            self._add((source, query, timezone.localdate()), searches=1, zero_results=int(results == 0))
+            full = len(self._queries) >= self.max_keys
+        self._after_record(full)
+
+    def record_click(self, source, query, consultant_id):
+        query = normalize_query(query)
+        if not query:
+            return
+        day = timezone.localdate()
+        with self._lock:
+            self._add((source, query, day), clicks=1)
+            self._clicks[(source, query, day, consultant_id)] += 1
+            full = len(self._queries) + len(self._clicks) >= self.max_keys
+        self._after_record(full)
+
+    def _after_record(self, full):
+        self._ensure_worker()
+        if full:
+            self._full.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._queries), len(self._clicks)
+
+    def flush(self):
+        """يكتب ما تجمّع ويعيد عدد المفاتيح؛ عند الفشل تُعاد العدّادات للمخزن."""
+        with self._flush_lock:
+            with self._lock:
+                queries, self._queries = self._queries, {}
+                clicks, self._clicks = self._clicks, Counter()
+            if not queries and not clicks:
+                return 0
+            try:
+                if clicks:
+                    # مستشار حُذف بعد النقر يُسقط الدفعة كلها بخطأ المفتاح الأجنبي
+                    existing = set(Consultant.objects.filter(
+                        pk__in={key[3] for key in clicks}
+                    ).values_list('pk', flat=True))
+                    clicks = Counter({key: n for key, n in clicks.items() if key[3] in existing})
+                with transaction.atomic():
+                    _upsert(
+                        SearchQueryStat, ('source', 'query', 'day'),
+                        [(source, query, _day(day), *counters) for (source, query, day), counters in queries.items()],
+                    )
+                    if clicks:
+                        _upsert(
+                            SearchClickStat, ('source', 'query', 'day', 'consultant_id'),
+                            [
+                                (source, query, _day(day), consultant_id, n)
+                                for (source, query, day, consultant_id), n in clicks.items()
+                            ],
+                        )
+            except Exception:
+                logger.exception('تعذّر حفظ إحصاءات البحث؛ ستُعاد المحاولة في الإفراغ التالي')
+                with self._lock:
+                    for key, (searches, zero_results, n) in queries.items():
+                        self._add(key, searches, zero_results, n)
+                    self._clicks.update(clicks)
+                return 0
+            return len(queries) + len(clicks)
+
+
+buffer = SearchBuffer(
+    flush_interval=settings.SEARCH_ANALYTICS['flush_interval'],
+    max_keys=settings.SEARCH_ANALYTICS['max_keys'],
+)
+atexit.register(buffer.flush)
+
+
+def record_search(source, query, results):
+    if settings.SEARCH_ANALYTICS['enabled']:
+        buffer.record_search(source, query, results)
+
+
+def record_click(source, query, consultant_id):
+    if settings.SEARCH_ANALYTICS['enabled']:
+        buffer.record_click(source, query, consultant_id)
+
+
+def track_search(source, param='q'):
+    """يسجل استعلام الصفحة الأولى من النتائج بعد الاستجابة، حتى لو جاءت من ذاكرة الصفحات.
+
+    يوضع فوق cache_anonymous_page؛ العرض يضع RESULTS_HEADER وهنا تُزال قبل الإرسال.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if RESULTS_HEADER not in response:
+                return response
+            results = int(response[RESULTS_HEADER])
+            del response[RESULTS_HEADER]
+            if request.GET.get('page', '1') in ('', '1'):
+                record_search(source, request.GET.get(param, ''), results)
+            return response
+        return wrapper
+    return decorator
+
+
+def report(days=30, limit=50, min_searches=3):
+    """(الأكثر بحثاً، الاستعلامات الفاشلة، الأكثر نقراً) لآخر days يوماً."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    totals = (
+        SearchQueryStat.objects.filter(day__gte=since)
+        .values('source', 'query')
+        .annotate(total=Sum('searches'), empty=Sum('zero_results'), clicked=Sum('clicks'))
+        .order_by()
+    )
+    top = list(totals.filter(total__gt=0).order_by('-total', 'query')[:limit])
+    # غالباً بلا نتائج، أو بنتائج لا ينقر عليها أحد
+    failing = list(
+        totals.filter(total__gte=min_searches)
+        .annotate(failure=F('empty') * 1.0 / F('total'))
+        .filter(Q(failure__gte=0.5) | Q(clicked=0))
+        .order_by('-failure', '-total')[:limit]
+    )
+    clicks = list(
+        SearchClickStat.objects.filter(day__gte=since)
+        .values('source', 'query', 'consultant_id', 'consultant__user__full_name')
+        .annotate(total=Sum('clicks'))
+        .order_by('-total')[:limit]
+    )
+    return top, failing, clicks
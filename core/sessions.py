@@ -0,0 +1,27 @@
+"""محرك جلسات موقّعة في الكوكي مع ترحيل الجلسات القائمة من قاعدة البيانات.
+
+عند التحويل من الجلسات المخزنة في django_session إلى signed_cookies لا يُسجَّل
+خروج أحد: أول طلب يحمل مفتاح جلسة قديماً تُقرأ بياناته من قاعدة البيانات مرة
+واحدة وتُعاد كتابتها ككوكي موقّع، ثم يُحذف صفها فلا يعود المفتاح القديم صالحاً
+(بعد تسجيل الخروج مثلاً).
+"""
+import re
+
+from django.contrib.sessions.backends import db, signed_cookies
+
+# مفاتيح SessionStore في قاعدة البيانات: 32 حرفاً صغيراً/رقماً، بلا ':' كالقيم الموقّعة
+LEGACY_KEY_RE = re.compile(r'^[a-z0-9]{32}$')
+
+
+class SessionStore(signed_cookies.SessionStore):
+    def load(self):
+        key = self.session_key
+        if key and LEGACY_KEY_RE.match(key):
+            legacy = db.SessionStore(key)
+            data = legacy.load()
+            if data:
+                legacy.delete(key)
+                # يُعاد توليد الكوكي الموقّع في نهاية الطلب
+                self.modified = True
+                return data
+        return super().load()
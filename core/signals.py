@@ -0,0 +1,227 @@
+from django.db.models.signals import m2m_changed, post_init, post_save, post_delete, pre_delete
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import availability, facets, page_cache, ranking
+from .backends import invalidate_cached_user
+from .models import (
+    User, Profile, Consultant, LoginThrottlePolicy, ServiceCategory,
+    Service, ConsultationSlot, Review, Advertisement, FAQ,
+    Notification, ConsultationRequest, Consultation, Booking,
+    ArchivedBooking, ArchivedConsultation, ArchivedConsultationRequest, ArchivedConsultationSlot,
+)
+from .navbar import invalidate_navbar
+from .throttling import clear_policy
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+@receiver([post_save, post_delete], sender=Consultant)
+def user_relation_changed(sender, instance, **kwargs):
+    # get_user يحمّل profile و consultant مع المستخدم
+    invalidate_cached_user(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=LoginThrottlePolicy)
+def throttle_policy_changed(sender, instance, **kwargs):
+    clear_policy(instance.scope)
+
+
+# ---- إبطال ذاكرة الصفحات (core.page_cache) ---- #
+def _purge_provider(user_id):
+    consultant_id = Consultant.objects.filter(user_id=user_id).values_list('pk', flat=True).first()
+    if consultant_id is not None:
+        # مُدقّق صفحة المستشار (core.conditional) يعتمد على updated_at
+        Consultant.objects.filter(pk=consultant_id).update(updated_at=timezone.now())
+        page_cache.purge(f'consultant:{consultant_id}', 'consultants')
+
+
+@receiver([post_save, post_delete], sender=Consultant)
+def consultant_page_changed(sender, instance, **kwargs):
+    page_cache.purge(f'consultant:{instance.pk}', 'consultants')
+
+
+@receiver(m2m_changed, sender=Consultant.categories.through)
+def consultant_categories_changed(sender, instance, action, pk_set, **kwargs):
+    _update_facet_counts(instance, action, pk_set)
+    if not action.startswith('post_'):
+        return
+    tags = ['categories', 'consultants']
+    if isinstance(instance, Consultant):
+        Consultant.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+        tags.append(f'consultant:{instance.pk}')
+        tags.extend(f'category:{pk}' for pk in pk_set or ())
+    else:
+        tags.append(f'category:{instance.pk}')
+    page_cache.purge(*tags)
+
+
+@receiver([post_save, post_delete], sender=ServiceCategory)
+def category_page_changed(sender, instance, **kwargs):
+    page_cache.purge(f'category:{instance.pk}', 'categories')
+
+
+# حقول لا تظهر في أي صفحة؛ update_last_login يحفظ last_login وحده عند كل دخول
+PAGE_IRRELEVANT_USER_FIELDS = frozenset({'last_login'})
+
+
+def _irrelevant_save(update_fields):
+    return update_fields is not None and update_fields <= PAGE_IRRELEVANT_USER_FIELDS
+
+
+@receiver([post_save, post_delete], sender=User)
+def provider_user_changed(sender, instance, **kwargs):
+    if _irrelevant_save(kwargs.get('update_fields')):
+        return
+    if instance.role == User.Role.PROVIDER:
+        _purge_provider(instance.pk)
+
+
+# ConsultationSlot و Review يُبطلان بعد إعادة الترتيب (_rerank)
+@receiver([post_save, post_delete], sender=Profile)
+@receiver([post_save, post_delete], sender=Service)
+def provider_content_changed(sender, instance, **kwargs):
+    _purge_provider(instance.user_id if sender is Profile else instance.provider_id)
+
+
+@receiver([post_save, post_delete], sender=Advertisement)
+def ads_changed(sender, instance, **kwargs):
+    page_cache.purge('ads')
+
+
+@receiver([post_save, post_delete], sender=FAQ)
+def faq_changed(sender, instance, **kwargs):
+    page_cache.purge('faq')
+
+
+# ---- أعداد شريط التنقل (core.navbar) ---- #
+@receiver([post_save, post_delete], sender=User)
+def user_navbar_changed(sender, instance, **kwargs):
+    if _irrelevant_save(kwargs.get('update_fields')):
+        return
+    # اللقطة تحفظ الدور (switch_role، لوحة الإدارة)
+    invalidate_navbar(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def notification_changed(sender, instance, **kwargs):
+    invalidate_navbar(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=ConsultationRequest)
+def consultation_request_changed(sender, instance, **kwargs):
+    invalidate_navbar(instance.consultant_id)
+
+
+# ---- أعداد التخصصات والتقييم (core.facets) ---- #
+@receiver([post_save, post_delete], sender=Review)
+def review_rating_changed(sender, instance, **kwargs):
+    provider_id = Service.objects.filter(pk=instance.service_id).values_list('provider_id', flat=True).first()
+    if provider_id is not None:
+        facets.refresh_ratings([provider_id])
+
+
+def _update_facet_counts(instance, action, pk_set):
+    if isinstance(instance, Consultant):
+        if action == 'pre_remove':
+            # pk_set قد يحتوي تخصصات غير مرتبطة أصلاً
+            instance._facet_removed = set(
+                _category_links(instance).filter(servicecategory_id__in=pk_set).values_list('servicecategory_id', flat=True)
+            )
+        elif action == 'pre_clear':
+            instance._facet_removed = set(_category_links(instance).values_list('servicecategory_id', flat=True))
+        elif not instance.available:
+            return
+        elif action == 'post_add':
+            facets.adjust_counts({pk: 1 for pk in pk_set})
+        elif action in ('post_remove', 'post_clear'):
+            facets.adjust_counts({pk: -1 for pk in getattr(instance, '_facet_removed', ())})
+    elif action.startswith('post_'):
+        # من جهة التخصص: إعادة حساب هذا التخصص وحده
+        facets.recount([instance.pk])
+
+
+def _category_links(consultant):
+    return Consultant.categories.through.objects.filter(consultant_id=consultant.pk)
+
+
+@receiver(post_init, sender=Consultant)
+def remember_availability(sender, instance, **kwargs):
+    instance._loaded_available = instance.available
+
+
+@receiver(post_save, sender=Consultant)
+def availability_changed(sender, instance, created, **kwargs):
+    if not created and instance.available != instance._loaded_available:
+        delta = 1 if instance.available else -1
+        facets.adjust_counts({pk: delta for pk in _category_links(instance).values_list('servicecategory_id', flat=True)})
+    instance._loaded_available = instance.available
+
+
+@receiver(pre_delete, sender=Consultant)
+def consultant_deleted(sender, instance, **kwargs):
+    # حذف صفوف الربط بالتتابع لا يُطلق m2m_changed
+    if instance.available:
+        facets.adjust_counts({pk: -1 for pk in _category_links(instance).values_list('servicecategory_id', flat=True)})
+
+
+# ---- أقرب موعد متاح (core.availability) ---- #
+@receiver([post_save, post_delete], sender=ConsultationSlot)
+def slot_availability_changed(sender, instance, **kwargs):
+    # إنشاء، حجز (is_booked)، إلغاء أو حذف موعد
+    availability.refresh([instance.provider_id])
+
+
+# ---- درجة الترتيب (core.ranking) ---- #
+def _rerank(user_id):
+    if user_id is None:
+        return
+
+    def refresh():
+        # الإبطال بعد كتابة rank_score، وإلا قد تُخزَّن الصفحات بالترتيب القديم بينهما
+        ranking.refresh_providers([user_id])
+        _purge_provider(user_id)
+
+    transaction.on_commit(refresh)
+
+
+@receiver([post_save, post_delete], sender=ConsultationSlot)
+def slot_ranking_changed(sender, instance, **kwargs):
+    _rerank(instance.provider_id)
+
+
+@receiver([post_save, post_delete], sender=ConsultationRequest)
+def request_ranking_changed(sender, instance, **kwargs):
+    _rerank(instance.consultant_id)
+
+
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=Booking)
+def service_ranking_changed(sender, instance, **kwargs):
+    _rerank(Service.objects.filter(pk=instance.service_id).values_list('provider_id', flat=True).first())
+
+
+@receiver([post_save, post_delete], sender=Consultation)
+def consultation_ranking_changed(sender, instance, **kwargs):
+    _rerank(ConsultationSlot.objects.filter(pk=instance.slot_id).values_list('provider_id', flat=True).first())
+
+
+# ---- الأرشيف (core.archive): جداوله بلا قيود مفاتيح، فالحذف بالتتابع هنا ---- #
+@receiver(pre_delete, sender=User)
+def user_archive_deleted(sender, instance, **kwargs):
+    ArchivedConsultationRequest.objects.filter(Q(client=instance) | Q(consultant=instance)).delete()
+    ArchivedBooking.objects.filter(client=instance).delete()
+    ArchivedConsultation.objects.filter(Q(client=instance) | Q(provider=instance)).delete()
+    ArchivedConsultationSlot.objects.filter(provider=instance).delete()
+
+
+@receiver(pre_delete, sender=Service)
+def service_archive_deleted(sender, instance, **kwargs):
+    ArchivedBooking.objects.filter(service=instance).delete()
+    ArchivedConsultation.objects.filter(service=instance).delete()
@@ -0,0 +1,78 @@
+"""قياس زمن الإقلاع البارد في عملية بايثون جديدة.
+
+يستخدمه أمر bench_startup واختبار الميزانية في core/tests.py.
+"""
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+# ما يفعله عامل gunicorn قبل أول طلب: تحميل تطبيق WSGI ثم جدول الروابط (يستورد views و forms)
+WSGI_BOOT = (
+    'import rafikni.wsgi\n'
+    'from django.urls import get_resolver\n'
+    'get_resolver().url_patterns\n'
+)
+
+# حزم ثقيلة يجب ألا تُستورد عند الإقلاع، بل عند أول استخدام فقط
+DEFERRED_MODULES = ('numpy', 'cloudinary', 'PIL', 'pypdf')
+
+
+def _run(args, env=None):
+    started = time.perf_counter()
+    result = subprocess.run(
+        args, cwd=settings.BASE_DIR, env=env or os.environ.copy(),
+        capture_output=True, text=True,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return elapsed, result
+
+
+def wsgi_import_ms():
+    """زمن استيراد التطبيق داخل العملية الجديدة (دون زمن إقلاع المفسّر نفسه)."""
+    code = (
+        'import time\n'
+        't = time.perf_counter()\n'
+        f'{WSGI_BOOT}'
+        'print((time.perf_counter() - t) * 1000)\n'
+    )
+    _, result = _run([sys.executable, '-c', code])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def manage_check_ms():
+    """زمن `manage.py check` كاملاً كما يراه من يشغّل الأمر."""
+    elapsed, _ = _run([sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'check'])
+    return elapsed
+
+
+def loaded_deferred_modules():
+    """الحزم المؤجلة التي استُوردت رغم ذلك أثناء الإقلاع."""
+    code = (
+        f'{WSGI_BOOT}'
+        'import sys\n'
+        f'print(",".join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n'
+    )
+    _, result = _run([sys.executable, '-c', code])
+    output = result.stdout.strip().splitlines()
+    return [name for name in (output[-1] if output else '').split(',') if name]
+
+
+def import_profile(limit=20):
+    """أثقل الوحدات حسب الزمن التراكمي من مخرجات `-X importtime` (بالميلي ثانية)."""
+    _, result = _run([sys.executable, '-X', 'importtime', '-c', WSGI_BOOT])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        if not self_us.strip().isdigit():
+            continue  # سطر العناوين
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:limit]
@@ -0,0 +1,88 @@
+"""تخزين محلي يحاكي MediaCloudinaryStorage للتطوير والقياس دون اتصال.
+
+يحاكي سلوك Cloudinary الظاهر للتطبيق: أسماء فريدة عند الرفع (unique_filename)،
+عدم إعادة تسمية الموجود، روابط التحويلات (variants)، وزمن الشبكة عند
+العمليات التي تتطلب طلباً فعلياً (رفع، تنزيل، حذف، exists، size).
+"""
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def _transformation(width=None, height=None, crop=None, quality=None, fmt=None):
+    """سلسلة التحويل بصيغة Cloudinary، مثل w_200,h_200,c_fill"""
+    parts = []
+    if width:
+        parts.append(f'w_{width}')
+    if height:
+        parts.append(f'h_{height}')
+    if crop:
+        parts.append(f'c_{crop}')
+    if quality:
+        parts.append(f'q_{quality}')
+    if fmt:
+        parts.append(f'f_{fmt}')
+    return ','.join(parts)
+
+
+@deconstructible
+class LocalMediaStorage(FileSystemStorage):
+    def __init__(self, location=None, base_url=None, latency_ms=0, unique_filename=True, **kwargs):
+        # Cloudinary يكتب فوق الموجود ولا يعيد التسمية؛ التفرد يأتي من اللاحقة العشوائية
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(location=location, base_url=base_url, **kwargs)
+        self.latency_ms = latency_ms
+        self.unique_filename = unique_filename
+
+    def _network(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def _save(self, name, content):
+        self._network()
+        if self.unique_filename:
+            root, ext = os.path.splitext(name)
+            name = f'{root}_{uuid.uuid4().hex[:6]}{ext}'
+        return super()._save(name, content)
+
+    def _open(self, name, mode='rb'):
+        self._network()
+        return super()._open(name, mode)
+
+    def delete(self, name):
+        self._network()
+        return super().delete(name)
+
+    def exists(self, name):
+        self._network()
+        return super().exists(name)
+
+    def size(self, name):
+        self._network()
+        return super().size(name)
+
+    def variant_url(self, name, **options):
+        # لا تحويل فعلي محلياً؛ نُبقي شكل الرابط ليُختبر القالب كما في الإنتاج
+        transformation = _transformation(**options)
+        url = self.url(name)
+        return f'{url}?tr={transformation}' if transformation else url
+
+
+def variant_url(field_file, **options):
+    """رابط نسخة محوّلة من صورة (w/h/crop/quality/fmt) أياً كان التخزين."""
+    if not field_file:
+        return ''
+    storage = field_file.storage
+    if hasattr(storage, 'variant_url'):
+        return storage.variant_url(field_file.name, **options)
+    if settings.MEDIA_STORAGE == 'cloudinary':
+        import cloudinary
+
+        resource = cloudinary.CloudinaryResource(field_file.name)
+        return resource.build_url(raw_transformation=_transformation(**options))
+    # FileSystemStorage: الأصل كما هو
+    return field_file.url
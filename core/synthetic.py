@@ -0,0 +1,348 @@
+"""بيانات اصطناعية حتمية بحجم قابل للضبط لاختبارات الأداء وخطط الاستعلام.
+
+- المعرّفات تُحسب حسابياً فوق أعلى معرّف موجود (Plan)، فكل دفعة مستقلة
+  وتُنفَّذ في أي عملية وبأي ترتيب داخل مرحلتها؛ المراحل بترتيب المفاتيح الأجنبية.
+- نفس seed ونفس المقاييس و batch_size و today تعطي نفس البيانات.
+- الكتابة بـ COPY على PostgreSQL (psycopg 3) و executemany لغيره: كلاهما يتجاوز
+  bulk_create لأن auto_now/auto_now_add تستبدل تواريخ الماضي المولَّدة، ولا
+  إشارات هنا؛ الحقول المشتقة (الأعداد، التوفر، الترتيب) تُحسب مرة في النهاية.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    Booking, Consultant, ConsultationRequest, ConsultationSlot, Notification, Profile, Review, Service, User,
+)
+
+Through = Consultant.categories.through
+
+FIRST_NAMES = (
+    'محمد', 'أحمد', 'عبدالله', 'خالد', 'فهد', 'سعود', 'عمر', 'يوسف', 'إبراهيم', 'علي',
+    'حسن', 'ماجد', 'ناصر', 'سلطان', 'طارق', 'بندر', 'فيصل', 'تركي', 'مازن', 'هشام',
+    'فاطمة', 'نورة', 'سارة', 'مريم', 'عائشة', 'ريم', 'هند', 'لمى', 'دانة', 'أمل',
+    'جود', 'رهف', 'شهد', 'منى', 'هيفاء', 'العنود', 'غادة', 'لينا', 'بشرى', 'أسماء',
+)
+FAMILY_NAMES = (
+    'العتيبي', 'القحطاني', 'الشهري', 'الغامدي', 'الزهراني', 'الدوسري', 'المطيري', 'الحربي',
+    'السبيعي', 'العنزي', 'الشمري', 'التميمي', 'الخالدي', 'البقمي', 'السهلي', 'الرشيدي',
+    'الأحمد', 'الحسن', 'النجار', 'الخطيب', 'المصري', 'الحلبي', 'الكردي', 'السيد',
+)
+CITIES = ('الرياض', 'جدة', 'مكة', 'المدينة', 'الدمام', 'الخبر', 'أبها', 'تبوك', 'حائل', 'القاهرة', 'عمّان', 'دبي')
+
+# (الاسم، أيقونة Font Awesome، مواضيع الخدمات والأسئلة)
+CATEGORIES = (
+    ('استشارات قانونية', 'fa-balance-scale', ('عقود العمل', 'قضايا الأسرة', 'تأسيس الشركات', 'العقارات')),
+    ('استشارات مالية', 'fa-coins', ('التخطيط المالي', 'الاستثمار', 'الميزانية الشخصية', 'الضرائب')),
+    ('استشارات نفسية', 'fa-brain', ('القلق', 'ضغوط العمل', 'العلاقات', 'تطوير الذات')),
+    ('استشارات أسرية', 'fa-home', ('تربية الأطفال', 'الخلافات الزوجية', 'المراهقة', 'التواصل الأسري')),
+    ('استشارات تقنية', 'fa-laptop-code', ('تطوير المواقع', 'الأمن السيبراني', 'التحول الرقمي', 'البرمجة')),
+    ('ريادة الأعمال', 'fa-rocket', ('دراسة الجدوى', 'خطط التسويق', 'التمويل', 'إدارة المشاريع')),
+    ('استشارات طبية', 'fa-stethoscope', ('التغذية', 'اللياقة', 'النوم', 'الأمراض المزمنة')),
+    ('استشارات تعليمية', 'fa-graduation-cap', ('القبول الجامعي', 'الابتعاث', 'اختيار التخصص', 'مهارات المذاكرة')),
+    ('التوظيف والمسار المهني', 'fa-briefcase', ('السيرة الذاتية', 'المقابلات', 'تغيير المسار', 'التفاوض على الراتب')),
+    ('التسويق', 'fa-bullhorn', ('التسويق الرقمي', 'الهوية التجارية', 'وسائل التواصل', 'المحتوى')),
+)
+SERVICE_KINDS = ('جلسة استشارية في', 'مراجعة شاملة لـ', 'خطة عملية لـ', 'متابعة شهرية في', 'ورشة فردية عن')
+BIO_SENTENCES = (
+    'خبرة تزيد عن {years} سنوات في {topic}.',
+    'أساعد عملائي على اتخاذ قرارات واضحة ومدروسة.',
+    'حاصل على شهادات مهنية معتمدة في مجال التخصص.',
+    'أؤمن بأن كل حالة تستحق حلاً مخصصاً.',
+    'عملت مع أفراد وشركات في {city} وخارجها.',
+    'أركز على النتائج العملية القابلة للتطبيق.',
+)
+QUESTIONS = (
+    'أحتاج إلى نصيحة بخصوص {topic}، ما هي الخطوة الأولى؟',
+    'ما رأيك في وضعي الحالي فيما يتعلق بـ {topic}؟',
+    'هل يمكن مساعدتي في وضع خطة لـ {topic} خلال الأشهر القادمة؟',
+    'واجهت مشكلة في {topic} وأبحث عن حل سريع.',
+)
+RESPONSES = (
+    'شكراً لسؤالك، أنصح بالبدء بتقييم الوضع الحالي بدقة ثم تحديد الأولويات.',
+    'الأفضل حجز جلسة لمناقشة التفاصيل، لكن مبدئياً ركّز على الأساسيات.',
+    'وضعك شائع ويمكن حله بخطوات بسيطة سأوضحها لك في الجلسة.',
+)
+REVIEW_COMMENTS = (
+    'تجربة ممتازة وأنصح بها.', 'استشارة مفيدة جداً وواضحة.', 'مستشار متعاون ومحترف.',
+    'جيدة لكن كنت أتوقع تفاصيل أكثر.', 'أفادتني كثيراً، شكراً جزيلاً.', 'الموعد تأخر قليلاً لكن المحتوى رائع.',
+)
+NOTIFICATIONS = (
+    'تم تأكيد حجزك', 'لديك موعد غداً', 'تم الرد على استشارتك', 'تذكير: أكمل ملفك الشخصي',
+    'تم إلغاء الحجز', 'لديك طلب استشارة جديد', 'شكراً لتقييمك',
+)
+SESSION_MINUTES = (30, 45, 60, 60, 90)
+PRICES = tuple(Decimal(price) for price in ('100.00', '150.00', '200.00', '250.00', '300.00', '400.00', '500.00'))
+
+# (النموذج، الأعمدة بترتيب صفوف المولّدات)
+COLUMNS = {
+    'user': (User, (
+        'id', 'password', 'last_login', 'is_superuser', 'first_name', 'last_name', 'is_staff',
+        'is_active', 'date_joined', 'role', 'full_name', 'phone', 'is_verified', 'email',
+    )),
+    'profile': (Profile, ('id', 'user_id', 'profile_image', 'bio', 'address', 'website', 'created_at', 'updated_at')),
+    'consultant': (Consultant, (
+        'id', 'user_id', 'bio', 'profile_image', 'available', 'rating', 'rank_score',
+        'next_free_slot_at', 'free_slots_7d', 'session_duration', 'updated_at',
+    )),
+    'category': (Through, ('consultant_id', 'servicecategory_id')),
+    'service': (Service, (
+        'id', 'title', 'slug', 'description', 'category_id', 'price', 'duration', 'provider_id',
+        'is_active', 'created_at', 'updated_at',
+    )),
+    'slot': (ConsultationSlot, ('id', 'provider_id', 'start_time', 'end_time', 'is_booked')),
+    'booking': (Booking, ('id', 'client_id', 'service_id', 'slot_id', 'status', 'notes', 'created_at', 'updated_at')),
+    'review': (Review, ('id', 'service_id', 'reviewer_id', 'rating', 'comment', 'created_at', 'updated_at')),
+    'notification': (Notification, ('id', 'user_id', 'message', 'is_read', 'link', 'created_at')),
+    'request': (ConsultationRequest, (
+        'id', 'client_id', 'consultant_id', 'question', 'response', 'status', 'created_at', 'updated_at',
+    )),
+}
+
+
+@dataclass(frozen=True)
+class Plan:
+    seed: int
+    clients: int
+    consultants: int
+    services_per_consultant: int
+    slots_per_consultant: int
+    booking_rate: float
+    reviews: int
+    notifications_per_user: int
+    requests: int
+    days_back: int
+    days_ahead: int
+    today: datetime
+    password: str
+    # أعلى معرّف موجود لكل جدول قبل التوليد
+    base: dict
+    # معرّفات ServiceCategory بترتيب CATEGORIES
+    category_ids: tuple
+
+    @property
+    def users(self):
+        return self.clients + self.consultants
+
+    def client_id(self, index):
+        return self.base['user'] + 1 + index
+
+    def provider_id(self, index):
+        return self.base['user'] + self.clients + 1 + index
+
+    def service_id(self, consultant, index):
+        return self.base['service'] + 1 + consultant * self.services_per_consultant + index
+
+    def slot_id(self, consultant, index):
+        return self.base['slot'] + 1 + consultant * self.slots_per_consultant + index
+
+    def session_minutes(self, consultant):
+        return SESSION_MINUTES[consultant % len(SESSION_MINUTES)]
+
+    def past(self, rng, days=None):
+        return self.today - timedelta(seconds=rng.randrange(int((days or self.days_back) * 86400)))
+
+    def categories_of(self, consultant):
+        """1-3 تخصصات ثابتة لكل مستشار (تُشتق من رقمه لتعرفها كل المراحل)."""
+        rng = random.Random(self.seed * 1_000_003 + consultant)
+        return rng.sample(range(len(self.category_ids)), rng.choice((1, 1, 2, 2, 3)))
+
+
+def _name(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(FAMILY_NAMES)}'
+
+
+def _users(plan, rng, start, stop):
+    users, profiles = [], []
+    for index in range(start, stop):
+        is_client = index < plan.clients
+        user_id = plan.base['user'] + 1 + index
+        joined = plan.past(rng)
+        users.append((
+            user_id, plan.password, None, False, '', '', False, True, joined,
+            User.Role.CLIENT if is_client else User.Role.PROVIDER,
+            _name(rng), f'05{rng.randrange(10 ** 8):08d}', rng.random() < 0.6,
+            f'synthetic{user_id}@example.com',
+        ))
+        profiles.append((plan.base['profile'] + 1 + index, user_id, '', '', rng.choice(CITIES), '', joined, joined))
+    return {'user': users, 'profile': profiles}
+
+
+def _consultants(plan, rng, start, stop):
+    consultants, links, services = [], [], []
+    for index in range(start, stop):
+        consultant_id = plan.base['consultant'] + 1 + index
+        user_id = plan.provider_id(index)
+        categories = plan.categories_of(index)
+        topics = [topic for category in categories for topic in CATEGORIES[category][2]]
+        bio = ' '.join(
+            sentence.format(years=rng.randint(3, 25), topic=rng.choice(topics), city=rng.choice(CITIES))
+            for sentence in rng.sample(BIO_SENTENCES, 3)
+        )
+        minutes = plan.session_minutes(index)
+        consultants.append((
+            consultant_id, user_id, bio, '', rng.random() < 0.9, 0, 0, None, 0, minutes, plan.today,
+        ))
+        links += [(consultant_id, plan.category_ids[category]) for category in categories]
+        for number in range(plan.services_per_consultant):
+            service_id = plan.service_id(index, number)
+            category = categories[number % len(categories)]
+            topic = rng.choice(CATEGORIES[category][2])
+            created = plan.past(rng)
+            services.append((
+                service_id, f'{rng.choice(SERVICE_KINDS)} {topic}', f'service-{service_id}',
+                f'{CATEGORIES[category][0]}: {topic}. {bio}', plan.category_ids[category],
+                rng.choice(PRICES), timedelta(minutes=minutes), user_id, True, created, created,
+            ))
+    return {'consultant': consultants, 'category': links, 'service': services}
+
+
+def _slots(plan, rng, start, stop):
+    """مواعيد موزعة على [today - days_back, today + days_ahead)، وحجز لكل موعد محجوز."""
+    slots, bookings = [], []
+    span = plan.days_back + plan.days_ahead
+    for index in range(start, stop):
+        provider_id = plan.provider_id(index)
+        minutes = plan.session_minutes(index)
+        for number in range(plan.slots_per_consultant):
+            slot_id = plan.slot_id(index, number)
+            day = number * span // plan.slots_per_consultant - plan.days_back
+            start_time = plan.today + timedelta(days=day, hours=9 + number % 8, minutes=rng.choice((0, 30)))
+            end_time = start_time + timedelta(minutes=minutes)
+            booked = rng.random() < plan.booking_rate
+            if booked:
+                if end_time < plan.today:
+                    status = Booking.Status.COMPLETED if rng.random() < 0.85 else Booking.Status.CANCELLED
+                else:
+                    status = Booking.Status.CONFIRMED if rng.random() < 0.7 else Booking.Status.PENDING
+                created = start_time - timedelta(hours=rng.randint(2, 24 * 14))
+                updated = end_time if status == Booking.Status.COMPLETED else created
+                bookings.append((
+                    plan.base['booking'] + slot_id - plan.base['slot'],
+                    plan.client_id(rng.randrange(plan.clients)),
+                    plan.service_id(index, rng.randrange(plan.services_per_consultant)),
+                    slot_id, status, '' if rng.random() < 0.7 else rng.choice(QUESTIONS).format(topic='الموعد'),
+                    created, updated,
+                ))
+                booked = status != Booking.Status.CANCELLED
+            slots.append((slot_id, provider_id, start_time, end_time, booked))
+    return {'slot': slots, 'booking': bookings}
+
+
+def _reviews(plan, rng, start, stop):
+    # (عميل، خدمة) فريد لكل مراجعة: unique_together على Review
+    services = plan.consultants * plan.services_per_consultant
+    rows = []
+    for index in range(start, stop):
+        reviewer = index % plan.clients
+        service = (index // plan.clients + reviewer * 7919) % services
+        created = plan.past(rng)
+        rows.append((
+            plan.base['review'] + 1 + index, plan.base['service'] + 1 + service, plan.client_id(reviewer),
+            rng.choice((2, 3, 4, 4, 4, 5, 5, 5, 5, 5)), rng.choice(REVIEW_COMMENTS), created, created,
+        ))
+    return {'review': rows}
+
+
+def _notifications(plan, rng, start, stop):
+    rows = []
+    for user in range(start, stop):
+        user_id = plan.base['user'] + 1 + user
+        for number in range(plan.notifications_per_user):
+            created = plan.past(rng, min(plan.days_back, 90))
+            rows.append((
+                plan.base['notification'] + 1 + user * plan.notifications_per_user + number, user_id,
+                rng.choice(NOTIFICATIONS), rng.random() < 0.7, '', created,
+            ))
+    return {'notification': rows}
+
+
+def _requests(plan, rng, start, stop):
+    rows = []
+    for index in range(start, stop):
+        consultant = rng.randrange(plan.consultants)
+        topic = rng.choice(CATEGORIES[plan.categories_of(consultant)[0]][2])
+        created = plan.past(rng)
+        status = rng.choice(('pending', 'accepted', 'completed', 'completed', 'completed', 'rejected'))
+        answered = status in ('accepted', 'completed')
+        rows.append((
+            plan.base['request'] + 1 + index, plan.client_id(rng.randrange(plan.clients)), plan.provider_id(consultant),
+            rng.choice(QUESTIONS).format(topic=topic), rng.choice(RESPONSES) if answered else '', status,
+            created, created + timedelta(hours=rng.randint(1, 72)) if status != 'pending' else created,
+        ))
+    return {'request': rows}
+
+
+# (المرحلة، المولّد، عدد الوحدات، صفوف لكل وحدة) بترتيب المفاتيح الأجنبية
+PHASES = (
+    ('users', _users, lambda plan: plan.users, lambda plan: 2),
+    ('consultants', _consultants, lambda plan: plan.consultants, lambda plan: 3 + plan.services_per_consultant),
+    ('slots', _slots, lambda plan: plan.consultants, lambda plan: plan.slots_per_consultant * (1 + plan.booking_rate)),
+    ('reviews', _reviews, lambda plan: plan.reviews, lambda plan: 1),
+    ('notifications', _notifications, lambda plan: plan.users, lambda plan: plan.notifications_per_user),
+    ('requests', _requests, lambda plan: plan.requests, lambda plan: 1),
+)
+GENERATORS = {name: generator for name, generator, _, _ in PHASES}
+
+
+def tasks(plan, batch_size):
+    """[(مرحلة، [(start, stop), ...])]؛ كل دفعة قرابة batch_size صفاً."""
+    result = []
+    for name, _, units, rows_per_unit in PHASES:
+        total = units(plan)
+        step = max(1, int(batch_size // max(rows_per_unit(plan), 1)))
+        result.append((name, [(start, min(start + step, total)) for start in range(0, total, step)]))
+    return result
+
+
+def _copy(cursor, table, columns, rows):
+    with cursor.cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def write(key, rows):
+    model, names = COLUMNS[key]
+    fields = [model._meta.get_field(name) for name in names]
+    quote = connection.ops.quote_name
+    table, columns = quote(model._meta.db_table), ', '.join(quote(field.column) for field in fields)
+    prepare = [field.get_db_prep_save for field in fields]
+    values = [[prep(value, connection) for prep, value in zip(prepare, row)] for row in rows]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql' and hasattr(cursor.cursor, 'copy'):
+            _copy(cursor, table, columns, values)
+        else:
+            placeholders = ', '.join(['%s'] * len(fields))
+            cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', values)
+
+
+def run(plan, phase, start, stop):
+    """يولّد ويكتب دفعة واحدة في معاملة؛ يعيد {جدول: صفوف}."""
+    rng = random.Random(f'{plan.seed}:{phase}:{start}')
+    generated = GENERATORS[phase](plan, rng, start, stop)
+    with transaction.atomic():
+        for key, rows in generated.items():
+            if rows:
+                write(key, rows)
+    return {key: len(rows) for key, rows in generated.items()}
+
+
+def init_worker():
+    # في حالة spawn تحتاج العملية الفرعية لتهيئة Django بنفسها
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def run_task(args):
+    return run(*args)
+
+
+def midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
@@ -1,3 +1,1469 @@
-from django.test import TestCase
+import copy
+import csv
+import importlib
+import re
+import shutil
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections
+from django.forms import FileField
+from django.http import Http404, HttpResponse, QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from pypdf import PdfWriter
+
+from . import (
+    archive, availability, backends, checks, db_pool, db_router, facets, faq_index, file_metadata, navbar, page_cache, ranking,
+    recommendations, scheduling, search, search_analytics, startup, storage, throttling,
+)
+from .downloads import serve_public_media
+from .management.base import is_disposable_database
+from .models import (
+    ArchivedConsultation, Booking, Consultant, Consultation, ConsultationRequest, ConsultationSlot, Document, FAQ,
+    Notification, Profile, RankingBaseline, Review, SearchClickStat, Service, ServiceCategory, SimilarConsultant,
+    ThrottleCounter, User, WorkingHours, WorkingHoursException,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='rafikni-test-media-')
+TEST_STORAGES = dict(settings.STORAGES, default={'BACKEND': 'django.core.files.storage.FileSystemStorage'})
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+def make_user(email, role=User.Role.CLIENT):
+    return User.objects.create_user(email, email.split('@')[0], '0500000000', 'pass-12345', role=role)
+
+
+class StartupBudgetTests(SimpleTestCase):
+    """زمن إقلاع عامل WSGI، مُقاساً في عملية جديدة."""
+
+    def test_heavy_integrations_are_deferred(self):
+        self.assertEqual(startup.loaded_deferred_modules(), [])
+
+    def test_wsgi_import_within_budget(self):
+        # أفضل قياس من ثلاثة لتقليل أثر ضجيج الجهاز
+        elapsed = min(startup.wsgi_import_ms() for _ in range(3))
+        self.assertLessEqual(
+            elapsed, settings.STARTUP_IMPORT_BUDGET_MS,
+            f'استيراد rafikni.wsgi استغرق {elapsed:.0f}ms (الميزانية {settings.STARTUP_IMPORT_BUDGET_MS}ms)',
+        )
+
+
+class QueryPlanTests(TestCase):
+    """الاستعلامات الساخنة تحت EXPLAIN: يجب أن تستخدم فهارسها المركبة لا المسح الكامل.
+
+    على PostgreSQL يُعطَّل enable_seqscan حتى لا يفضّل المخطط المسح لصغر البيانات؛
+    إن بقي Seq Scan فلا يوجد فهرس صالح للاستعلام.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([
+            User(email=f'plan-{i}@example.com', full_name=f'User {i}', password='!',
+                 role=User.Role.PROVIDER if i < 10 else User.Role.CLIENT)
+            for i in range(60)
+        ])
+        providers, clients = users[:10], users[10:]
+        cls.provider, cls.customer = providers[0], clients[0]
+        services = Service.objects.bulk_create([
+            Service(title='s', slug=f'plan-service-{p.pk}', description='d', price=100,
+                    duration=timedelta(hours=1), provider=p)
+            for p in providers
+        ])
+        start = timezone.now() - timedelta(days=30)
+        slots = ConsultationSlot.objects.bulk_create([
+            ConsultationSlot(provider=providers[i % 10], start_time=start + timedelta(hours=i),
+                             end_time=start + timedelta(hours=i, minutes=45), is_booked=i % 3 == 0)
+            for i in range(2000)
+        ])
+        statuses = [choice for choice, _ in Booking.Status.choices]
+        Consultation.objects.bulk_create([
+            Consultation(slot=slot, client=clients[i % 50], status=statuses[i % 4])
+            for i, slot in enumerate(slots[::2])
+        ])
+        Booking.objects.bulk_create([
+            Booking(client=clients[i % 50], service=services[i % 10], status=statuses[i % 4])
+            for i in range(2000)
+        ])
+        ConsultationRequest.objects.bulk_create([
+            ConsultationRequest(client=clients[i % 50], consultant=providers[i % 10], question='q',
+                                status=('pending', 'accepted', 'rejected', 'completed')[i % 4])
+            for i in range(2000)
+        ])
+        Notification.objects.bulk_create([
+            Notification(user=users[i % 60], message='m', is_read=i % 4 != 0) for i in range(3000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan, plan)
+        else:
+            # SQLite: "SCAN <جدول>" دون "USING ... INDEX" هو مسح كامل للجدول
+            full_scans = [line for line in plan.splitlines() if re.search(r'\bSCAN \w+$', line.strip())]
+            self.assertEqual(full_scans, [], plan)
+        self.assertIn(index, plan, plan)
+
+    def test_client_active_bookings(self):
+        self.assertUsesIndex(
+            Booking.objects.filter(client=self.customer, status__in=['pending', 'confirmed']),
+            'core_booking_client_status_idx',
+        )
+
+    def test_client_booking_list(self):
+        self.assertUsesIndex(
+            Booking.objects.filter(client=self.customer).order_by('-created_at'),
+            'core_booking_client_status_idx',
+        )
+
+    def test_client_active_consultations(self):
+        self.assertUsesIndex(
+            Consultation.objects.filter(client=self.customer, status__in=['pending', 'confirmed']),
+            'core_consult_client_status_idx',
+        )
+
+    def test_provider_upcoming_consultations(self):
+        self.assertUsesIndex(
+            Consultation.objects.filter(
+                slot__provider=self.provider, slot__start_time__gte=timezone.now(), status='confirmed'
+            ).select_related('slot', 'client'),
+            'core_slot_provider_booked_idx',
+        )
+
+    def test_pending_requests(self):
+        self.assertUsesIndex(
+            ConsultationRequest.objects.filter(consultant=self.provider, status='pending').order_by('-created_at'),
+            'core_request_consultant_st_idx',
+        )
+
+    def test_unread_notifications(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.customer, is_read=False),
+            'core_notif_user_read_idx',
+        )
+
+    def test_notification_list(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.customer).order_by('-created_at'),
+            'core_notif_user_read_idx',
+        )
+
+    def test_available_slots(self):
+        self.assertUsesIndex(
+            ConsultationSlot.objects.filter(
+                provider=self.provider, is_booked=False, start_time__gte=timezone.now()
+            ).order_by('start_time'),
+            'core_slot_provider_booked_idx',
+        )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, STORAGES=TEST_STORAGES, DOCUMENT_SERVE_MODE='django')
+class DocumentAccessTests(TestCase):
+    """الوثيقة لمالكها، ولمقدم الخدمة فقط في طلب/استشارة نشطة أُرفقت بها."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('owner@example.com')
+        cls.provider = make_user('provider@example.com', User.Role.PROVIDER)
+        cls.stranger = make_user('stranger@example.com', User.Role.PROVIDER)
+        cls.request = ConsultationRequest.objects.create(
+            client=cls.owner, consultant=cls.provider, question='q', status='accepted',
+        )
+        start = timezone.now() + timedelta(days=1)
+        slot = ConsultationSlot.objects.create(provider=cls.provider, start_time=start, end_time=start + timedelta(hours=1))
+        cls.consultation = Consultation.objects.create(slot=slot, client=cls.owner, status=Consultation.Status.CONFIRMED)
+
+    def _document(self, **links):
+        return Document.objects.create(
+            user=self.owner, title='t', file=SimpleUploadedFile('secret.txt', b'secret'), **links,
+        )
+
+    def _status(self, user, document):
+        self.client.force_login(user)
+        response = self.client.get(reverse('download_document', args=[document.pk]))
+        if hasattr(response, 'close'):
+            response.close()
+        return response.status_code
+
+    def test_owner(self):
+        self.assertEqual(self._status(self.owner, self._document()), 200)
+
+    def test_provider_of_linked_active_request(self):
+        self.assertEqual(self._status(self.provider, self._document(consultation_request=self.request)), 200)
+
+    def test_provider_of_linked_active_consultation(self):
+        self.assertEqual(self._status(self.provider, self._document(consultation=self.consultation)), 200)
+
+    def test_unrelated_user(self):
+        document = self._document(consultation_request=self.request)
+        self.assertEqual(self._status(self.stranger, document), 404)
+
+    def test_rejected_request(self):
+        ConsultationRequest.objects.filter(pk=self.request.pk).update(status='rejected')
+        self.assertEqual(self._status(self.provider, self._document(consultation_request=self.request)), 404)
+
+    def test_cancelled_consultation(self):
+        Consultation.objects.filter(pk=self.consultation.pk).update(status=Consultation.Status.CANCELLED)
+        self.assertEqual(self._status(self.provider, self._document(consultation=self.consultation)), 404)
+
+    def test_unlinked_document_of_a_client(self):
+        # طلب نشط مع المالك لا يفتح وثائقه الأخرى
+        self.assertEqual(self._status(self.provider, self._document()), 404)
+
+
+class FileMetadataTests(SimpleTestCase):
+    """عدد صفحات PDF من شجرة الصفحات، وNone حين لا يمكن التأكد."""
+
+    def _pdf(self, pages):
+        writer = PdfWriter()
+        for _ in range(pages):
+            writer.add_blank_page(width=200, height=200)
+        buffer = BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+    def _metadata(self, content):
+        return file_metadata.extract_file_metadata(SimpleUploadedFile('doc.pdf', content), 'doc.pdf')
+
+    def test_page_count(self):
+        metadata = self._metadata(self._pdf(3))
+        self.assertEqual(metadata['mime_type'], 'application/pdf')
+        self.assertEqual(metadata['page_count'], 3)
+
+    def test_unreadable_pdf(self):
+        # نص يشبه كائنات الصفحات دون بنية PDF صالحة
+        with self.assertLogs('pypdf', 'WARNING'):
+            self.assertIsNone(self._metadata(b'%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n')['page_count'])
+            self.assertIsNone(self._metadata(self._pdf(3)[:200])['page_count'])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.consultant = Consultant.objects.create(
+            user=make_user('conditional@example.com', role=User.Role.PROVIDER), bio='-',
+        )
+        cls.viewer = make_user('viewer@example.com')
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.url = reverse('consultant_detail', args=[self.consultant.pk])
+
+    def _etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_matching_validators_return_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304,
+        )
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_consultant_edit_changes_etag(self):
+        etag = self._etag()
+        self.consultant.bio = 'سيرة جديدة'
+        self.consultant.save()
+        self.assertNotEqual(self._etag(), etag)
+
+    def test_navbar_counts_change_etag(self):
+        self.client.force_login(self.viewer)
+        etag = self._etag()
+        self.assertNotIn('Last-Modified', self.client.get(self.url))
+        Notification.objects.create(user=self.viewer, message='m')
+        self.assertNotEqual(self._etag(), etag)
+
+    def test_user_version_changes_etag(self):
+        self.client.force_login(self.viewer)
+        etag = self._etag()
+        backends.invalidate_cached_user(self.viewer.pk)
+        self.assertNotEqual(self._etag(), etag)
+
+    def test_service_edit_changes_etag(self):
+        service = Service.objects.create(
+            provider=self.consultant.user, title='قبل', description='-', price=100, duration=timedelta(hours=1),
+        )
+        self.url = reverse('service_detail', args=[service.pk])
+        # أول زيارة تضبط كوكي CSRF وهو جزء من ETag
+        self._etag()
+        etag = self._etag()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        service.title = 'بعد'
+        service.save()
+        self.assertNotEqual(self._etag(), etag)
+
+
+class LocalMediaStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+
+    def _storage(self, **kwargs):
+        return storage.LocalMediaStorage(location=self.location, base_url='/media/', **kwargs)
+
+    def test_unique_filename(self):
+        media = self._storage()
+        first = media.save('profiles/a.png', ContentFile(b'1'))
+        second = media.save('profiles/a.png', ContentFile(b'2'))
+        self.assertNotEqual(first, second)
+        self.assertRegex(first, r'^profiles/a_[0-9a-f]{6}\.png$')
+
+    def test_overwrite_without_unique_filename(self):
+        media = self._storage(unique_filename=False)
+        self.assertEqual(media.save('a.txt', ContentFile(b'1')), 'a.txt')
+        self.assertEqual(media.save('a.txt', ContentFile(b'22')), 'a.txt')
+        self.assertEqual(media.size('a.txt'), 2)
+
+    def test_latency_on_network_operations(self):
+        media = self._storage(latency_ms=50)
+        with mock.patch('core.storage.time.sleep') as sleep:
+            name = media.save('a.txt', ContentFile(b'1'))
+            media.open(name).close()
+            media.url(name)
+            media.delete(name)
+        # طلب واحد لكل من الرفع والتنزيل والحذف؛ url محلي بلا زمن شبكة
+        self.assertEqual(sleep.call_args_list, [mock.call(0.05)] * 3)
+
+    def test_variant_url(self):
+        media = self._storage(unique_filename=False)
+        field_file = mock.Mock(storage=media)
+        field_file.name = 'profiles/a.png'
+        self.assertEqual(
+            storage.variant_url(field_file, width=200, height=200, crop='fill'),
+            '/media/profiles/a.png?tr=w_200,h_200,c_fill',
+        )
+        self.assertEqual(media.variant_url('profiles/a.png'), '/media/profiles/a.png')
+
+    def test_variant_url_filesystem(self):
+        field_file = mock.Mock(storage=FileSystemStorage(base_url='/media/'), url='/media/a.png')
+        field_file.name = 'a.png'
+        self.assertEqual(storage.variant_url(field_file, width=200), '/media/a.png')
+        self.assertEqual(storage.variant_url(None), '')
+
+    def test_bench_command(self):
+        out = StringIO()
+        call_command('bench_media_storage', backends='filesystem,local', count=1, size_kb=1, stdout=out)
+        lines = out.getvalue().splitlines()
+        # حقلان (رفع وتنزيل) لكل من الحقول الثلاثة لكل تخزين
+        self.assertEqual(len(lines), 12)
+        self.assertEqual({line.split()[0] for line in lines}, {'filesystem', 'local'})
+
+    def test_bench_unknown_backend(self):
+        with self.assertRaises(CommandError):
+            call_command('bench_media_storage', backends='s3', count=1, size_kb=1, stdout=StringIO())
+
+
+class PublicMediaTests(SimpleTestCase):
+    """مسار الوسائط في التطوير لا يصل إلى documents/ بأي صيغة للمسار."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        root = Path(MEDIA_ROOT)
+        (root / 'documents').mkdir(parents=True, exist_ok=True)
+        (root / 'documents' / 's.txt').write_bytes(b'secret')
+        (root / 'profiles').mkdir(exist_ok=True)
+        (root / 'profiles' / 'p.txt').write_bytes(b'public')
+
+    def _serve(self, path):
+        return serve_public_media(RequestFactory().get('/media/' + path), path, document_root=MEDIA_ROOT)
+
+    def test_public_file(self):
+        response = self._serve('profiles/p.txt')
+        self.assertEqual(b''.join(response.streaming_content), b'public')
+
+    def test_private_paths(self):
+        for path in ('documents/s.txt', '/documents/s.txt', './documents/s.txt', 'x/../documents/s.txt',
+                     'Documents/s.txt', 'profiles/../../documents/s.txt'):
+            with self.subTest(path=path), self.assertRaises(Http404):
+                self._serve(path)
+
+
+THROTTLE_POLICY = {
+    'login': {'enabled': True, 'ip_capacity': 6, 'ip_per_minute': 1, 'email_capacity': 3, 'email_per_minute': 1},
+    'register': {'enabled': True, 'ip_capacity': 5, 'ip_per_minute': 1, 'email_capacity': 3, 'email_per_minute': 1},
+}
+
+
+@override_settings(
+    LOGIN_THROTTLE=THROTTLE_POLICY, LOGIN_THROTTLE_TRUSTED_PROXIES=0,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        caches[settings.LOGIN_THROTTLE_CACHE].clear()
+        self.user = make_user('throttled@example.com')
+
+    def _login(self, email='throttled@example.com', password='wrong', **extra):
+        return self.client.post(reverse('login'), {'email': email, 'password': password}, **extra)
+
+    def test_email_lockout_returns_429(self):
+        for _ in range(3):
+            self.assertEqual(self._login().status_code, 200)
+        response = self._login()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # حتى كلمة المرور الصحيحة مرفوضة أثناء الحظر، دون تسجيل دخول
+        response = self._login(password='pass-12345')
+        self.assertEqual(response.status_code, 429)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_ip_bucket_spans_emails(self):
+        for number in range(6):
+            self.assertEqual(self._login(email=f'other{number}@example.com').status_code, 200)
+        self.assertEqual(self._login(email='fresh@example.com').status_code, 429)
+
+    def test_forwarded_for_ignored_without_trusted_proxies(self):
+        for number in range(6):
+            self._login(email=f'other{number}@example.com', HTTP_X_FORWARDED_FOR=f'10.0.0.{number}')
+        response = self._login(email='fresh@example.com', HTTP_X_FORWARDED_FOR='10.0.0.99')
+        self.assertEqual(response.status_code, 429)
+
+    def test_trusted_proxy_uses_rightmost_hop(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4', REMOTE_ADDR='10.0.0.1')
+        with override_settings(LOGIN_THROTTLE_TRUSTED_PROXIES=1):
+            self.assertEqual(throttling.client_ip(request), '1.2.3.4')
+        with override_settings(LOGIN_THROTTLE_TRUSTED_PROXIES=2):
+            self.assertEqual(throttling.client_ip(request), '6.6.6.6')
+        with override_settings(LOGIN_THROTTLE_TRUSTED_PROXIES=3):
+            # الترويس أقصر من سلسلة الوكلاء: الطلب لم يمر بها
+            self.assertEqual(throttling.client_ip(request), '10.0.0.1')
+
+    def test_attempts_are_counted_in_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(throttling._take('throttle:test:sql', 2, 1))
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"count" = ("core_throttlecounter"."count" + 1)', updates[0])
+        self.assertTrue(throttling._take('throttle:test:sql', 2, 1))
+        self.assertFalse(throttling._take('throttle:test:sql', 2, 1))
+
+    def test_purge_expired(self):
+        ThrottleCounter.objects.create(key='old', count=3, expires_at=timezone.now() - timedelta(seconds=1))
+        throttling._take('throttle:test:live', 2, 1)
+        call_command('purge_throttle', stdout=StringIO())
+        self.assertEqual([key.rsplit(':', 1)[0] for key in ThrottleCounter.objects.values_list('key', flat=True)],
+                         ['throttle:test:live'])
+
+
+@skipIf(connection.vendor == 'sqlite', 'قاعدة الاختبار في الذاكرة لا تقبل كاتبين متزامنين')
+class ThrottleBurstTests(TransactionTestCase):
+    def test_concurrent_burst_respects_capacity(self):
+        results, barrier = [], threading.Barrier(40)
+
+        def attempt():
+            barrier.wait()
+            try:
+                results.append(throttling._take('throttle:test:burst', 10, 1))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt) for _ in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 10)
+
+
+def rendered_post_data(response, *forms):
+    """قيم النماذج الأولية للحقول التي يعرضها القالب فعلاً، كما يرسلها المتصفح."""
+    html = response.content.decode()
+    data = {}
+    for form in forms:
+        for bound in form:
+            # المتصفح لا يعيد إرسال ملف محفوظ
+            if f'name="{bound.html_name}"' not in html or isinstance(bound.field, FileField):
+                continue
+            value = bound.value()
+            if isinstance(value, (list, tuple)):
+                data[bound.html_name] = [str(item) for item in value]
+            elif value not in (None, False):
+                data[bound.html_name] = '' if value is True else str(value)
+    return data
+
+
+class ConsultantFormViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.provider = make_user('editor@example.com', role=User.Role.PROVIDER)
+        cls.consultant = Consultant.objects.create(
+            user=cls.provider, bio='سيرة', session_duration=45, profile_image='consultants/editor.png',
+        )
+        cls.consultant.categories.add(ServiceCategory.objects.create(name='قانون'))
+        WorkingHours.objects.create(consultant=cls.consultant, weekday=0, start_time=time(9), end_time=time(12))
+
+    def setUp(self):
+        self.client.force_login(self.provider)
+
+    def test_edit_profile_keeps_session_duration(self):
+        response = self.client.get(reverse('edit_profile'))
+        context = response.context
+        data = rendered_post_data(response, context['user_form'], context['profile_form'], context['consultant_form'])
+        self.assertEqual(data['session_duration'], '45')
+        data['session_duration'] = '30'
+        response = self.client.post(reverse('edit_profile'), data)
+        self.assertRedirects(response, reverse('profile'), fetch_redirect_response=False)
+        self.consultant.refresh_from_db()
+        self.assertEqual(self.consultant.session_duration, 30)
+        # نموذج الملف الشخصي لا يعرض الأيام فلا يمس أوقات العمل
+        self.assertEqual(self.consultant.working_hours.count(), 1)
+
+    def test_edit_consultant_saves_working_hours(self):
+        response = self.client.get(reverse('edit_consultant'))
+        data = rendered_post_data(response, response.context['form'])
+        self.assertEqual(data['monday'], '09:00 - 12:00')
+        data['sunday'] = '10:00 - 11:00, 13:00 - 14:00'
+        response = self.client.post(reverse('edit_consultant'), data)
+        self.assertRedirects(response, reverse('provider_profile'), fetch_redirect_response=False)
+        self.assertEqual(
+            sorted(self.consultant.working_hours.values_list('weekday', 'start_time', 'end_time')),
+            [(0, time(9), time(12)), (6, time(10), time(11)), (6, time(13), time(14))],
+        )
+
+    def test_missing_session_duration_keeps_saved_value(self):
+        response = self.client.post(reverse('edit_consultant'), {
+            'bio': 'سيرة جديدة', 'categories': list(self.consultant.categories.values_list('pk', flat=True)),
+            'monday': '09:00 - 12:00',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.consultant.refresh_from_db()
+        self.assertEqual((self.consultant.bio, self.consultant.session_duration), ('سيرة جديدة', 45))
+
+
+class SlotGenerationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.consultant = Consultant.objects.create(
+            user=make_user('slots@example.com', role=User.Role.PROVIDER), session_duration=60,
+        )
+        # الاثنين 09:00-12:00 و 14:00-15:30 (النصف ساعة الأخيرة لا تكفي موعداً)
+        WorkingHours.objects.bulk_create([
+            WorkingHours(consultant=cls.consultant, weekday=0, start_time=time(9), end_time=time(12)),
+            WorkingHours(consultant=cls.consultant, weekday=0, start_time=time(14), end_time=time(15, 30)),
+        ])
+        cls.monday = date(2031, 6, 2)
+        cls.now = timezone.make_aware(datetime.combine(cls.monday - timedelta(days=1), time.min))
+
+    def _local_starts(self):
+        return [
+            timezone.localtime(start).strftime('%m-%d %H:%M')
+            for start in ConsultationSlot.objects.filter(provider=self.consultant.user)
+            .order_by('start_time').values_list('start_time', flat=True)
+        ]
+
+    def test_weekly_hours(self):
+        created = scheduling.generate_slots([self.consultant], days=7, start_date=self.monday, now=self.now)
+        self.assertEqual(created, 4)
+        self.assertEqual(self._local_starts(), ['06-02 09:00', '06-02 10:00', '06-02 11:00', '06-02 14:00'])
+
+    def test_rerun_skips_existing_and_overlapping(self):
+        start = timezone.make_aware(datetime.combine(self.monday, time(10, 30)))
+        ConsultationSlot.objects.create(provider=self.consultant.user, start_time=start, end_time=start + timedelta(hours=1))
+        scheduling.generate_slots([self.consultant], days=7, start_date=self.monday, now=self.now)
+        self.assertEqual(scheduling.generate_slots([self.consultant], days=7, start_date=self.monday, now=self.now), 0)
+        self.assertEqual(self._local_starts(), ['06-02 09:00', '06-02 10:30', '06-02 14:00'])
+
+    def test_exceptions_replace_the_week(self):
+        WorkingHoursException.objects.create(consultant=self.consultant, date=self.monday)
+        WorkingHoursException.objects.create(
+            consultant=self.consultant, date=self.monday + timedelta(days=1), start_time=time(16), end_time=time(18),
+        )
+        scheduling.generate_slots([self.consultant], days=7, start_date=self.monday, now=self.now)
+        self.assertEqual(self._local_starts(), ['06-03 16:00', '06-03 17:00'])
+
+    def test_past_slots_are_skipped(self):
+        now = timezone.make_aware(datetime.combine(self.monday, time(10, 15)))
+        scheduling.generate_slots([self.consultant], days=7, start_date=self.monday, now=now)
+        self.assertEqual(self._local_starts(), ['06-02 11:00', '06-02 14:00'])
+
+
+class AvailabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.consultant = Consultant.objects.create(user=make_user('free@example.com', role=User.Role.PROVIDER))
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=2)
+
+    def _slot(self, start):
+        return ConsultationSlot.objects.create(provider=self.consultant.user, start_time=start, end_time=start + timedelta(hours=1))
+
+    def _state(self, consultant=None):
+        consultant = consultant or self.consultant
+        consultant.refresh_from_db()
+        return consultant.next_free_slot_at, consultant.free_slots_7d
+
+    def test_booking_and_cancelling(self):
+        first, second = self._slot(self.start), self._slot(self.start + timedelta(days=1))
+        self.assertEqual(self._state(), (first.start_time, 2))
+        first.is_booked = True
+        first.save()
+        self.assertEqual(self._state(), (second.start_time, 1))
+        second.delete()
+        self.assertEqual(self._state(), (None, 0))
+        first.is_booked = False
+        first.save()
+        self.assertEqual(self._state(), (first.start_time, 1))
+
+    def test_generated_slots(self):
+        WorkingHours.objects.create(consultant=self.consultant, weekday=0, start_time=time(9), end_time=time(10))
+        monday = date(2031, 6, 2)
+        now = timezone.make_aware(datetime.combine(monday - timedelta(days=1), time.min))
+        scheduling.generate_slots([self.consultant], days=7, start_date=monday, now=now)
+        self.assertEqual(self._state(), (timezone.make_aware(datetime.combine(monday, time(9))), 1))
+
+    def test_refresh_in_batches(self):
+        others = [
+            Consultant.objects.create(user=make_user(f'free{number}@example.com', role=User.Role.PROVIDER))
+            for number in range(2)
+        ]
+        slot = self._slot(self.start)
+        ConsultationSlot.objects.filter(pk=slot.pk).update(provider=others[1].user)
+        with mock.patch('core.availability._refresh_batch', wraps=availability._refresh_batch) as refresh_batch:
+            self.assertEqual(availability.refresh(batch_size=2), 3)
+        self.assertEqual([len(call.args[0]) for call in refresh_batch.call_args_list], [2, 1])
+        self.assertEqual(self._state(), (None, 0))
+        self.assertEqual(self._state(others[1]), (self.start, 1))
+
+    def test_stale_providers_command(self):
+        passed = self._slot(timezone.now() - timedelta(hours=2))
+        upcoming = self._slot(self.start)
+        Consultant.objects.filter(pk=self.consultant.pk).update(next_free_slot_at=passed.start_time)
+        self.assertEqual(availability.stale_provider_ids(), [self.consultant.user_id])
+        call_command('refresh_availability', stdout=StringIO())
+        self.assertEqual(self._state(), (upcoming.start_time, 1))
+        self.assertEqual(availability.stale_provider_ids(), [])
+
+
+class ServiceSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        provider = make_user('searched@example.com', role=User.Role.PROVIDER)
+
+        def service(title, description):
+            return Service.objects.create(
+                provider=provider, title=title, description=description, price=100, duration=timedelta(hours=1),
+            )
+        cls.in_description = service('استشارة عامة', 'مراجعة عقود العمل')
+        cls.in_title = service('صياغة العقود', 'خدمة قانونية')
+        service('ضرائب', 'إقرارات')
+        # save() يعيد is_active دائماً
+        Service.objects.filter(pk=service('عقود قديمة', '-').pk).update(is_active=False)
+
+    def test_title_matches_first_and_inactive_excluded(self):
+        self.assertEqual(list(search.search_services('عقود')), [self.in_title, self.in_description])
+        self.assertFalse(search.search_services('  ').exists())
+
+    def test_view(self):
+        response = self.client.get(reverse('search_services'), {'q': 'عقود'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['services']), [self.in_title, self.in_description])
+
+    def test_threshold_is_local_to_a_transaction(self):
+        depth = len(connection.savepoint_ids)
+        executed = []
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.execute.side_effect = lambda sql, params: executed.append(
+            (sql, params, len(connection.savepoint_ids))
+        )
+        fake = mock.Mock(cursor=mock.Mock(return_value=cursor))
+        with mock.patch('core.search.trigram_available', return_value=True), \
+                mock.patch('core.search.connections', {DEFAULT_DB_ALIAS: fake}):
+            with search.trigram_threshold():
+                pass
+        [(sql, params, inner_depth)] = executed
+        self.assertIn('set_config', sql)
+        self.assertTrue(sql.rstrip(')').endswith('true'))
+        self.assertEqual(params, [str(settings.SEARCH_TRIGRAM_THRESHOLD)])
+        self.assertEqual(inner_depth, depth + 1)
+
+    def test_trigram_index_migration(self):
+        migration = importlib.import_module('core.migrations.0014_service_trigram_indexes')
+        schema_editor = mock.MagicMock()
+        schema_editor.connection.vendor = 'postgresql'
+        schema_editor.connection.cursor.return_value.__enter__.return_value.fetchone.return_value = (1,)
+        migration.create_trigram_indexes(None, schema_editor)
+        statements = [call.args[0] for call in schema_editor.execute.call_args_list]
+        self.assertEqual(len(statements), 2)
+        for statement, column in zip(statements, ('title', 'description')):
+            self.assertIn('CREATE INDEX CONCURRENTLY', statement)
+            self.assertIn(f'UPPER({column}::text) gin_trgm_ops', statement)
+        # دون pg_trgm (صلاحيات ناقصة) لا فهارس
+        schema_editor.reset_mock()
+        schema_editor.connection.cursor.return_value.__enter__.return_value.fetchone.return_value = None
+        migration.create_trigram_indexes(None, schema_editor)
+        schema_editor.execute.assert_not_called()
+        schema_editor.connection.vendor = 'sqlite'
+        migration.create_trigram_indexes(None, schema_editor)
+        migration.drop_trigram_indexes(None, schema_editor)
+        schema_editor.execute.assert_not_called()
+
+
+@override_settings(SESSION_ENGINE='core.sessions')
+class SessionMigrationTests(TestCase):
+    def setUp(self):
+        self.user = make_user('session@example.com')
+        legacy = DatabaseSessionStore()
+        legacy.update({
+            SESSION_KEY: str(self.user.pk),
+            BACKEND_SESSION_KEY: settings.AUTHENTICATION_BACKENDS[0],
+            HASH_SESSION_KEY: self.user.get_session_auth_hash(),
+        })
+        legacy.create()
+        self.legacy_key = legacy.session_key
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = self.legacy_key
+
+    def test_legacy_session_is_migrated_once(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        cookie = response.cookies[settings.SESSION_COOKIE_NAME].value
+        self.assertNotEqual(cookie, self.legacy_key)
+        self.assertFalse(Session.objects.filter(session_key=self.legacy_key).exists())
+        # الكوكي الموقّع يكفي وحده
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+
+    def test_logout_does_not_revive_legacy_key(self):
+        self.client.get(reverse('dashboard'))
+        response = self.client.get(reverse('logout'))
+        self.assertEqual(response.cookies[settings.SESSION_COOKIE_NAME].value, '')
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = self.legacy_key
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_cached_db_requires_shared_cache(self):
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db'):
+            self.assertEqual([error.id for error in checks.check_shared_caches(None)], ['core.E001'])
+            shared = dict(settings.CACHES, sessions={'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'x'})
+            with override_settings(CACHES=shared):
+                self.assertEqual(checks.check_shared_caches(None), [])
+
+
+class FAQSnapshotTests(TestCase):
+    def test_change_from_another_process_is_picked_up(self):
+        FAQ.objects.create(question='كيف أحجز موعداً؟', answer='من صفحة المستشار')
+        snapshot = faq_index.get_snapshot()
+        self.assertEqual(len(snapshot.entries), 1)
+        # عامل آخر كتب: لا إشارة ولا وسم في هذه العملية
+        FAQ.objects.bulk_create([FAQ(question='كيف ألغي الحجز؟', answer='من حجوزاتي')])
+        self.assertIs(faq_index.get_snapshot(), snapshot)
+        with override_settings(FAQ_SNAPSHOT_MAX_AGE=0):
+            faq_index.get_snapshot()
+        self.assertEqual([entry.answer for score, entry in faq_index.search('ألغي الحجز')], ['من حجوزاتي'])
+
+
+class PageCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.calls = 0
+
+        @page_cache.cache_anonymous_page(lambda request: ['faq', 'ads'])
+        def view(request):
+            self.calls += 1
+            return HttpResponse('ok')
+        self.view = view
+
+    def _get(self, path='/page-cache/', **params):
+        request = RequestFactory().get(path, params)
+        request.user = AnonymousUser()
+        request._messages = CookieStorage(request)
+        with override_settings(PAGE_CACHE_TIMEOUT=60):
+            return self.view(request)
+
+    def test_purge_by_tag(self):
+        self.assertEqual(self._get()['X-Page-Cache'], 'miss')
+        self.assertEqual(self._get()['X-Page-Cache'], 'hit')
+        page_cache.purge('consultants')
+        self.assertEqual(self._get()['X-Page-Cache'], 'hit')
+        page_cache.purge('ads')
+        self.assertEqual(self._get()['X-Page-Cache'], 'miss')
+        self.assertEqual(self.calls, 2)
+
+    def test_headers(self):
+        for response in (self._get(), self._get()):
+            self.assertEqual(response['Surrogate-Key'], 'faq ads')
+            self.assertIn('s-maxage=60', response['Cache-Control'])
+            self.assertIn('public', response['Cache-Control'])
+            self.assertIn('Cookie', response['Vary'])
+
+    def test_query_normalization(self):
+        self._get(b='2', a='1')
+        self.assertEqual(self._get(a='1', b='2', utm_source='x', fbclid='y', empty='')['X-Page-Cache'], 'hit')
+        self.assertEqual(self._get(a='1', b='3')['X-Page-Cache'], 'miss')
+        self.assertEqual(self.calls, 2)
+
+    def test_shared_cache_check(self):
+        with override_settings(PAGE_CACHE_TIMEOUT=60):
+            self.assertEqual([warning.id for warning in checks.check_page_cache(None)], ['core.W001'])
+        with override_settings(PAGE_CACHE_TIMEOUT=0):
+            self.assertEqual(checks.check_page_cache(None), [])
+
+
+class CacheRepopulationTests(SimpleTestCase):
+    def test_page_cache_miss_reads_primary(self):
+        seen = []
+
+        @page_cache.cache_anonymous_page(lambda request: ['faq'])
+        def view(request):
+            seen.append(db_router.is_pinned())
+            return HttpResponse('ok')
+
+        request = RequestFactory().get('/cache-repopulation/')
+        request.user = AnonymousUser()
+        request._messages = CookieStorage(request)
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        with override_settings(PAGE_CACHE_TIMEOUT=60):
+            self.assertEqual(view(request)['X-Page-Cache'], 'miss')
+            self.assertEqual(view(request)['X-Page-Cache'], 'hit')
+        self.assertEqual(seen, [True])
+        self.assertFalse(db_router.is_pinned())
+
+
+def shared_cache(testcase, alias):
+    """CACHES بذاكرة ملفات مشتركة بين العمليات في alias بدل LocMem."""
+    location = tempfile.mkdtemp(prefix=f'rafikni-test-{alias}-')
+    testcase.addCleanup(shutil.rmtree, location, ignore_errors=True)
+    return dict(settings.CACHES, **{alias: {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+    }})
+
+
+class NavbarTests(TestCase):
+    def test_role_switch_refreshes_snapshot(self):
+        user = make_user('navbar@example.com')
+        self.assertFalse(navbar.get_navbar(user)['is_provider'])
+        user.switch_role()
+        self.assertTrue(navbar.get_navbar(User.objects.get(pk=user.pk))['is_provider'])
+        # تحديث دون إشارات
+        User.objects.filter(pk=user.pk).update(role=User.Role.CLIENT)
+        self.assertFalse(navbar.get_navbar(User.objects.get(pk=user.pk))['is_provider'])
+
+    def _unread_after_silent_write(self, user):
+        navbar.get_navbar(user)
+        # كتابة من عامل آخر: لا إشارة تصل لذاكرة هذه العملية
+        Notification.objects.filter(user=user).update(is_read=False)
+        return navbar.get_navbar(user)['unread_notifications']
+
+    def test_process_local_cache_keeps_no_snapshot(self):
+        user = make_user('badges@example.com')
+        Notification.objects.create(user=user, message='m', is_read=True)
+        self.assertEqual(self._unread_after_silent_write(user), 1)
+
+    def test_shared_cache_keeps_snapshot(self):
+        user = make_user('badges@example.com')
+        Notification.objects.create(user=user, message='m', is_read=True)
+        with override_settings(CACHES=shared_cache(self, 'users')):
+            self.assertEqual(self._unread_after_silent_write(user), 0)
+            navbar.invalidate_navbar(user.pk)
+            self.assertEqual(navbar.get_navbar(user)['unread_notifications'], 1)
+
+
+class RatingFilterTests(TestCase):
+    def test_reviews_update_rating_filter_and_sort(self):
+        client = make_user('rater@example.com')
+        providers = []
+        for number, stars in enumerate((5, 3)):
+            user = make_user(f'rated{number}@example.com', role=User.Role.PROVIDER)
+            providers.append(Consultant.objects.create(user=user, bio='-'))
+            service = Service.objects.create(
+                provider=user, title=f'استشارة {number}', description='-', price=100, duration=timedelta(hours=1),
+            )
+            Review.objects.create(service=service, reviewer=client, rating=stars)
+
+        params = QueryDict('min_rating=4')
+        matching = facets.BrowseFilters(params).apply(Consultant.objects.all())
+        self.assertEqual(list(matching), [providers[0]])
+        self.assertEqual(
+            list(Consultant.objects.order_by('-rating', 'pk').values_list('rating', flat=True)), [5.0, 3.0],
+        )
+        Review.objects.filter(reviewer=client, rating=5).delete()
+        providers[0].refresh_from_db()
+        self.assertEqual(providers[0].rating, 0)
+
+
+class RankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_user('ranked-client@example.com')
+        cls.services = {}
+        for name, bookings in (('low', 1), ('high', 50)):
+            user = make_user(f'ranked-{name}@example.com', role=User.Role.PROVIDER)
+            Consultant.objects.create(user=user, bio='-')
+            cls.services[name] = Service.objects.create(
+                provider=user, title=name, description='-', price=100, duration=timedelta(hours=1),
+            )
+            Booking.objects.bulk_create([Booking(client=cls.customer, service=cls.services[name]) for _ in range(bookings)])
+        Review.objects.create(service=cls.services['high'], reviewer=cls.customer, rating=5)
+
+    def _scores(self):
+        return dict(Consultant.objects.values_list('user_id', 'rank_score'))
+
+    def _provider(self, name):
+        return self.services[name].provider_id
+
+    def assertScoresEqual(self, first, second):
+        self.assertEqual(first.keys(), second.keys())
+        for user_id in first:
+            self.assertAlmostEqual(first[user_id], second[user_id])
+
+    def test_partial_refresh_matches_full_recompute(self):
+        ranking.refresh()
+        full = self._scores()
+        self.assertLess(full[self._provider('low')], full[self._provider('high')])
+        Consultant.objects.update(rank_score=0)
+        # المرجع في القاعدة لا في ذاكرة العملية، ولا يُعاد مسح التقييمات
+        with CaptureQueriesContext(connection) as queries:
+            ranking.refresh_providers([self._provider('low')])
+        self.assertFalse([query for query in queries.captured_queries if 'AVG(' in query['sql'].upper()])
+        ranking.refresh_providers([self._provider('high')])
+        self.assertScoresEqual(self._scores(), full)
+
+    def test_partial_refresh_after_a_write(self):
+        ranking.refresh()
+        Booking.objects.create(client=self.customer, service=self.services['low'])
+        ranking.refresh_providers([self._provider('low')])
+        partial = self._scores()
+        ranking.refresh()
+        self.assertScoresEqual(partial, self._scores())
+
+    def test_first_partial_refresh_builds_the_baseline(self):
+        ranking.refresh_providers([self._provider('low')])
+        partial = self._scores()
+        self.assertTrue(RankingBaseline.objects.exists())
+        ranking.refresh()
+        self.assertScoresEqual(partial, self._scores())
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        law, tax = ServiceCategory.objects.create(name='قانون'), ServiceCategory.objects.create(name='ضرائب')
+        cls.consultants = {}
+        for name, category, available in (('a', law, True), ('b', law, True), ('c', tax, True), ('d', law, False)):
+            user = make_user(f'similar-{name}@example.com', role=User.Role.PROVIDER)
+            consultant = Consultant.objects.create(user=user, bio='-', available=available)
+            consultant.categories.add(category)
+            cls.consultants[name] = consultant
+        # عميل مشترك بين a و c فقط
+        customer = make_user('similar-client@example.com')
+        for name in ('a', 'c'):
+            service = Service.objects.create(
+                provider=cls.consultants[name].user, title=name, description='-', price=100, duration=timedelta(hours=1),
+            )
+            Booking.objects.create(client=customer, service=service)
+
+    def _neighbours(self, name):
+        names = {consultant.pk: key for key, consultant in self.consultants.items()}
+        return [
+            (names[similar_id], round(score, 2))
+            for similar_id, score in SimilarConsultant.objects.filter(consultant=self.consultants[name])
+            .order_by('rank').values_list('similar_id', 'score')
+        ]
+
+    def test_ranking_excludes_self_and_unavailable(self):
+        recommendations.rebuild(now=timezone.now())
+        # الحجز المشترك (0.55) يسبق التخصص المشترك (0.35)؛ d غير متاح فلا يُرشَّح
+        self.assertEqual(self._neighbours('a'), [('c', 0.55), ('b', 0.35)])
+        self.assertEqual(self._neighbours('b'), [('a', 0.35)])
+        self.assertEqual(self._neighbours('c'), [('a', 0.55)])
+        self.assertEqual(self._neighbours('d'), [('a', 0.35), ('b', 0.35)])
+
+    def test_rank_breaks_ties(self):
+        Consultant.objects.filter(pk=self.consultants['b'].pk).update(rank_score=0.8)
+        recommendations.rebuild(k=1)
+        self.assertEqual(self._neighbours('d'), [('b', 0.45)])
+
+    def test_rebuild_replaces_existing_rows(self):
+        a, d = self.consultants['a'], self.consultants['d']
+        SimilarConsultant.objects.create(consultant=a, similar=d, rank=0, score=1)
+        SimilarConsultant.objects.create(consultant=d, similar=d, rank=5, score=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('build_recommendations', stdout=StringIO())
+        self.assertFalse(SimilarConsultant.objects.filter(similar=d).exists())
+        self.assertEqual(SimilarConsultant.objects.count(), 6)
+        self.assertGreater(page_cache.tag_version('recommendations'), 0)
+
+
+class RerankPurgeTests(TestCase):
+    def test_purge_follows_refresh_after_commit(self):
+        user = make_user('reranked@example.com', role=User.Role.PROVIDER)
+        consultant = Consultant.objects.create(user=user, bio='-')
+        service = Service.objects.create(
+            provider=user, title='استشارة', description='-', price=100, duration=timedelta(hours=1),
+        )
+        ranking.refresh()
+        calls = mock.Mock()
+        with mock.patch('core.ranking.refresh', wraps=ranking.refresh) as refresh, \
+                mock.patch('core.page_cache.purge') as purge:
+            calls.attach_mock(refresh, 'refresh')
+            calls.attach_mock(purge, 'purge')
+            with self.captureOnCommitCallbacks(execute=True):
+                Review.objects.create(service=service, reviewer=make_user('rater@example.com'), rating=4)
+                purge.assert_not_called()
+        self.assertEqual(
+            [name for name, _, _ in calls.mock_calls], ['refresh', 'purge'],
+        )
+        purge.assert_called_once_with(f'consultant:{consultant.pk}', 'consultants')
+
+
+class ProviderUserPurgeTests(TestCase):
+    def setUp(self):
+        self.user = make_user('provider-login@example.com', role=User.Role.PROVIDER)
+        self.consultant = Consultant.objects.create(user=self.user, bio='-')
+        self.updated_at = Consultant.objects.get(pk=self.consultant.pk).updated_at
+
+    def test_login_keeps_provider_pages(self):
+        with mock.patch('core.page_cache.purge') as purge:
+            self.client.force_login(self.user)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        purge.assert_not_called()
+        self.assertEqual(Consultant.objects.get(pk=self.consultant.pk).updated_at, self.updated_at)
+
+    def test_full_save_purges_provider_pages(self):
+        with mock.patch('core.page_cache.purge') as purge:
+            self.user.save()
+        purge.assert_called_once_with(f'consultant:{self.consultant.pk}', 'consultants')
+        self.assertGreater(Consultant.objects.get(pk=self.consultant.pk).updated_at, self.updated_at)
+
+
+@override_settings(FACET_CACHE_TTL=3600, PAGE_CACHE_TIMEOUT=0)
+class FacetCacheTests(TestCase):
+    def setUp(self):
+        caches[settings.FACET_CACHE].clear()
+        self.consultant = Consultant.objects.create(
+            user=make_user('faceted@example.com', role=User.Role.PROVIDER), bio='-', rating=4,
+            next_free_slot_at=timezone.now() + timedelta(hours=2),
+        )
+
+    def _total_after_silent_write(self, query):
+        filters = facets.BrowseFilters(QueryDict(query))
+        first = facets.total_count(filters, filters.apply(Consultant.objects.all()))
+        # كتابة من عامل آخر: الإصدارات في ذاكرته هو
+        Consultant.objects.filter(pk=self.consultant.pk).update(rating=1)
+        return first, facets.total_count(filters, filters.apply(Consultant.objects.all()))
+
+    def test_process_local_cache_is_bounded_by_page_timeout(self):
+        self.assertEqual(self._total_after_silent_write('min_rating=3'), (1, 0))
+
+    def test_shared_cache_keeps_counts(self):
+        with override_settings(CACHES=shared_cache(self, 'pages')):
+            self.assertEqual(self._total_after_silent_write('min_rating=3'), (1, 1))
+
+    def test_available_within_is_not_kept_for_the_full_ttl(self):
+        with override_settings(CACHES=shared_cache(self, 'pages')):
+            filters = facets.BrowseFilters(QueryDict('available_within=today'))
+            self.assertEqual(facets._ttl(filters), 0)
+            self.assertEqual(self._total_after_silent_write('available_within=today&min_rating=3'), (1, 0))
+            with override_settings(PAGE_CACHE_TIMEOUT=300):
+                self.assertEqual(facets._ttl(filters), 300)
+
+
+class ImportConsultantsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='rafikni-test-import-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.law = ServiceCategory.objects.create(name='قانون')
+
+    def _write(self, rows, name='consultants.csv'):
+        path = Path(self.directory) / name
+        with open(path, 'w', encoding='utf-8', newline='') as fh:
+            writer = csv.DictWriter(fh, fieldnames=['email', 'full_name', 'bio', 'categories'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return str(path)
+
+    def _import(self, path, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_consultants', path, '--unusable-passwords', '--workers', '1', *args, stdout=stdout, stderr=stderr,
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_dedup_categories_and_missing_email(self):
+        make_user('existing@example.com')
+        path = self._write([
+            {'email': 'new@example.com', 'full_name': 'جديد', 'categories': 'قانون|ضرائب'},
+            {'email': 'NEW@example.com', 'full_name': 'مكرر'},
+            {'email': 'Existing@example.com'},
+            {'email': ' ', 'full_name': 'بلا بريد'},
+            {'full_name': 'بلا بريد أيضاً'},
+        ])
+        with mock.patch('core.page_cache.purge') as purge:
+            stdout, stderr = self._import(path)
+        self.assertIn('1 مستشار جديد', stdout)
+        self.assertIn('سطر بلا بريد تُخطّي: 4, 5', stderr)
+        consultant = Consultant.objects.get(user__email='new@example.com')
+        self.assertEqual(User.objects.filter(email__iexact='new@example.com').count(), 1)
+        self.assertEqual(sorted(consultant.categories.values_list('name', flat=True)), ['ضرائب', 'قانون'])
+        tax = ServiceCategory.objects.get(name='ضرائب')
+        self.assertEqual(
+            dict(ServiceCategory.objects.values_list('name', 'consultant_count')), {'قانون': 1, 'ضرائب': 1},
+        )
+        # bulk_create دون إشارات: الترتيب والصفحات تُحدَّث من الأمر نفسه
+        self.assertTrue(RankingBaseline.objects.exists())
+        self.assertGreater(Consultant.objects.get(pk=consultant.pk).rank_score, 0)
+        purged = set(purge.call_args.args)
+        self.assertTrue({'consultants', 'categories', f'category:{self.law.pk}', f'category:{tax.pk}'} <= purged)
+
+    def test_resume_after_last_completed_batch(self):
+        path = self._write([{'email': f'batch{number}@example.com'} for number in range(3)])
+        with open(f'{path}.progress', 'w') as fh:
+            fh.write('2')
+        stdout, _ = self._import(path, '--resume', '--batch-size', '2')
+        self.assertIn('متابعة بعد السطر 2', stdout)
+        self.assertEqual(list(User.objects.values_list('email', flat=True)), ['batch2@example.com'])
+        with open(f'{path}.progress') as fh:
+            self.assertEqual(fh.read(), '3')
+        # إعادة التشغيل كاملاً لا تكرر الموجود
+        self._import(path)
+        self.assertEqual(User.objects.count(), 3)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class DisposableDataCommandTests(TestCase):
+    def test_refuses_remote_database_with_data(self):
+        with mock.patch('core.management.base.is_disposable_database', return_value=False):
+            with self.assertRaisesMessage(CommandError, '--yes-i-am-sure'):
+                call_command('generate_synthetic_data', users=1, consultants=1, stdout=StringIO())
+            self.assertFalse(User.objects.exists())
+            call_command('bench_login', attempts=1, yes_i_am_sure=True, stdout=StringIO())
+
+    def test_local_database_is_disposable(self):
+        self.assertTrue(is_disposable_database())
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = make_user('archived-client@example.com')
+        cls.provider = make_user('archived-provider@example.com', role=User.Role.PROVIDER)
+        cls.service = Service.objects.create(
+            provider=cls.provider, title='خدمة مؤرشفة', description='-', price=50, duration=timedelta(hours=1),
+        )
+        cls.later = timezone.now() + timedelta(days=3650)
+
+    def _consultation(self, hours_ago, status=Consultation.Status.COMPLETED):
+        start = timezone.now() - timedelta(hours=hours_ago)
+        slot = ConsultationSlot.objects.create(provider=self.provider, start_time=start, end_time=start + timedelta(hours=1))
+        consultation = Consultation.objects.create(slot=slot, client=self.client_user, service=self.service, status=status)
+        Consultation.objects.filter(pk=consultation.pk).update(created_at=start)
+        return consultation
+
+    def test_move_clears_document_links_and_keeps_history(self):
+        consultation = self._consultation(48)
+        request = ConsultationRequest.objects.create(
+            client=self.client_user, consultant=self.provider, question='؟', status='completed',
+        )
+        document = Document.objects.create(
+            user=self.client_user, title='عقد', file='documents/contract.pdf',
+            consultation=consultation, consultation_request=request,
+        )
+        moved = archive.archive(now=self.later)
+        self.assertEqual((moved['consultations'], moved['requests'], moved['slots']), (1, 1, 1))
+        self.assertFalse(Consultation.objects.exists())
+        document.refresh_from_db()
+        self.assertEqual((document.consultation_id, document.consultation_request_id), (None, None))
+        self.assertTrue(ArchivedConsultation.objects.filter(pk=consultation.pk, provider=self.provider).exists())
+
+    def test_history_pages_merge_in_sql_order(self):
+        for hours in (10, 30, 50, 70, 90):
+            self._consultation(hours)
+        archive.archive(now=self.later)
+        for hours in (20, 40, 60):
+            self._consultation(hours, status=Consultation.Status.CONFIRMED)
+        def history():
+            return archive.with_history(Consultation.objects.all(), ArchivedConsultation.objects.all())
+
+        expected = sorted(history(), key=lambda row: row.created_at, reverse=True)
+        self.assertEqual(len(history()), 8)
+        with self.assertNumQueries(2):
+            page = history()[3:6]
+        self.assertEqual([(type(row), row.pk) for row in page], [(type(row), row.pk) for row in expected[3:6]])
+
+    def test_appointment_history_view(self):
+        self._consultation(48)
+        archive.archive(now=self.later)
+        live = self._consultation(2, status=Consultation.Status.CONFIRMED)
+        self.client.force_login(self.client_user)
+        response = self.client.get(reverse('appointment_list'))
+        self.assertEqual([row.pk for row in response.context['appointments']], [live.pk])
+        response = self.client.get(reverse('appointment_list'), {'history': '1'})
+        self.assertEqual(len(response.context['appointments']), 2)
+        self.assertContains(response, 'مؤرشف')
+
+
+@override_settings(SEARCH_ANALYTICS=dict(settings.SEARCH_ANALYTICS, enabled=True))
+class SearchAnalyticsTests(TestCase):
+    def setUp(self):
+        search_analytics.buffer.flush()
+        self.addCleanup(search_analytics.buffer.flush)
+        self.consultant = Consultant.objects.create(
+            user=make_user('searched@example.com', role=User.Role.PROVIDER), bio='-',
+        )
+
+    def _pending_searches(self):
+        return {key[1]: counters[0] for key, counters in search_analytics.buffer._queries.items()}
+
+    def test_autocomplete_counts_only_the_selection(self):
+        for term in ('مح', 'محا', 'محاس'):
+            self.client.get(reverse('autocomplete_consultants'), {'term': term})
+        self.assertEqual(self._pending_searches(), {})
+        self.client.post(reverse('search_click'), {
+            'source': 'autocomplete', 'q': 'محاس', 'consultant': self.consultant.pk,
+        })
+        self.assertEqual(self._pending_searches(), {'محاس': 1})
+
+    def test_failed_flush_keeps_counters(self):
+        search_analytics.record_click('browse', 'قانون', self.consultant.pk)
+        with mock.patch.object(search_analytics.Consultant.objects, 'filter', side_effect=DatabaseError):
+            with self.assertLogs('core.search_analytics', 'ERROR'):
+                self.assertEqual(search_analytics.buffer.flush(), 0)
+        self.assertEqual(search_analytics.buffer.pending(), (1, 1))
+        self.assertEqual(search_analytics.buffer.flush(), 2)
+        self.assertEqual(SearchClickStat.objects.get().clicks, 1)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EmailAuthenticationTests(TestCase):
+    def setUp(self):
+        caches[settings.LOGIN_THROTTLE_CACHE].clear()
+        self.user = User.objects.create_user('Mixed.Case@Example.com', 'mixed', '0500000000', 'pass-12345')
+        self.backend = backends.EmailAuthBackend()
+
+    def _hashing(self):
+        """مراقبة verify و encode في مجزّئ الاختبار؛ verify يستدعي encode مرة، فـ encode يعدّ كل تجزئة."""
+        return (
+            mock.patch.object(MD5PasswordHasher, 'verify', autospec=True, side_effect=MD5PasswordHasher.verify),
+            mock.patch.object(MD5PasswordHasher, 'encode', autospec=True, side_effect=MD5PasswordHasher.encode),
+        )
+
+    def test_case_insensitive_lookup(self):
+        self.assertEqual(self.backend.authenticate(None, email='  mixed.case@EXAMPLE.com ', password='pass-12345'), self.user)
+        self.assertEqual(self.backend.authenticate(None, username='MIXED.CASE@example.com', password='pass-12345'), self.user)
+        self.assertIsNone(self.backend.authenticate(None, email='mixed.case@example.com', password='wrong'))
+
+    def test_single_hashing_pass(self):
+        verify, encode = self._hashing()
+        with verify as verified, encode as encoded:
+            response = self.client.post(reverse('login'), {'email': 'mixed.case@example.com', 'password': 'pass-12345'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual((verified.call_count, encoded.call_count), (1, 1))
+
+    def test_unknown_email_hashes_a_dummy_password(self):
+        verify, encode = self._hashing()
+        with verify as verified, encode as encoded:
+            self.assertIsNone(self.backend.authenticate(None, email='nobody@example.com', password='pass-12345'))
+        self.assertEqual((verified.call_count, encoded.call_count), (0, 1))
+
+    def test_inactive_user_cannot_log_in(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(self.backend.authenticate(None, email='mixed.case@example.com', password='pass-12345'))
+        response = self.client.post(reverse('login'), {'email': 'mixed.case@example.com', 'password': 'pass-12345'})
+        self.assertNotIn('_auth_user_id', self.client.session)
+        self.assertEqual(response.status_code, 200)
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        self.user = make_user('cached@example.com')
+        backends._user_cache.clear()
+        self.addCleanup(backends._user_cache.clear)
+
+    def test_process_local_version_cache_disables_copies(self):
+        backend = backends.EmailAuthBackend()
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                backend.get_user(self.user.pk)
+
+    def test_copies_do_not_share_related_objects(self):
+        Profile.objects.create(user=self.user, bio='قبل')
+        backend = backends.EmailAuthBackend()
+        with override_settings(CACHES=shared_cache(self, 'users')):
+            first = backend.get_user(self.user.pk)
+            first.profile.bio = 'تعديل في طلب آخر'
+            first.full_name = 'تعديل'
+            second = backend.get_user(self.user.pk)
+            self.assertEqual(second.profile.bio, 'قبل')
+            self.assertEqual(second.full_name, self.user.full_name)
+            self.assertIsNot(backend.get_user(self.user.pk).profile, second.profile)
+
+    def test_inactive_user_is_not_loaded(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(backends.EmailAuthBackend().get_user(self.user.pk))
+
+    def test_shared_version_cache_invalidates_copies(self):
+        backend = backends.EmailAuthBackend()
+        with override_settings(CACHES=shared_cache(self, 'users')):
+            backend.get_user(self.user.pk)
+            with self.assertNumQueries(0):
+                backend.get_user(self.user.pk)
+            # عملية أخرى حفظت المستخدم: الإصدار المشترك تغيّر ونسخة هذه العملية باقية
+            User.objects.filter(pk=self.user.pk).update(full_name='اسم جديد')
+            caches['users'].set(backends._version_key(self.user.pk), backends.get_user_version(self.user.pk) + 1, None)
+            self.assertEqual(backend.get_user(self.user.pk).full_name, 'اسم جديد')
+
+
+class DbPoolTests(TestCase):
+    STATS = {
+        'pool_min': 2, 'pool_max': 4, 'pool_size': 4, 'pool_available': 1, 'requests_waiting': 3,
+        'requests_num': 50, 'requests_queued': 4, 'requests_wait_ms': 30, 'connections_num': 5,
+    }
+
+    def _stats(self, stats):
+        pool = mock.Mock(get_stats=mock.Mock(return_value=stats))
+        with mock.patch('core.db_pool._pool', return_value=pool):
+            return db_pool.pool_stats(DEFAULT_DB_ALIAS)
+
+    def test_without_pool(self):
+        with mock.patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0}):
+            self.assertEqual(db_pool.pool_stats(DEFAULT_DB_ALIAS)['mode'], 'per-request')
+        with mock.patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True}):
+            self.assertEqual(db_pool.pool_stats(DEFAULT_DB_ALIAS), {
+                'mode': 'persistent', 'conn_max_age': 600, 'health_checks': True,
+            })
+
+    def test_pool_stats(self):
+        stats = self._stats(self.STATS)
+        self.assertEqual(stats['mode'], 'pool')
+        self.assertEqual((stats['in_use'], stats['available'], stats['waiting']), (3, 1, 3))
+        self.assertEqual(stats['saturation'], 0.75)
+        self.assertEqual(stats['wait_ms_avg_queued'], 7.5)
+        self.assertEqual(stats['checkout_errors'], 0)
+
+    def test_empty_pool_stats(self):
+        stats = self._stats({'pool_max': 0})
+        self.assertEqual((stats['saturation'], stats['in_use'], stats['wait_ms_avg_queued']), (0, 0, 0))
+
+    def test_stats_view_is_staff_only(self):
+        url = reverse('db_pool_stats')
+        self.client.force_login(make_user('not-staff@example.com'))
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = make_user('staff@example.com')
+        User.objects.filter(pk=staff.pk).update(is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).json()[DEFAULT_DB_ALIAS], db_pool.pool_stats(DEFAULT_DB_ALIAS))
+
+    def test_bench_requires_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command('bench_db_pool', seconds=0, stdout=StringIO())
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """نسخة قراءة replica_0 على قاعدة الاختبار نفسها (MIRROR)."""
+
+    # النسخة تُضاف في setUpClass، بعد أن جمع المشغّل قواعد الاختبار
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        config = copy.deepcopy(connections[DEFAULT_DB_ALIAS].settings_dict)
+        config['TEST'] = dict(config['TEST'], MIRROR=DEFAULT_DB_ALIAS)
+        for databases in (settings.DATABASES, connections.settings):
+            patcher = mock.patch.dict(databases, {'replica_0': config})
+            patcher.start()
+            cls.addClassCleanup(patcher.stop)
+        cls.addClassCleanup(connections.__delitem__, 'replica_0')
+        cls.addClassCleanup(lambda: connections['replica_0'].close())
+        super().setUpClass()
+
+    def setUp(self):
+        patcher = mock.patch.object(db_router.health, '_checked', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = make_user('routed@example.com')
+
+    def _request(self, view, method='get', cookies=None):
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        return db_router.ReplicaPinMiddleware(view)(request)
+
+    def _recording_view(self, aliases, write=False):
+        def view(request):
+            aliases.append(db_router.read_alias())
+            if write:
+                User.objects.filter(pk=self.user.pk).update(full_name='كتابة')
+            aliases.append(db_router.read_alias())
+            return HttpResponse()
+        return view
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(db_router.read_alias(), 'replica_0')
+        self.assertEqual(User.objects.filter(pk=self.user.pk).db, 'replica_0')
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+        with db_router.use_primary():
+            self.assertEqual(db_router.read_alias(), DEFAULT_DB_ALIAS)
+
+    @override_settings(REPLICA_PIN_SECONDS=10)
+    def test_write_pins_request_and_sets_cookie(self):
+        aliases = []
+        response = self._request(self._recording_view(aliases, write=True))
+        self.assertEqual(aliases, ['replica_0', DEFAULT_DB_ALIAS])
+        cookie = response.cookies[db_router.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+        self.assertTrue(cookie['httponly'])
+        self.assertGreater(int(cookie.value), timezone.now().timestamp())
+        # التثبيت ينتهي بانتهاء الطلب
+        self.assertFalse(db_router.is_pinned())
+
+    def test_read_only_request_sets_no_cookie(self):
+        aliases = []
+        response = self._request(self._recording_view(aliases))
+        self.assertEqual(aliases, ['replica_0', 'replica_0'])
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+    def test_pin_cookie(self):
+        now = int(timezone.now().timestamp())
+        for value, expected in ((now + 60, DEFAULT_DB_ALIAS), (now - 1, 'replica_0'), ('x', 'replica_0')):
+            aliases = []
+            self._request(self._recording_view(aliases), cookies={db_router.PIN_COOKIE: str(value)})
+            self.assertEqual(aliases[0], expected, value)
+
+    def test_unsafe_method_reads_primary(self):
+        aliases = []
+        response = self._request(self._recording_view(aliases), method='post')
+        self.assertEqual(aliases, [DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS])
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+    @override_settings(REPLICA_HEALTH={'interval': 60, 'max_lag': 10})
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        with mock.patch.object(db_router.health, '_probe', side_effect=DatabaseError) as probe, \
+                self.assertLogs('core.db_router', 'WARNING'):
+            self.assertEqual(db_router.read_alias(), DEFAULT_DB_ALIAS)
+            # النتيجة محفوظة حتى الفحص التالي
+            self.assertEqual(db_router.read_alias(), DEFAULT_DB_ALIAS)
+        probe.assert_called_once_with('replica_0')
+        self.assertEqual(db_router.health.status(), {'replica_0': False})
+
+    def test_no_replicas_is_noop(self):
+        aliases = []
+        with mock.patch('core.db_router.replicas', return_value=[]):
+            response = self._request(self._recording_view(aliases, write=True))
+        self.assertEqual(aliases, [DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS])
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
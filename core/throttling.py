@@ -0,0 +1,153 @@
+"""تحديد معدل محاولات الدخول والتسجيل قبل أي تجزئة لكلمة المرور.
+
+نافذة منزلقة لكل IP ولكل بريد (capacity محاولة، تتجدد بمعدل per_minute). العدّادات
+في جدول ThrottleCounter، تُزاد بـ UPDATE ... SET count = count + 1 فيراها كل العمال
+ولا تضيع محاولة بين قراءة وكتابة؛ أمر purge_throttle يحذف المنتهي منها.
+ذاكرة 'throttle' تحفظ السياسة لثوانٍ والإحصاءات التقريبية فقط.
+القيم قابلة للتعديل من لوحة الإدارة (LoginThrottlePolicy) دون إعادة نشر.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.db.models import F
+
+POLICY_CACHE_SECONDS = 30
+STAT_NAMES = ('allowed', 'rejected_ip', 'rejected_email')
+
+
+def _cache():
+    return caches[settings.LOGIN_THROTTLE_CACHE]
+
+
+def client_ip(request):
+    """عنوان العميل؛ X-Forwarded-For يُعتمد فقط خلف عدد معروف من الوكلاء الموثوقين.
+
+    كل وكيل يضيف عنوان من اتصل به إلى نهاية الترويس، وأوله يكتبه العميل كما يشاء؛
+    فالعنوان الصحيح هو N من اليمين حيث N = LOGIN_THROTTLE_TRUSTED_PROXIES.
+    """
+    proxies = settings.LOGIN_THROTTLE_TRUSTED_PROXIES
+    if proxies > 0:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def get_policy(scope):
+    """سياسة النطاق ('login' أو 'register') من قاعدة البيانات، وإلا من الإعدادات."""
+    cache = _cache()
+    key = f'throttle:policy:{scope}'
+    policy = cache.get(key)
+    if policy is None:
+        from .models import LoginThrottlePolicy
+
+        row = LoginThrottlePolicy.objects.filter(scope=scope).first()
+        policy = row.as_dict() if row else dict(settings.LOGIN_THROTTLE[scope])
+        cache.set(key, policy, POLICY_CACHE_SECONDS)
+    return policy
+
+
+def clear_policy(scope):
+    _cache().delete(f'throttle:policy:{scope}')
+
+
+def _window(capacity, per_minute):
+    """مدة النافذة بالثواني: زمن امتلاء الدلو من الصفر."""
+    return capacity * 60 / per_minute
+
+
+def _incr(key, expires_at):
+    """يزيد عدّاد key ذرياً ويعيد قيمته بعد الزيادة.
+
+    UPDATE يقفل الصف حتى نهاية المعاملة، فالمحاولات المتزامنة تُرقَّم واحدة
+    تلو الأخرى ولا تقرأ اثنتان نفس القيمة كما في get ثم set.
+    """
+    from .models import ThrottleCounter
+
+    using = router.db_for_write(ThrottleCounter)
+    counters = ThrottleCounter.objects.using(using)
+    with transaction.atomic(using=using):
+        counters.bulk_create([ThrottleCounter(key=key, expires_at=expires_at)], ignore_conflicts=True)
+        counters.filter(key=key).update(count=F('count') + 1)
+        return counters.filter(key=key).values_list('count', flat=True).get()
+
+
+def _take(key, capacity, per_minute):
+    """يعدّ المحاولة في نافذة منزلقة ويعيد False إذا تجاوزت capacity.
+
+    المحاولات المرفوضة تُعدّ أيضاً فيبقى من يواصل الإغراق محجوباً.
+    """
+    if capacity <= 0 or per_minute <= 0:
+        return True
+    from .models import ThrottleCounter
+
+    window = _window(capacity, per_minute)
+    now = time.time()
+    index = int(now // window)
+    expires_at = datetime.fromtimestamp((index + 2) * window, dt_timezone.utc)
+    count = _incr(f'{key}:{index}', expires_at)
+    # تقدير النافذة المنزلقة: ما تبقى من النافذة السابقة بنسبة تداخلها
+    previous = (
+        ThrottleCounter.objects.using(router.db_for_write(ThrottleCounter))
+        .filter(key=f'{key}:{index - 1}').values_list('count', flat=True).first() or 0
+    )
+    overlap = 1 - (now - index * window) / window
+    return count + previous * overlap <= capacity
+
+
+def purge_expired(batch_size=5000):
+    """يحذف عدّادات النوافذ المنتهية على دفعات ويعيد عددها."""
+    from .models import ThrottleCounter
+
+    counters = ThrottleCounter.objects.using(router.db_for_write(ThrottleCounter))
+    now = datetime.now(dt_timezone.utc)
+    total = 0
+    while pks := list(counters.filter(expires_at__lt=now).values_list('pk', flat=True)[:batch_size]):
+        total += counters.filter(pk__in=pks).delete()[0]
+    return total
+
+
+def retry_after(scope, reason):
+    """ثوانٍ حتى تخرج المحاولات الحالية من نافذة الدلو الذي نفد ('ip' أو 'email')."""
+    policy = get_policy(scope)
+    return int(_window(policy[f'{reason}_capacity'], policy[f'{reason}_per_minute'])) + 1
+
+
+def _count(scope, name):
+    cache = _cache()
+    key = f'throttle:stats:{scope}:{name}'
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def check(request, scope, email=None):
+    """يعيد None إذا سُمح بالمحاولة، أو 'ip'/'email' حسب الدلو الذي نفد."""
+    policy = get_policy(scope)
+    if not policy['enabled']:
+        return None
+    ip = client_ip(request) if request is not None else ''
+    if ip and not _take(f'throttle:{scope}:ip:{ip}', policy['ip_capacity'], policy['ip_per_minute']):
+        _count(scope, 'rejected_ip')
+        return 'ip'
+    if email:
+        digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        if not _take(f'throttle:{scope}:email:{digest}', policy['email_capacity'], policy['email_per_minute']):
+            _count(scope, 'rejected_email')
+            return 'email'
+    _count(scope, 'allowed')
+    return None
+
+
+def stats():
+    cache = _cache()
+    return {
+        scope: {name: cache.get(f'throttle:stats:{scope}:{name}', 0) for name in STAT_NAMES}
+        for scope in settings.LOGIN_THROTTLE
+    }
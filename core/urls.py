@@ -23,6 +23,7 @@ urlpatterns = [
     path('services/create/', views.create_service, name='create_service'),
     path('services/update/<int:pk>/', views.update_service, name='update_service'),
     path('service/<int:pk>/', views.service_detail, name='service_detail'),
+    path('services/search/', views.search_services, name='search_services'),
     # Consultation Slot URLs
     path('slots/', views.slot_list, name='slot_list'),
     path('slots/create/', views.create_slot, name='create_slot'),
@@ -37,11 +38,13 @@ urlpatterns = [
     # Document Management URLs
     path('documents/', views.document_list, name='document_list'),
     path('documents/upload/', views.upload_document, name='upload_document'),
+    path('documents/<int:pk>/download/', views.download_document, name='download_document'),
     path('documents/delete/<int:pk>/', views.delete_document, name='delete_document'),
     
     # Consultation System URLs
     path('consultations/', views.consultation_list, name='consultation_list'),
     path('consultations/<int:pk>/', views.consultation_detail, name='consultation_detail'),
+    path('appointments/', views.appointment_list, name='appointment_list'),
     path('consultations/<int:pk>/respond/', views.respond_to_consultation, name='respond_consultation'),
     
     # Booking URLs
@@ -54,6 +57,7 @@ urlpatterns = [
     
     # FAQ URL
     path('faq/', views.faq_list, name='faq_list'),
+    path('faq/search/', views.faq_search, name='faq_search'),
     
     # Home URL
     path('', views.home, name='home'),
@@ -63,6 +67,12 @@ urlpatterns = [
     
     # Autocomplete
     path('consultants/autocomplete/', views.autocomplete_consultants, name='autocomplete_consultants'),
+    path('search/click/', views.search_click, name='search_click'),
+    
+    # Login throttling counters (staff)
+    path('internal/throttle-stats/', views.throttle_stats, name='throttle_stats'),
+    path('internal/db-pool-stats/', views.db_pool_stats, name='db_pool_stats'),
+    path('internal/search-report/', views.search_report, name='search_report'),
     
     # Error Handler
     path('404/', views.handler404),
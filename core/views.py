@@ -1,14 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404 
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Q, Count, Avg
+from django.db.models import Q, Count, Avg, Max, F
 from django.core.paginator import Paginator
 from .models import (
     User, Profile, Service, ServiceCategory, 
     ConsultationSlot, Consultation, Document,
     Notification, Review, Advertisement, FAQ,
-    ConsultationRequest, Consultant, Booking
+    ConsultationRequest, Consultant, Booking, SimilarConsultant,
+    ArchivedBooking, ArchivedConsultation, ArchivedConsultationRequest,
 )
 from .forms import (
     UserRegistrationForm, UserLoginForm,
@@ -17,15 +19,23 @@ from .forms import (
 )
 from django.utils.text import slugify
 import uuid
-from django.contrib.auth import login, logout, authenticate
-from django.http import JsonResponse
+from django.contrib.auth import login, logout
+from django.http import HttpResponse, JsonResponse, Http404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.db.models.functions import Coalesce
 from django.db import transaction
 from datetime import timedelta
+from .downloads import serve_document
+from . import archive, db_pool, facets, faq_index, search, search_analytics, throttling
+from .search_analytics import track_search
+from .page_cache import cache_anonymous_page, tag_version
+from .conditional import conditional_page, hour_floor
+from .navbar import get_navbar, invalidate_navbar
 # ---- المصادقة والملف الشخصي ---- #
 def register(request):
     if request.method == 'POST':
-        form = UserRegistrationForm(request.POST)
+        form = UserRegistrationForm(request.POST, request=request)
         if form.is_valid():
             user = form.save(commit=False)
             user.username = user.email  # حتى لو ما تستخدم username
@@ -33,19 +43,10 @@ def register(request):
 
             Profile.objects.get_or_create(user=user)  # إنشاء البروفايل
 
-            authenticated_user = authenticate(
-                request,
-                username=user.email,
-                password=form.cleaned_data['password1']
-                )
-
-            if authenticated_user is not None:
-                login(request, authenticated_user)
-                messages.success(request, 'تم تسجيل الحساب بنجاح!')
-                return redirect('dashboard')
-            else:
-                messages.error(request, 'حدث خطأ في المصادقة التلقائية. يرجى تسجيل الدخول يدويًا.')
-                return redirect('login')
+            # كلمة المرور تحققنا منها للتو؛ لا حاجة لتجزئتها مرة ثانية عبر authenticate
+            login(request, user, backend='core.backends.EmailAuthBackend')
+            messages.success(request, 'تم تسجيل الحساب بنجاح!')
+            return redirect('dashboard')
         else:
             for field, errors in form.errors.items():
                 for error in errors:
@@ -53,12 +54,12 @@ def register(request):
     else:
         form = UserRegistrationForm()
 
-    return render(request, 'auth/register.html', {'form': form})
+    return _throttled_render(request, 'auth/register.html', form, 'register')
 
 def user_login(request):
     if request.method == 'POST':
         # التعديل هنا: إزالة وسيط request
-        form = UserLoginForm(request.POST)  # كان: form = UserLoginForm(request, data=request.POST)
+        form = UserLoginForm(request.POST, request=request)  # كان: form = UserLoginForm(request, data=request.POST)
 
         if form.is_valid():
             user = form.cleaned_data['user']
@@ -89,7 +90,16 @@ def user_login(request):
     else:
         form = UserLoginForm()
 
-    return render(request, 'auth/login.html', {'form': form})
+    return _throttled_render(request, 'auth/login.html', form, 'login')
+
+
+def _throttled_render(request, template, form, scope):
+    """النموذج مع 429 و Retry-After إذا رُفضت المحاولة بسبب الحد (core.throttling)."""
+    response = render(request, template, {'form': form})
+    if getattr(form, 'throttled', None):
+        response.status_code = 429
+        response['Retry-After'] = throttling.retry_after(scope, form.throttled)
+    return response
 
 @login_required
 def profile(request):
@@ -271,10 +281,7 @@ def provider_dashboard(request):
                 'active_consultations': active_consultations,
                 'active_bookings': active_bookings,
                 'documents_count': documents.count(),
-                'unread_notifications': Notification.objects.filter(
-                    user=request.user,
-                    is_read=False
-                ).count(),
+                'unread_notifications': get_navbar(request.user)['unread_notifications'],
                 'upcoming_consultations': upcoming_consultations,
                 'upcoming_bookings': upcoming_bookings,
                 'important_documents': important_documents,
@@ -307,10 +314,7 @@ def client_dashboard(request):
                 slot__start_time__gte=timezone.now()
             ).count(),
             'documents_count': documents.count(),
-            'unread_notifications': Notification.objects.filter(
-                user=request.user,
-                is_read=False
-            ).count(),
+            'unread_notifications': get_navbar(request.user)['unread_notifications'],
             'upcoming_consultations': consultations.filter(
                 slot__start_time__gte=timezone.now(),
                 status='confirmed'
@@ -438,28 +442,36 @@ def create_slot(request):
     return render(request, 'consultations/create_slot.html', {'form': form})
 
 # ---- البحث والاكتشاف ---- #
+def _browse_tags(request):
+    tags = ['consultants', 'categories', 'ads']
+    tags += [f'category:{c}' for c in request.GET.getlist('category') if c.isdigit()]
+    return tags
+
+# خيارات الترتيب: (العنوان، ترتيب الاستعلام)؛ rank_score من core.ranking
+BROWSE_SORTS = {
+    'best': ('الأنسب', ('-rank_score', 'pk')),
+    'rating': ('الأعلى تقييماً', ('-rating', 'pk')),
+    'soonest': ('أقرب موعد متاح', (F('next_free_slot_at').asc(nulls_last=True), 'pk')),
+}
+
+@track_search('browse')
+@cache_anonymous_page(_browse_tags)
 def browse_consultants(request):
-    category_id = request.GET.get('category')
-    query = request.GET.get('q')
+    filters = facets.BrowseFilters(request.GET)
+    sort = request.GET.get('sort')
+    if sort not in BROWSE_SORTS:
+        sort = 'best'
+    consultants = filters.apply(
+        Consultant.objects.select_related('user__profile').prefetch_related('categories')
+    ).order_by(*BROWSE_SORTS[sort][1])
     
-    consultants = Consultant.objects.filter(available=True).select_related('user__profile')
+    counts = facets.category_counts(filters)
+    categories = sorted(ServiceCategory.objects.all(), key=lambda c: -counts.get(c.pk, 0))
+    for category in categories:
+        category.consultant_count = counts.get(category.pk, 0)
     
-    if category_id:
-        consultants = consultants.filter(categories__id=category_id)
-    
-    if query:
-        consultants = consultants.filter(
-            Q(user__full_name__icontains=query) |
-            Q(user__first_name__icontains=query) |
-            Q(user__last_name__icontains=query) |
-            Q(categories__name__icontains=query)
-        ).distinct()
-    
-    categories = ServiceCategory.objects.annotate(
-        consultant_count=Count('consultant')
-    ).order_by('-consultant_count')
-    
-    paginator = Paginator(consultants, 10)
+    total = facets.total_count(filters, consultants)
+    paginator = facets.CountedPaginator(consultants, 10, total)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -469,16 +481,42 @@ def browse_consultants(request):
         end_date__gte=timezone.now().date()
     ).order_by('?')[:2]
     
-    return render(request, 'consultants/list.html', {
+    # معاملات الفلاتر الحالية لروابط الترقيم
+    filter_params = request.GET.copy()
+    filter_params.pop('page', None)
+    
+    response = render(request, 'consultants/list.html', {
         'consultants': page_obj,
         'categories': categories,
-        'selected_category': int(category_id) if category_id else None,
-        'search_query': query or '',
+        'selected_categories': filters.categories,
+        'selected_category': next((c for c in categories if c.pk in filters.categories), None),
+        'search_query': filters.query,
+        'price_min': filters.price_min if filters.price_min is not None else '',
+        'price_max': filters.price_max if filters.price_max is not None else '',
+        'min_rating': filters.min_rating,
+        'available_within': request.GET.get('available_within', ''),
+        'sort': sort,
+        'sort_options': [(key, label) for key, (label, _) in BROWSE_SORTS.items()],
+        'filter_query': filter_params.urlencode(),
         'active_ads': active_ads
     })
+    if filters.query:
+        response[search_analytics.RESULTS_HEADER] = total
+    return response
+
 
 
+def _consultant_validator(request, pk):
+    updated_at = Consultant.objects.filter(pk=pk, available=True).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    # المواعيد المعروضة تنقضي مع الوقت
+    hour = hour_floor()
+    recommendations = tag_version('recommendations')
+    return f'{updated_at.timestamp()}-{hour:%H}-{recommendations}', max(updated_at, hour)
 
+@conditional_page(_consultant_validator)
+@cache_anonymous_page(lambda request, pk: [f'consultant:{pk}', 'ads', 'recommendations'])
 def consultant_detail(request, pk):
     consultant = get_object_or_404(Consultant, pk=pk, available=True)
     services = Service.objects.filter(provider=consultant.user, is_active=True)
@@ -537,6 +575,11 @@ def consultant_detail(request, pk):
         start_date__lte=timezone.now().date(),
         end_date__gte=timezone.now().date()
     ).order_by('?')[:1]
+
+    # مستشارون مشابهون (build_recommendations) باستعلام واحد على (consultant_id, rank)
+    similar_consultants = SimilarConsultant.objects.filter(
+        consultant=consultant, similar__available=True
+    ).select_related('similar__user').order_by('rank')
     
     return render(request, 'consultants/detail.html', {
         'consultant': consultant,
@@ -548,7 +591,8 @@ def consultant_detail(request, pk):
         'form': form,
         'active_ads': active_ads,
         'week_dates': week_dates,
-        'selected_date': selected_date
+        'selected_date': selected_date,
+        'similar_consultants': similar_consultants,
     })
 
 # ---- إدارة الوثائق ---- #
@@ -560,7 +604,7 @@ def document_list(request):
 @login_required
 def upload_document(request):
     if request.method == 'POST':
-        form = DocumentForm(request.POST, request.FILES)
+        form = DocumentForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
             document = form.save(commit=False)
             document.user = request.user
@@ -568,9 +612,17 @@ def upload_document(request):
             messages.success(request, 'تم رفع الوثيقة بنجاح!')
             return redirect('document_list')
     else:
-        form = DocumentForm()
+        form = DocumentForm(user=request.user)
     return render(request, 'documents/upload.html', {'form': form})
 
+@login_required
+def download_document(request, pk):
+    document = get_object_or_404(Document, pk=pk)
+    # لا نكشف وجود الوثيقة لغير المخوّلين
+    if not document.can_access(request.user):
+        raise Http404
+    return serve_document(request, document)
+
 @login_required
 def delete_document(request, pk):
     document = get_object_or_404(Document, pk=pk, user=request.user)
@@ -673,10 +725,13 @@ def notifications(request):
             user=request.user, 
             is_read=False
         ).update(is_read=True)
+        # update() لا يُطلق إشارات
+        invalidate_navbar(request.user.pk)
 
     # معالجة طلبات تعليم الكل كمقروء أو حذف الكل
     if 'mark_all' in request.GET:
         Notification.objects.filter(user=request.user).update(is_read=True)
+        invalidate_navbar(request.user.pk)
         messages.success(request, 'تم تعليم جميع الإشعارات كمقروءة')
         return redirect('notifications')
     
@@ -692,9 +747,17 @@ def notifications(request):
     })
 
 # ---- الأسئلة الشائعة ---- #
+def _faq_validator(request):
+    # العدد يكشف الحذف الذي لا يغيّر أحدث updated_at
+    stats = FAQ.objects.aggregate(last=Max('updated_at'), count=Count('pk'))
+    return f"{stats['count']}-{stats['last'] and stats['last'].timestamp()}", stats['last']
+
+@conditional_page(_faq_validator)
+@cache_anonymous_page(lambda request: ['faq', 'ads'])
 def faq_list(request):
-    featured_faqs = FAQ.objects.filter(is_featured=True).order_by('question')
-    other_faqs = FAQ.objects.filter(is_featured=False).order_by('question')
+    snapshot = faq_index.get_snapshot()
+    featured_faqs = snapshot.featured
+    other_faqs = snapshot.others
     
     # الحصول على الإعلانات النشطة
     active_ads = Advertisement.objects.filter(
@@ -709,6 +772,7 @@ def faq_list(request):
         'active_ads': active_ads
     })
 
+@cache_anonymous_page(lambda request: ['consultants', 'ads'])
 def home(request):
     # الحصول على الإعلانات النشطة للصفحة الرئيسية
     featured_ads = Advertisement.objects.filter(
@@ -723,16 +787,38 @@ def home(request):
        # is_featured=True
     ).order_by('?')[:4]  # 4 مستشارين مميزين
     
+    # أقرب المواعيد المتاحة (مسح فهرس available, next_free_slot_at)
+    available_soon = Consultant.objects.filter(
+        available=True,
+        next_free_slot_at__gte=timezone.now()
+    ).select_related('user').order_by('next_free_slot_at')[:4]
+    
     return render(request, 'home.html', {
         'featured_ads': featured_ads,
-        'featured_consultants': featured_consultants
+        'featured_consultants': featured_consultants,
+        'available_soon': available_soon
     })
 
+def faq_search(request):
+    results = faq_index.search(request.GET.get('q', ''), limit=10)
+    return JsonResponse([
+        {'id': entry.id, 'question': entry.question, 'answer': entry.answer, 'score': score}
+        for score, entry in results
+    ], safe=False)
+
 def custom_logout(request):
     logout(request)
     messages.success(request, 'تم تسجيل الخروج بنجاح')
     return redirect('home')
 
+@staff_member_required
+def throttle_stats(request):
+    return JsonResponse(throttling.stats())
+
+@staff_member_required
+def db_pool_stats(request):
+    return JsonResponse(db_pool.all_stats())
+
 def handler404(request, exception):
     return render(request, "404.html", status=404)
 
@@ -752,8 +838,40 @@ def autocomplete_consultants(request):
             'value': consultant.user.full_name,
             'url': f"/consultant/{consultant.id}/"
         })
+    # لا تسجيل هنا: الطلب يتكرر مع كل حرف؛ البحث يُحسب عند اختيار نتيجة (search_click)
     return JsonResponse(results, safe=False)
 
+@csrf_exempt
+@require_POST
+def search_click(request):
+    """نقرة على نتيجة بحث (navigator.sendBeacon)؛ تُجمع في الذاكرة ولا تكتب شيئاً هنا."""
+    source = request.POST.get('source')
+    consultant = request.POST.get('consultant', '')
+    if source not in search_analytics.SOURCES or not consultant.isdigit():
+        return HttpResponse(status=400)
+    query = request.POST.get('q', '')
+    if source == 'autocomplete':
+        # الاختيار هو ما يُحسب بحثاً للإكمال التلقائي، وله نتيجة واحدة على الأقل
+        search_analytics.record_search(source, query, 1)
+    search_analytics.record_click(source, query, int(consultant))
+    return HttpResponse(status=204)
+
+@staff_member_required
+def search_report(request):
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), 365)
+    except ValueError:
+        days = 30
+    top, failing, clicks = search_analytics.report(days=days)
+    return render(request, 'dashboard/search_report.html', {
+        'days': days,
+        'day_options': (7, 30, 90),
+        'top_queries': top,
+        'failing_queries': failing,
+        'top_clicks': clicks,
+        'pending': search_analytics.buffer.pending(),
+    })
+
 @login_required
 def consultation_list(request):
     status = request.GET.get('status', 'all')
@@ -763,27 +881,80 @@ def consultation_list(request):
     else:
         consultations = ConsultationRequest.objects.filter(consultant=request.user)
     
+    # السجل المؤرشف (core.archive) فقط عند طلبه
+    history = request.GET.get('history') == '1'
+    if history:
+        side = 'client' if request.user.role == User.Role.CLIENT else 'consultant'
+        archived = ArchivedConsultationRequest.objects.filter(**{side: request.user})
+    
     if status != 'all':
         consultations = consultations.filter(status=status)
+        if history:
+            archived = archived.filter(status=status)
     
-    consultations = consultations.order_by('-created_at')
+    consultations = consultations.select_related('client', 'consultant').order_by('-created_at')
+    if history:
+        consultations = archive.with_history(consultations, archived.select_related('client', 'consultant'))
+    page_obj = Paginator(consultations, 20).get_page(request.GET.get('page'))
     
     return render(request, 'consultations/list.html', {
-        'consultations': consultations,
-        'status': status
+        'consultations': page_obj,
+        'page_obj': page_obj,
+        'status': status,
+        'history': history,
+    })
+
+@login_required
+def appointment_list(request):
+    """مواعيد الاستشارة (Consultation) للعميل أو لمقدم الخدمة، مع السجل المؤرشف عند طلبه."""
+    if request.user.role == User.Role.CLIENT:
+        appointments = Consultation.objects.filter(client=request.user)
+        archived = ArchivedConsultation.objects.filter(client=request.user)
+    else:
+        appointments = Consultation.objects.filter(slot__provider=request.user)
+        archived = ArchivedConsultation.objects.filter(provider=request.user)
+    history = request.GET.get('history') == '1'
+
+    status = request.GET.get('status', 'all')
+    if status in Consultation.Status.values:
+        appointments = appointments.filter(status=status)
+        archived = archived.filter(status=status)
+
+    appointments = appointments.select_related('slot__provider', 'client', 'service').order_by('-created_at')
+    if history:
+        appointments = archive.with_history(appointments, archived.select_related('provider', 'client', 'service'))
+    page_obj = Paginator(appointments, 20).get_page(request.GET.get('page'))
+
+    return render(request, 'consultations/appointments.html', {
+        'appointments': page_obj,
+        'page_obj': page_obj,
+        'status': status,
+        'statuses': Consultation.Status.choices,
+        'history': history,
     })
 
 @login_required
 def consultation_detail(request, pk):
-    consultation = get_object_or_404(ConsultationRequest, pk=pk)
+    consultation = (
+        ConsultationRequest.objects.filter(pk=pk).first()
+        or get_object_or_404(ArchivedConsultationRequest, pk=pk)
+    )
     
     # التحقق من صلاحيات الوصول
     if request.user not in [consultation.client, consultation.consultant]:
         messages.error(request, 'ليس لديك صلاحية لعرض هذه الاستشارة.')
         return redirect('dashboard')
     
+    # الوثائق المرفقة: للعميل دائماً، وللمستشار ما دام الطلب نشطاً (Document.can_access)
+    documents = []
+    if not getattr(consultation, 'is_archived', False) and (
+        request.user == consultation.client or consultation.status in ConsultationRequest.ACTIVE_STATUSES
+    ):
+        documents = consultation.documents.filter(user=consultation.client)
+    
     return render(request, 'consultations/detail.html', {
-        'consultation': consultation
+        'consultation': consultation,
+        'documents': documents,
     })
 
 @login_required
@@ -814,11 +985,19 @@ def respond_to_consultation(request, pk):
 @login_required
 def my_bookings(request):
     bookings = Booking.objects.filter(client=request.user).order_by('-created_at')
+    # السجل المؤرشف (core.archive) فقط عند طلبه
+    history = request.GET.get('history') == '1'
+    archived = ArchivedBooking.objects.filter(client=request.user)
     
     # تصفية الحجوزات حسب الحالة
     status = request.GET.get('status')
     if status in ['pending', 'confirmed', 'completed', 'cancelled']:
         bookings = bookings.filter(status=status)
+        archived = archived.filter(status=status)
+    
+    if history:
+        related = ('service__provider__consultant',)
+        bookings = archive.with_history(bookings.select_related('slot', *related), archived.select_related(*related))
     
     # الترقيم
     paginator = Paginator(bookings, 10)
@@ -828,12 +1007,16 @@ def my_bookings(request):
     return render(request, 'bookings/list.html', {
         'bookings': page_obj,
         'page_obj': page_obj,
-        'is_paginated': page_obj.has_other_pages()
+        'is_paginated': page_obj.has_other_pages(),
+        'history': history,
     })
 
 @login_required
 def booking_detail(request, pk):
-    booking = get_object_or_404(Booking, pk=pk, client=request.user)
+    booking = (
+        Booking.objects.filter(pk=pk, client=request.user).first()
+        or get_object_or_404(ArchivedBooking, pk=pk, client=request.user)
+    )
     return render(request, 'bookings/detail.html', {'booking': booking})
 
 @login_required
@@ -897,34 +1080,39 @@ def edit_consultant(request):
     consultant = get_object_or_404(Consultant, user=request.user)
     
     if request.method == 'POST':
-        form = ConsultantForm(request.POST, instance=consultant)
+        form = ConsultantForm(request.POST, request.FILES, instance=consultant)
         
         if form.is_valid():
-            # حفظ بيانات الموديل الأساسية
-            consultant = form.save()
-            
-            # معالجة الحقول الإضافية (يمكنك تخزينها كما تريد)
-            title = form.cleaned_data['title']
-            session_duration = form.cleaned_data['session_duration']
-            session_price = form.cleaned_data['session_price']
-            working_hours = form.cleaned_data['working_hours']
-            
-            # مثال: حفظ في جلسة المستخدم (يمكنك التعديل حسب حاجتك)
-            request.session['consultant_extra_data'] = {
-                'title': title,
-                'session_duration': session_duration,
-                'session_price': session_price,
-                'working_hours': working_hours
-            }
-            
+            # أوقات العمل تُحفظ في WorkingHours مع بيانات المستشار
+            form.save()
+            messages.success(request, 'تم تحديث بيانات المستشار بنجاح')
             return redirect('provider_profile')
     else:
-        # تحميل القيم الأولية من الجلسة إن وجدت
-        initial_data = request.session.get('consultant_extra_data', {})
-        form = ConsultantForm(instance=consultant, initial=initial_data)
+        form = ConsultantForm(instance=consultant)
     
     return render(request, 'consultants/edit.html', {'form': form})
 
+def search_services(request):
+    query = request.GET.get('q', '').strip()
+    results = search.search_services(query)
+    # الحد محصور في معاملة trigram_threshold: العدّ والصفحة يُنفَّذان داخلها
+    with search.trigram_threshold(results.db):
+        page_obj = Paginator(results, 12).get_page(request.GET.get('page'))
+        page_obj.object_list = list(page_obj.object_list)
+    return render(request, 'services/search.html', {
+        'services': page_obj,
+        'search_query': query,
+    })
+
+def _service_validator(request, pk):
+    # القالب لا يعرض إلا حقول الخدمة نفسها؛ ما يخص المستخدم (الشارات، إصداره، كوكي CSRF)
+    # يدخل في ETag من core.conditional، فـ updated_at يكفي
+    updated_at = Service.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return updated_at.timestamp(), updated_at
+
+@conditional_page(_service_validator)
 def service_detail(request, pk):
     service = get_object_or_404(Service, pk=pk)
     return render(request, 'services/detail.html', {'service': service})
\ No newline at end of file
@@ -9,7 +9,6 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
-from cloudinary_storage.storage import MediaCloudinaryStorage
 from pathlib import Path
 import os
 import dj_database_url
@@ -43,8 +42,6 @@ INSTALLED_APPS = [
     'core',
     'services',
     'users',
-    'cloudinary',
-    'cloudinary_storage',
 
 ]
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
@@ -67,10 +64,41 @@ CLOUDINARY_STORAGE = {
     'API_SECRET': os.environ.get('CLOUDINARY_API_SECRET'),
 }
 
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+# تخزين الوسائط: 'filesystem' (الافتراضي: ما كان يعمل فعلاً، لأن Django 5.2 يتجاهل
+# DEFAULT_FILE_STORAGE القديم)، أو 'cloudinary' عند ضبطه صراحةً مع بياناته، أو 'local'
+# للقياس دون اتصال (core.storage.LocalMediaStorage يحاكي سلوك Cloudinary وزمن الشبكة)
+MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE', 'filesystem')
+MEDIA_STORAGE_LATENCY_MS = int(os.environ.get('MEDIA_STORAGE_LATENCY_MS', '0'))
+
+MEDIA_STORAGE_BACKENDS = {
+    'filesystem': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'cloudinary': {
+        'BACKEND': 'cloudinary_storage.storage.MediaCloudinaryStorage',
+    },
+    'local': {
+        'BACKEND': 'core.storage.LocalMediaStorage',
+        'OPTIONS': {'latency_ms': MEDIA_STORAGE_LATENCY_MS},
+    },
+}
+
+if MEDIA_STORAGE == 'cloudinary':
+    # لا نضيف تطبيق 'cloudinary' نفسه (لا نستخدم وسومه في القوالب)؛ الحزمة تُستورد
+    # عند أول استخدام للتخزين بدل كل إقلاع
+    INSTALLED_APPS += ['cloudinary_storage']
+
+STORAGES = {
+    'default': MEDIA_STORAGE_BACKENDS[MEDIA_STORAGE],
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # قبل كل ما يقرأ من القاعدة (الجلسات والمستخدم)
+    'core.db_router.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,12 +116,19 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS':  [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.navbar',
+            ],
+            # القوالب (ومنها partials) تُحلَّل مرة واحدة لكل عملية؛ autoreload يفرغها عند التعديل
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -115,6 +150,51 @@ DATABASES = {
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# نسخ قراءة (core.db_router): روابط مفصولة بفواصل، replica_0 و replica_1 ...
+# محلياً: DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3 (نسخة من ملف القاعدة)
+DATABASE_REPLICA_URLS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+for _index, _url in enumerate(DATABASE_REPLICA_URLS):
+    DATABASES[f'replica_{_index}'] = dj_database_url.parse(
+        _url.strip(), conn_max_age=600, ssl_require=_url.strip().startswith('postgres'),
+    )
+    # الاختبارات تقرأ من قاعدة الاختبار نفسها
+    DATABASES[f'replica_{_index}']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+# بعد أي كتابة تبقى قراءات الجلسة على القاعدة الرئيسية هذه المدة (ثوانٍ)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '10'))
+# فحص صحة النسخ: كل interval ثانية، ونسخة متأخرة أكثر من max_lag ثانية تُستبعد
+REPLICA_HEALTH = {
+    'interval': int(os.environ.get('REPLICA_HEALTH_INTERVAL', '5')),
+    'max_lag': int(os.environ.get('REPLICA_MAX_LAG_SECONDS', '10')),
+}
+
+# تجمع اتصالات psycopg 3 (DATABASE_POOL=1) بدل اتصال دائم لكل خيط؛ مقاييسه في core.db_pool
+DATABASE_POOL = os.environ.get('DATABASE_POOL', '0') == '1'
+DATABASE_POOL_OPTIONS = {
+    'min_size': int(os.environ.get('DATABASE_POOL_MIN_SIZE', '2')),
+    'max_size': int(os.environ.get('DATABASE_POOL_MAX_SIZE', '10')),
+    # أقصى انتظار لاتصال متاح قبل PoolTimeout (ثوانٍ)
+    'timeout': float(os.environ.get('DATABASE_POOL_TIMEOUT', '10')),
+    'max_idle': float(os.environ.get('DATABASE_POOL_MAX_IDLE', '300')),
+    'max_lifetime': float(os.environ.get('DATABASE_POOL_MAX_LIFETIME', '1800')),
+}
+for _database in DATABASES.values():
+    if _database['ENGINE'] != 'django.db.backends.postgresql':
+        continue
+    # يفحص الاتصال قبل استخدامه (وفي وضع التجمع: عند كل سحب من التجمع)
+    _database['CONN_HEALTH_CHECKS'] = True
+    if DATABASE_POOL:
+        # التجمع لا يعمل مع الاتصالات الدائمة
+        _database['CONN_MAX_AGE'] = 0
+        _database.setdefault('OPTIONS', {})['pool'] = dict(DATABASE_POOL_OPTIONS)
+
+# بحث trigram (core.search) يحتاج lookups الخاصة بـ PostgreSQL
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    INSTALLED_APPS += ['django.contrib.postgres']
+
+# حد التشابه الأدنى لنتائج البحث التقريبي (pg_trgm)
+SEARCH_TRIGRAM_THRESHOLD = float(os.environ.get('SEARCH_TRIGRAM_THRESHOLD', '0.3'))
+
 
 #handler404 = 'core.views.handler404'
 
@@ -177,13 +257,120 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # إعدادات المصادقة
 AUTHENTICATION_BACKENDS = [
+    # يغطي ما كان يقوم به ModelBackend؛ إضافته بعده تعني تجزئة ثانية عند كل فشل
     'core.backends.EmailAuthBackend',  # استبدل core باسم تطبيقك
-    'django.contrib.auth.backends.ModelBackend',
 ]
+# مدة الاحتفاظ بالمستخدم المحمّل في get_user داخل كل عملية (ثوانٍ)
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', '30'))
+# إصدارات المستخدمين لإبطال تلك النسخ؛ مع ذاكرة محلية (LocMem الافتراضية) لا تُحفظ نسخ أصلاً،
+# فالتفعيل يتطلب USER_CACHE_BACKEND مشتركاً (Redis/Memcached/DatabaseCache)
+AUTH_USER_VERSION_CACHE = 'users'
 
 AUTH_USER_MODEL = 'core.User'  # استبدل core باسم تطبيقك
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # سياسة تحديد المعدل وإحصاءاته (core.throttling)؛ العدّادات نفسها في جدول ThrottleCounter
+    'throttle': {
+        'BACKEND': os.environ.get('THROTTLE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('THROTTLE_CACHE_LOCATION', 'throttle'),
+    },
+    # إصدارات المستخدمين (core.backends.invalidate_cached_user)
+    'users': {
+        'BACKEND': os.environ.get('USER_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('USER_CACHE_LOCATION', 'users'),
+    },
+    # ذاكرة cached_db؛ يجب أن تكون مشتركة بين العمال (Redis/Memcached)، وإلا يفشل manage.py check (core.E001)
+    'sessions': {
+        'BACKEND': os.environ.get('SESSION_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('SESSION_CACHE_LOCATION', 'sessions'),
+    },
+    # صفحات الزوار غير المسجلين وإصدارات وسومها (core.page_cache)؛ مع أكثر من عامل يجب أن تكون
+    # مشتركة وإلا لا يصل الإبطال لبقية العمال (core.W001 في check --deploy)
+    'pages': {
+        'BACKEND': os.environ.get('PAGE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('PAGE_CACHE_LOCATION', 'pages'),
+    },
+}
+
+# لقطة شريط التنقل لكل مستخدم (core.navbar)؛ لا تُحفظ إن كانت 'users' محلية للعملية (LocMem الافتراضية)
+NAVBAR_CACHE = 'users'
+NAVBAR_CACHE_TTL = int(os.environ.get('NAVBAR_CACHE_TTL', '300'))
+
+PAGE_CACHE_ALIAS = 'pages'
+# 0 يعطّل ذاكرة الصفحات؛ نفس القيمة تُرسل كـ s-maxage للـ CDN
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', '300'))
+# أقصى عمر للقطة الأسئلة الشائعة في كل عملية قبل مقارنتها بقاعدة البيانات (core.faq_index)
+FAQ_SNAPSHOT_MAX_AGE = int(os.environ.get('FAQ_SNAPSHOT_MAX_AGE', '60'))
+
+# درجة ترتيب المستشارين (core.ranking)؛ الأوزان مجموعها 1
+RANKING = {
+    'weights': {'rating': 0.45, 'bookings': 0.2, 'response': 0.2, 'availability': 0.15},
+    'prior_weight': 5,
+    'booking_window_days': 30,
+    'slot_half_life_hours': 72,
+}
+
+# "مستشارون مشابهون" (core.recommendations): تشابه التخصصات + العملاء المشتركين
+RECOMMENDATIONS = {
+    'k': 6,
+    'weights': {'categories': 0.35, 'cobooking': 0.55, 'rank': 0.1},
+    # أعلى المستشارين ترتيباً المرشحين من كل تخصص (بدل كل أزواج التخصص)
+    'candidates_per_category': 50,
+    # أحدث المستشارين لكل عميل في حساب الحجز المشترك (عدد الأزواج تربيعي)
+    'max_consultants_per_client': 30,
+    'booking_window_days': 365,
+}
+
+# أرشفة السجلات المغلقة (core.archive): أقدم من after_months تنتقل إلى جداول Archived*
+# أطول من نوافذ RANKING و RECOMMENDATIONS حتى لا تتغير الدرجات بعد الأرشفة
+ARCHIVE = {
+    'after_months': int(os.environ.get('ARCHIVE_AFTER_MONTHS', '13')),
+    'batch_size': 1000,
+}
+
+# إحصاءات البحث (core.search_analytics): تُجمع في الذاكرة وتُفرغ دورياً
+SEARCH_ANALYTICS = {
+    'enabled': os.environ.get('SEARCH_ANALYTICS_ENABLED', '1') == '1',
+    'flush_interval': int(os.environ.get('SEARCH_ANALYTICS_FLUSH_INTERVAL', '30')),
+    'max_keys': 500,
+}
+
+# أعداد التصفية لكل تركيبة فلاتر (core.facets)؛ تُبطل بإصدارات وسوم الصفحات، فمع ذاكرة محلية
+# للعملية أو فلتر available_within لا تتجاوز مدتها PAGE_CACHE_TIMEOUT
+FACET_CACHE = 'pages'
+FACET_CACHE_TTL = int(os.environ.get('FACET_CACHE_TTL', '3600'))
+
+# حدود محاولات الدخول والتسجيل الافتراضية (تُستبدل بـ LoginThrottlePolicy من لوحة الإدارة)
+LOGIN_THROTTLE_CACHE = 'throttle'
+# عدد الوكلاء الموثوقين أمام التطبيق (موازن Render = 1)؛ 0 يتجاهل X-Forwarded-For
+LOGIN_THROTTLE_TRUSTED_PROXIES = int(os.environ.get('LOGIN_THROTTLE_TRUSTED_PROXIES', '0'))
+LOGIN_THROTTLE = {
+    'login': {
+        'enabled': True,
+        'ip_capacity': 20, 'ip_per_minute': 10,
+        'email_capacity': 5, 'email_per_minute': 1,
+    },
+    'register': {
+        'enabled': True,
+        'ip_capacity': 5, 'ip_per_minute': 1,
+        'email_capacity': 3, 'email_per_minute': 1,
+    },
+}
+
 # إعدادات الجلسة
+# 'db': جدول django_session (قراءة في كل طلب)
+# 'cached_db': نفس الجدول مع ذاكرة مؤقتة أمامه؛ التحويل إليه لا يُسقط الجلسات القائمة
+# 'signed_cookies': لا قاعدة بيانات؛ core.sessions يرحّل الجلسات القائمة عند أول طلب
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'core.sessions',
+}[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = 'sessions'
 SESSION_COOKIE_AGE = 1209600  # أسبوعين بالثواني
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 #handler404 = 'core.views.handler404'
@@ -192,8 +379,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
+# تقديم الوثائق الخاصة: 'django' (تطوير) أو 'nginx' (X-Accel-Redirect) أو 'apache' (X-Sendfile)
+DOCUMENT_SERVE_MODE = os.environ.get('DOCUMENT_SERVE_MODE', 'django')
+# موقع internal في nginx يشير إلى مجلد/مصدر الوسائط
+DOCUMENT_ACCEL_PREFIX = os.environ.get('DOCUMENT_ACCEL_PREFIX', '/protected-media/')
 
 
+# ميزانية زمن استيراد تطبيق WSGI وجدول الروابط في عملية جديدة (اختبار core.tests)
+STARTUP_IMPORT_BUDGET_MS = int(os.environ.get('STARTUP_IMPORT_BUDGET_MS', '1500'))
@@ -15,13 +15,24 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path , include
+from django.urls import path , include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.downloads import serve_public_media
 
 #handler404 = 'core.views.handler404'
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('',include('core.urls'))
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+if settings.DEBUG:
+    # الوسائط العامة فقط؛ الوثائق الخاصة تمر عبر download_document
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'),
+            serve_public_media,
+            {'document_root': settings.MEDIA_ROOT},
+        ),
+    ]
 